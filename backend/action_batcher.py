@@ -0,0 +1,98 @@
+"""
+Micro-batching of integration actions during item-batch executions.
+
+When a workflow runs over many items, the same ACTION node is reached by many
+items at about the same time. For actions whose catalog entry is marked
+``bulk`` those calls are held for a few milliseconds and sent as one bulk
+call of up to ``max_batch_size`` items; every caller still gets its own result.
+"""
+import asyncio
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+import logging
+
+from integrations_engine import integrations_engine
+
+logger = logging.getLogger(__name__)
+
+
+class _PendingBatch:
+    __slots__ = ("integration_id", "action_id", "config", "connection_id", "timeout", "items", "timer")
+
+    def __init__(self, integration_id: str, action_id: str, config: Dict[str, Any], connection_id: Optional[str],
+                 timeout: Optional[float]):
+        self.integration_id = integration_id
+        self.action_id = action_id
+        self.config = config
+        self.connection_id = connection_id
+        self.timeout = timeout
+        self.items: List[Tuple[Mapping[str, Any], asyncio.Future]] = []
+        self.timer: Optional[asyncio.TimerHandle] = None
+
+
+class ActionBatcher:
+    """Coalesces concurrent calls of a bulk-capable action into chunked bulk calls."""
+
+    def __init__(self, linger: float = 0.02):
+        # How long the first call of a chunk waits for others to join it
+        self.linger = linger
+        self._batches: Dict[Tuple[str, str, str, Optional[str]], _PendingBatch] = {}
+        self._sending: set = set()
+        self.calls = 0
+        self.bulk_calls = 0
+
+    async def execute_action(self, node_id: str, integration_id: str, action_id: str,
+                             config: Dict[str, Any], data: Mapping[str, Any], connection_id: Optional[str] = None,
+                             timeout: Optional[float] = None) -> Dict[str, Any]:
+        """Execute an action for one item, batched with concurrent items of the same node when possible."""
+        self.calls += 1
+        limit = integrations_engine.get_bulk_limit(integration_id, action_id)
+        if not limit:
+            return await integrations_engine.execute_action(integration_id, action_id, config, data, connection_id, timeout)
+
+        loop = asyncio.get_running_loop()
+        key = (node_id, integration_id, action_id, connection_id)
+        batch = self._batches.get(key)
+        if batch is None:
+            batch = self._batches[key] = _PendingBatch(integration_id, action_id, config, connection_id, timeout)
+            batch.timer = loop.call_later(self.linger, self._flush, key)
+
+        future = loop.create_future()
+        batch.items.append((data, future))
+        if len(batch.items) >= limit:
+            self._flush(key)
+        return await future
+
+    def _flush(self, key: Tuple[str, str, str, Optional[str]]):
+        batch = self._batches.pop(key, None)
+        if batch is None:
+            return
+        batch.timer.cancel()
+        task = asyncio.create_task(self._send(batch))
+        self._sending.add(task)
+        task.add_done_callback(self._sending.discard)
+
+    async def _send(self, batch: _PendingBatch):
+        self.bulk_calls += 1
+        try:
+            results = await integrations_engine.execute_bulk_action(
+                batch.integration_id, batch.action_id, batch.config, [data for data, _ in batch.items],
+                batch.connection_id, batch.timeout
+            )
+        except Exception as e:
+            for _, future in batch.items:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future), result in zip(batch.items, results):
+            if not future.done():
+                future.set_result(result)
+
+    async def close(self):
+        """Send whatever is still pending and wait for bulk calls in flight."""
+        for key in list(self._batches):
+            self._flush(key)
+        if self._sending:
+            await asyncio.gather(*self._sending, return_exceptions=True)
+
+    def get_stats(self) -> Dict[str, int]:
+        return {"calls": self.calls, "bulk_calls": self.bulk_calls}
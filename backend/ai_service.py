@@ -58,8 +58,8 @@ class AIService:
         if not any([self.groq_api_key, self.openai_api_key, self.anthropic_api_key, self.gemini_api_key]):
             logger.warning("No AI API keys found, using mock responses")
     
-    async def process_with_groq(self, prompt: str, context: Dict[str, Any] = None) -> Dict[str, Any]:
-        """Process a prompt with GROQ AI."""
+    async def process_with_groq(self, prompt: str, context: Dict[str, Any] = None, timeout: Optional[float] = None) -> Dict[str, Any]:
+        """Process a prompt with GROQ AI (timeout in seconds bounds the API request)."""
         if not self.groq_client:
             return {"response": "GROQ AI not configured", "confidence": 0.0}
         
@@ -86,7 +86,8 @@ Please provide a helpful response based on the context and task.
                     {"role": "user", "content": full_prompt}
                 ],
                 temperature=0.7,
-                max_tokens=1000
+                max_tokens=1000,
+                **({"timeout": timeout} if timeout else {})
             )
             
             processing_time = (datetime.utcnow() - start_time).total_seconds()
@@ -0,0 +1,257 @@
+"""
+Eviction policies for CacheService.
+
+A policy only tracks keys; the cache decides when it is over budget and asks
+the policy for victims. Every operation is O(1), amortized for the sketch
+aging in W-TinyLFU and for LFU evictions right after explicit removals.
+
+- ``lru``: least recently used.
+- ``lfu``: least frequently used, ties broken by recency (frequency buckets).
+- ``w-tinylfu``: a small LRU window in front of a segmented LRU main area;
+  entries leaving the window only displace a main-area entry if a count-min
+  sketch says they are used more often. One-off keys (scans, adversarial key
+  cardinality) churn through the window without flushing the hot set.
+"""
+from collections import OrderedDict
+from typing import Dict, Hashable, Optional
+
+
+class EvictionPolicy:
+    """Key bookkeeping interface used by CacheService."""
+
+    def insert(self, key: Hashable):
+        raise NotImplementedError
+
+    def access(self, key: Hashable):
+        raise NotImplementedError
+
+    def remove(self, key: Hashable):
+        raise NotImplementedError
+
+    def evict(self) -> Optional[Hashable]:
+        """Remove and return the next victim (None when empty)."""
+        raise NotImplementedError
+
+    def __len__(self) -> int:
+        raise NotImplementedError
+
+
+class LRUPolicy(EvictionPolicy):
+    def __init__(self, max_entries: int = 0):
+        self._order: "OrderedDict[Hashable, None]" = OrderedDict()
+
+    def insert(self, key: Hashable):
+        self._order[key] = None
+        self._order.move_to_end(key)
+
+    def access(self, key: Hashable):
+        if key in self._order:
+            self._order.move_to_end(key)
+
+    def remove(self, key: Hashable):
+        self._order.pop(key, None)
+
+    def evict(self) -> Optional[Hashable]:
+        if not self._order:
+            return None
+        return self._order.popitem(last=False)[0]
+
+    def __len__(self) -> int:
+        return len(self._order)
+
+
+class LFUPolicy(EvictionPolicy):
+    """Constant-time LFU: keys grouped in per-frequency LRU buckets."""
+
+    def __init__(self, max_entries: int = 0):
+        self._frequency: Dict[Hashable, int] = {}
+        self._buckets: Dict[int, "OrderedDict[Hashable, None]"] = {}
+        self._min_frequency = 0
+
+    def _bucket(self, frequency: int) -> "OrderedDict[Hashable, None]":
+        bucket = self._buckets.get(frequency)
+        if bucket is None:
+            bucket = self._buckets[frequency] = OrderedDict()
+        return bucket
+
+    def insert(self, key: Hashable):
+        if key in self._frequency:
+            self.access(key)
+            return
+        self._frequency[key] = 1
+        self._bucket(1)[key] = None
+        self._min_frequency = 1
+
+    def access(self, key: Hashable):
+        frequency = self._frequency.get(key)
+        if frequency is None:
+            return
+        bucket = self._buckets[frequency]
+        del bucket[key]
+        if not bucket:
+            del self._buckets[frequency]
+            if self._min_frequency == frequency:
+                self._min_frequency = frequency + 1
+        self._frequency[key] = frequency + 1
+        self._bucket(frequency + 1)[key] = None
+
+    def remove(self, key: Hashable):
+        frequency = self._frequency.pop(key, None)
+        if frequency is None:
+            return
+        bucket = self._buckets[frequency]
+        del bucket[key]
+        if not bucket:
+            del self._buckets[frequency]
+            if self._min_frequency == frequency:
+                # Unknown until the next insert or eviction
+                self._min_frequency = 0
+
+    def evict(self) -> Optional[Hashable]:
+        if not self._frequency:
+            return None
+        bucket = self._buckets.get(self._min_frequency)
+        if bucket is None:
+            # Only after explicit removals emptied the lowest bucket
+            self._min_frequency = min(self._buckets)
+            bucket = self._buckets[self._min_frequency]
+        key, _ = bucket.popitem(last=False)
+        if not bucket:
+            del self._buckets[self._min_frequency]
+        del self._frequency[key]
+        return key
+
+    def __len__(self) -> int:
+        return len(self._frequency)
+
+
+class CountMinSketch:
+    """4-row count-min sketch of small saturating counters, halved periodically so old popularity fades."""
+
+    __slots__ = ("width", "mask", "rows", "additions", "sample_size")
+
+    DEPTH = 4
+    MAX_COUNT = 15
+
+    def __init__(self, max_entries: int):
+        # Rows are indexed by 16-bit hash slices, so at most 65536 counters each
+        width = 16
+        while width < max_entries and width < 1 << 16:
+            width <<= 1
+        self.width = width
+        self.mask = width - 1
+        self.rows = [bytearray(width) for _ in range(self.DEPTH)]
+        self.additions = 0
+        self.sample_size = 10 * width
+
+    def _hash(self, key: Hashable) -> int:
+        # Mix once, then each row reads its own 16-bit slice (unrolled below: this runs on every cache read)
+        return (hash(key) * 0x9E3779B97F4A7C15) & 0xFFFFFFFFFFFFFFFF
+
+    def increment(self, key: Hashable):
+        h = self._hash(key)
+        mask, limit = self.mask, self.MAX_COUNT
+        row0, row1, row2, row3 = self.rows
+        i = h & mask
+        if row0[i] < limit:
+            row0[i] += 1
+        i = (h >> 16) & mask
+        if row1[i] < limit:
+            row1[i] += 1
+        i = (h >> 32) & mask
+        if row2[i] < limit:
+            row2[i] += 1
+        i = (h >> 48) & mask
+        if row3[i] < limit:
+            row3[i] += 1
+        self.additions += 1
+        if self.additions >= self.sample_size:
+            self._age()
+
+    def frequency(self, key: Hashable) -> int:
+        h = self._hash(key)
+        mask = self.mask
+        row0, row1, row2, row3 = self.rows
+        return min(row0[h & mask], row1[(h >> 16) & mask], row2[(h >> 32) & mask], row3[(h >> 48) & mask])
+
+    def _age(self):
+        halve = bytes(count >> 1 for count in range(256))
+        self.rows = [row.translate(halve) for row in self.rows]
+        self.additions //= 2
+
+
+class WTinyLFUPolicy(EvictionPolicy):
+    """Window TinyLFU: 1% LRU window, main area split 20/80 into probation and protected LRUs."""
+
+    def __init__(self, max_entries: int):
+        max_entries = max(max_entries, 2)
+        self.window_size = max(1, max_entries // 100)
+        self.protected_size = max(1, int((max_entries - self.window_size) * 0.8))
+        self.sketch = CountMinSketch(max_entries)
+        self._window: "OrderedDict[Hashable, None]" = OrderedDict()
+        self._probation: "OrderedDict[Hashable, None]" = OrderedDict()
+        self._protected: "OrderedDict[Hashable, None]" = OrderedDict()
+
+    def insert(self, key: Hashable):
+        if key in self._window or key in self._probation or key in self._protected:
+            self.access(key)
+            return
+        self.sketch.increment(key)
+        self._window[key] = None
+        if len(self._window) > self.window_size:
+            # Overflowing window entries become admission candidates at the probation MRU end
+            candidate, _ = self._window.popitem(last=False)
+            self._probation[candidate] = None
+
+    def access(self, key: Hashable):
+        self.sketch.increment(key)
+        if key in self._protected:
+            self._protected.move_to_end(key)
+        elif key in self._window:
+            self._window.move_to_end(key)
+        elif key in self._probation:
+            del self._probation[key]
+            self._protected[key] = None
+            if len(self._protected) > self.protected_size:
+                demoted, _ = self._protected.popitem(last=False)
+                self._probation[demoted] = None
+
+    def remove(self, key: Hashable):
+        for segment in (self._window, self._probation, self._protected):
+            if key in segment:
+                del segment[key]
+                return
+
+    def evict(self) -> Optional[Hashable]:
+        if self._probation:
+            victim = next(iter(self._probation))
+            candidate = next(reversed(self._probation))
+            if candidate != victim and self.sketch.frequency(candidate) > self.sketch.frequency(victim):
+                del self._probation[victim]
+                return victim
+            # The newcomer is not used more often than what it would displace: reject it
+            del self._probation[candidate]
+            return candidate
+        if self._protected:
+            return self._protected.popitem(last=False)[0]
+        if self._window:
+            return self._window.popitem(last=False)[0]
+        return None
+
+    def __len__(self) -> int:
+        return len(self._window) + len(self._probation) + len(self._protected)
+
+
+POLICIES = {
+    "lru": LRUPolicy,
+    "lfu": LFUPolicy,
+    "w-tinylfu": WTinyLFUPolicy
+}
+
+
+def make_policy(name: str, max_entries: int) -> EvictionPolicy:
+    """Create an eviction policy by name (lru, lfu or w-tinylfu)."""
+    try:
+        return POLICIES[name.lower()](max_entries)
+    except KeyError:
+        raise ValueError(f"Unknown cache eviction policy '{name}', expected one of {', '.join(POLICIES)}")
@@ -0,0 +1,280 @@
+"""
+Shared Redis tier (L2) behind the in-process CacheService (L1).
+
+Every replica keeps its own bounded L1; the L2 is shared, so a value computed
+by one replica is a hit for all of them. Writes, deletes and invalidations are
+published on a pub/sub channel and the other replicas drop those keys from
+their L1, which therefore never serves a value the L2 no longer has.
+
+Pattern invalidation uses tag sets instead of KEYS: each key is added to one
+set per ``:``-separated prefix of it ("user_workflows:42:recent" to the sets
+of "user_workflows" and "user_workflows:42"), so ``prefix:*`` invalidates by
+reading one set. Other patterns fall back to an incremental SCAN. Deletes
+remove keys from their tag sets, and members whose entry expired are pruned
+by sampling the tag sets of written keys now and then.
+
+The client is any redis.asyncio-compatible client created without
+decode_responses; fakeredis.aioredis.FakeRedis works as a local stand-in.
+Redis errors are logged and treated as misses: the L1 keeps serving.
+"""
+import asyncio
+import json
+import logging
+import re
+import uuid
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# "prefix:*" with no other glob characters
+_PREFIX_PATTERN = re.compile(r'^([^*?\[\]]+):\*$')
+
+# Stored values start with a type marker: raw bytes are kept as-is, everything else is JSON
+_BYTES = b'b'
+_JSON = b'j'
+
+# EXPIRE that only ever extends a key's TTL (EXPIRE ... GT, which needs Redis 7, for any version)
+_EXTEND_EXPIRY = """
+local ttl = redis.call('TTL', KEYS[1])
+if ttl >= 0 and ttl >= tonumber(ARGV[1]) then return 0 end
+return redis.call('EXPIRE', KEYS[1], ARGV[1])
+"""
+
+
+class RedisCacheTier:
+    """Async Redis L2 with prefix tag sets and pub/sub invalidation."""
+
+    def __init__(self, client, namespace: str = "cache", reconnect_delay: float = 1.0,
+                 prune_every: int = 100, prune_sample: int = 20):
+        self.client = client
+        self.namespace = namespace
+        self.channel = f"{namespace}:invalidate"
+        self.reconnect_delay = reconnect_delay
+        # Every prune_every sets, the written key's tag sets are sampled for members that expired
+        self.prune_every = prune_every
+        self.prune_sample = prune_sample
+        self._sets_since_prune = 0
+        # Lets a replica ignore its own invalidation messages
+        self.instance_id = uuid.uuid4().hex
+        self.stats = {'hits': 0, 'misses': 0, 'sets': 0, 'invalidations_sent': 0,
+                      'invalidations_received': 0, 'tags_pruned': 0, 'errors': 0}
+
+    @classmethod
+    def from_url(cls, url: str, **kwargs) -> "RedisCacheTier":
+        import redis.asyncio as redis_async
+        return cls(redis_async.from_url(url), **kwargs)
+
+    def _key(self, key: str) -> str:
+        return f"{self.namespace}:k:{key}"
+
+    def _tag_key(self, tag: str) -> str:
+        return f"{self.namespace}:t:{tag}"
+
+    @staticmethod
+    def tags_for(key: str) -> List[str]:
+        """Every proper ``:``-prefix of the key."""
+        parts = key.split(':')
+        return [':'.join(parts[:index]) for index in range(1, len(parts))]
+
+    @staticmethod
+    def encode(value: Any) -> bytes:
+        if isinstance(value, bytes):
+            return _BYTES + value
+        return _JSON + json.dumps(value, default=str).encode()
+
+    @staticmethod
+    def decode(payload: bytes) -> Any:
+        if payload[:1] == _BYTES:
+            return payload[1:]
+        return json.loads(payload[1:])
+
+    def _failed(self, operation: str, error: Exception):
+        self.stats['errors'] += 1
+        logger.warning(f"Redis cache tier {operation} failed: {error}")
+
+    def _message(self, **payload) -> str:
+        self.stats['invalidations_sent'] += 1
+        return json.dumps({'origin': self.instance_id, **payload})
+
+    async def get(self, key: str) -> Tuple[bool, Any, float]:
+        """(found, value, remaining TTL in seconds)."""
+        try:
+            pipe = self.client.pipeline(transaction=False)
+            pipe.get(self._key(key))
+            pipe.pttl(self._key(key))
+            payload, remaining_ms = await pipe.execute()
+        except Exception as e:
+            self._failed("get", e)
+            return False, None, 0.0
+        if payload is None or remaining_ms == -2:
+            self.stats['misses'] += 1
+            return False, None, 0.0
+        self.stats['hits'] += 1
+        # -1: no expiry set on the key (written by something else); treat as a fresh default
+        return True, self.decode(payload), remaining_ms / 1000 if remaining_ms > 0 else 0.0
+
+    async def exists(self, key: str) -> bool:
+        try:
+            return bool(await self.client.exists(self._key(key)))
+        except Exception as e:
+            self._failed("exists", e)
+            return False
+
+    async def set(self, key: str, value: Any, ttl: int) -> bool:
+        """Store the value, tag it by prefix and tell other replicas to drop their copy."""
+        try:
+            pipe = self.client.pipeline(transaction=False)
+            pipe.set(self._key(key), self.encode(value), ex=ttl)
+            for tag in self.tags_for(key):
+                tag_key = self._tag_key(tag)
+                pipe.sadd(tag_key, key)
+                # A tag set lives as long as its longest-lived member
+                pipe.eval(_EXTEND_EXPIRY, 1, tag_key, ttl)
+            pipe.publish(self.channel, self._message(op='keys', keys=[key]))
+            await pipe.execute()
+        except Exception as e:
+            self._failed("set", e)
+            return False
+        self.stats['sets'] += 1
+        self._sets_since_prune += 1
+        if self._sets_since_prune >= self.prune_every:
+            self._sets_since_prune = 0
+            await self._prune_tags(self.tags_for(key))
+        return True
+
+    def _untag(self, pipe, keys: Iterable[str], skip: Optional[str] = None):
+        """Queue removal of keys from their tag sets (except skip, which is being deleted anyway)."""
+        for key in keys:
+            for tag in self.tags_for(key):
+                if tag != skip:
+                    pipe.srem(self._tag_key(tag), key)
+
+    async def _prune_tags(self, tags: Iterable[str]):
+        """Drop members whose entry expired from the given tag sets, by sampling.
+
+        Like Redis' own expiry cycle: check a random sample and go on while
+        more than a quarter of it was dead.
+        """
+        try:
+            for tag in tags:
+                tag_key = self._tag_key(tag)
+                while True:
+                    members = await self.client.srandmember(tag_key, self.prune_sample)
+                    if not members:
+                        break
+                    keys = [member.decode() if isinstance(member, bytes) else member for member in members]
+                    pipe = self.client.pipeline(transaction=False)
+                    for key in keys:
+                        pipe.exists(self._key(key))
+                    dead = [key for key, exists in zip(keys, await pipe.execute()) if not exists]
+                    if dead:
+                        await self.client.srem(tag_key, *dead)
+                        self.stats['tags_pruned'] += len(dead)
+                    if len(dead) * 4 <= len(keys):
+                        break
+        except Exception as e:
+            self._failed("prune", e)
+
+    async def delete(self, keys: Iterable[str]) -> int:
+        keys = list(keys)
+        if not keys:
+            return 0
+        try:
+            pipe = self.client.pipeline(transaction=False)
+            pipe.delete(*(self._key(key) for key in keys))
+            self._untag(pipe, keys)
+            pipe.publish(self.channel, self._message(op='keys', keys=keys))
+            results = await pipe.execute()
+            return results[0]
+        except Exception as e:
+            self._failed("delete", e)
+            return 0
+
+    async def invalidate_pattern(self, pattern: str) -> int:
+        """Delete matching keys everywhere; ``prefix:*`` reads the prefix's tag set instead of scanning."""
+        match = _PREFIX_PATTERN.match(pattern)
+        try:
+            if match:
+                tag_key = self._tag_key(match.group(1))
+                members = await self.client.smembers(tag_key)
+                keys = [member.decode() if isinstance(member, bytes) else member for member in members]
+                pipe = self.client.pipeline(transaction=False)
+                if keys:
+                    pipe.delete(*(self._key(key) for key in keys))
+                    # The keys also sit in the sets of their other prefixes
+                    self._untag(pipe, keys, skip=match.group(1))
+                pipe.delete(tag_key)
+                pipe.publish(self.channel, self._message(op='pattern', pattern=pattern))
+                results = await pipe.execute()
+                return results[0] if keys else 0
+            deleted = await self._scan_delete(self._key(pattern))
+            await self.client.publish(self.channel, self._message(op='pattern', pattern=pattern))
+            return deleted
+        except Exception as e:
+            self._failed("invalidate", e)
+            return 0
+
+    async def clear(self) -> int:
+        try:
+            deleted = await self._scan_delete(f"{self.namespace}:*")
+            await self.client.publish(self.channel, self._message(op='clear'))
+            return deleted
+        except Exception as e:
+            self._failed("clear", e)
+            return 0
+
+    async def _scan_delete(self, match: str, batch: int = 500) -> int:
+        # SCAN walks the keyspace incrementally, unlike KEYS it never blocks the server
+        deleted = 0
+        keys = []
+        async for key in self.client.scan_iter(match=match, count=batch):
+            keys.append(key)
+            if len(keys) >= batch:
+                deleted += await self.client.unlink(*keys)
+                keys = []
+        if keys:
+            deleted += await self.client.unlink(*keys)
+        return deleted
+
+    async def listen(self, on_message: Callable[[Dict[str, Any]], None]):
+        """Deliver other replicas' invalidations to on_message until cancelled, resubscribing on errors.
+
+        Messages missed while disconnected cannot be replayed, so after a
+        reconnect on_message receives a ``clear``.
+        """
+        connected_before = False
+        while True:
+            pubsub = None
+            try:
+                pubsub = self.client.pubsub()
+                await pubsub.subscribe(self.channel)
+                if connected_before:
+                    on_message({'op': 'clear'})
+                connected_before = True
+                async for message in pubsub.listen():
+                    if message.get('type') != 'message':
+                        continue
+                    payload = json.loads(message['data'])
+                    if payload.get('origin') == self.instance_id:
+                        continue
+                    self.stats['invalidations_received'] += 1
+                    on_message(payload)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self._failed("subscription", e)
+                await asyncio.sleep(self.reconnect_delay)
+            finally:
+                if pubsub is not None:
+                    try:
+                        await pubsub.aclose()
+                    except Exception:
+                        pass
+
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self.stats['hits'] + self.stats['misses']
+        return {
+            **self.stats,
+            'hit_rate': self.stats['hits'] / lookups * 100 if lookups else 0.0,
+            'channel': self.channel
+        }
@@ -1,26 +1,222 @@
 import asyncio
+import fnmatch
+import inspect
 import json
+import math
+import os
+import random
 import time
-from typing import Any, Optional, Dict
+from typing import Any, Awaitable, Callable, Optional, Dict, Tuple, Union
 from datetime import datetime, timedelta
 import logging
 
+from pydantic_core import to_json
+
+from cache_eviction import make_policy
+from cache_l2 import RedisCacheTier
+
 logger = logging.getLogger(__name__)
 
+# Cache service configurations for different use cases. `prefixes` are the
+# first key segments (see generate_cache_key) stored in the namespace; the
+# optional max_entries / max_bytes cap the namespace within the global budget.
+CACHE_CONFIGS = {
+    'integration_data': {'ttl': 1800, 'prefixes': ['integrations'], 'max_entries': 500},    # 30 minutes
+    'workflow_execution': {'ttl': 300, 'prefixes': ['user_workflows', 'workflow_execution'],
+                           'max_entries': 10000, 'max_bytes': 32 * 1024 * 1024},            # 5 minutes
+    'user_sessions': {'ttl': 86400, 'prefixes': ['sessions', 'user_sessions'], 'max_entries': 20000},  # 24 hours
+    'ai_responses': {'ttl': 7200, 'prefixes': ['ai', 'ai_responses'],
+                     'max_entries': 5000, 'max_bytes': 32 * 1024 * 1024},                   # 2 hours
+    'analytics_data': {'ttl': 600, 'prefixes': ['analytics', 'analytics_data'], 'max_entries': 2000},  # 10 minutes
+    'template_data': {'ttl': 3600, 'prefixes': ['templates', 'template_data'], 'max_entries': 1000},  # 1 hour
+    'node_types': {'ttl': 86400, 'prefixes': ['node_types'], 'max_entries': 100},           # 24 hours
+    'subworkflow_results': {'ttl': 3600, 'prefixes': ['subworkflow'],
+                            'max_entries': 5000, 'max_bytes': 32 * 1024 * 1024},            # 1 hour
+}
+
+
+class LatencyHistogram:
+    """Log2-bucketed latency histogram: bucket i counts samples under 2**i microseconds."""
+
+    BUCKETS = 25  # the last bucket also takes everything from ~16s up
+
+    __slots__ = ('counts', 'count', 'total', 'max')
+
+    def __init__(self):
+        self.counts = [0] * self.BUCKETS
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    def record(self, nanoseconds: int):
+        self.counts[min((nanoseconds // 1000).bit_length(), self.BUCKETS - 1)] += 1
+        self.count += 1
+        self.total += nanoseconds
+        if nanoseconds > self.max:
+            self.max = nanoseconds
+
+    def percentile(self, fraction: float) -> float:
+        """Upper bound (in microseconds) of the bucket holding the given fraction of samples."""
+        threshold = fraction * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if count and seen >= threshold:
+                return float(1 << index)
+        return 0.0
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            'count': self.count,
+            'mean_us': round(self.total / self.count / 1000, 2) if self.count else 0.0,
+            'p50_us': self.percentile(0.5),
+            'p95_us': self.percentile(0.95),
+            'p99_us': self.percentile(0.99),
+            'max_us': round(self.max / 1000, 2),
+            'buckets': [
+                {'lt_us': 1 << index, 'count': count}
+                for index, count in enumerate(self.counts) if count
+            ]
+        }
+
+
+class _CacheEntry:
+    __slots__ = ('value', 'expiry', 'stale_until', 'compute_time', 'created_at', 'size', 'segment')
+
+    def __init__(self, value: Any, expiry: float, created_at: float, size: int, segment: "_CacheSegment"):
+        self.value = value
+        self.expiry = expiry
+        # Past expiry but before stale_until, get_or_compute may still serve the value while refreshing it
+        self.stale_until = expiry
+        # Seconds the value took to compute; drives probabilistic early refresh
+        self.compute_time = 0.0
+        self.created_at = created_at
+        self.size = size
+        self.segment = segment
+
+
+class _CacheSegment:
+    """Keys of one namespace: their eviction policy, quota and usage."""
+
+    __slots__ = ('name', 'policy', 'max_entries', 'max_bytes', 'entries', 'bytes',
+                 'hits', 'misses', 'expirations', 'evictions', 'sets',
+                 'stale_hits', 'early_refreshes', 'coalesced', 'l2_hits')
+
+    def __init__(self, name: str, policy: str, max_entries: int, max_bytes: int):
+        self.name = name
+        self.policy = make_policy(policy, max_entries)
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.entries = 0
+        self.bytes = 0
+        self.reset_counters()
+
+    def reset_counters(self):
+        self.hits = 0
+        self.misses = 0
+        self.expirations = 0
+        self.evictions = 0
+        self.sets = 0
+        self.stale_hits = 0
+        self.early_refreshes = 0
+        self.coalesced = 0
+        self.l2_hits = 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            'entries': self.entries,
+            'bytes': self.bytes,
+            'max_entries': self.max_entries,
+            'max_bytes': self.max_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups * 100 if lookups else 0.0,
+            'sets': self.sets,
+            'expirations': self.expirations,
+            'evictions': self.evictions,
+            'stale_hits': self.stale_hits,
+            'early_refreshes': self.early_refreshes,
+            'coalesced': self.coalesced,
+            'l2_hits': self.l2_hits
+        }
+
+    def over_quota(self) -> bool:
+        return self.entries > self.max_entries or self.bytes > self.max_bytes
+
+
 class CacheService:
-    """In-memory cache service for performance optimization."""
+    """In-memory cache service for performance optimization.
+    
+    Memory is bounded: the cache as a whole holds at most max_entries entries and
+    max_bytes of (estimated) value size, and each namespace configured in
+    CACHE_CONFIGS at most its own quota. A key's namespace is its first
+    ``:``-separated part, mapped through the configs' ``prefixes``. Over budget,
+    entries are evicted by the configured policy (lru, lfu or w-tinylfu).
+    
+    With an ``l2`` (RedisCacheTier) this is the bounded L1 of a two-tier
+    cache: L1 misses read through to Redis, writes and invalidations go to
+    both and other replicas drop their L1 copies (see cache_l2).
+    """
     
-    def __init__(self, default_ttl: int = 3600):
-        """Initialize cache service with default TTL in seconds."""
-        self.cache: Dict[str, Dict[str, Any]] = {}
+    def __init__(self, default_ttl: int = 3600, max_entries: int = 50000, max_bytes: int = 128 * 1024 * 1024,
+                 policy: str = 'lru', namespaces: Optional[Dict[str, Dict[str, Any]]] = None,
+                 latency_sample_every: int = 16, early_refresh_beta: float = 1.0,
+                 l2: Optional[RedisCacheTier] = None):
+        """Initialize cache service with default TTL in seconds and memory budgets.
+        
+        Hit/miss counters see every call; the latency histograms time one call
+        in latency_sample_every (timing every sub-microsecond get would double its cost).
+        early_refresh_beta scales get_or_compute's probabilistic early refresh
+        (0 disables it; above 1 refreshes earlier).
+        """
+        self.cache: Dict[str, _CacheEntry] = {}
         self.default_ttl = default_ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.policy = policy
+        self.total_bytes = 0
+        self._segments: Dict[str, _CacheSegment] = {}
+        self._prefixes: Dict[str, _CacheSegment] = {}
+        for name, config in (CACHE_CONFIGS if namespaces is None else namespaces).items():
+            segment = self._add_segment(name, config.get('max_entries', max_entries), config.get('max_bytes', max_bytes))
+            for prefix in config.get('prefixes', [name]):
+                self._prefixes[prefix] = segment
+        # Keys outside any configured namespace share the global budget
+        self._default_segment = self._add_segment('default', max_entries, max_bytes)
+        self.latency_sample_every = max(1, latency_sample_every)
+        self.early_refresh_beta = early_refresh_beta
+        # key -> task computing its value; concurrent misses await the same task
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._get_calls = 0
+        self._set_calls = 0
+        self._reset_latency()
+        self.l2 = l2
+        self._l2_listener = None
         self._cleanup_task = None
         self._start_cleanup_task()
     
+    def _add_segment(self, name: str, max_entries: int, max_bytes: int) -> _CacheSegment:
+        segment = self._segments[name] = _CacheSegment(
+            name, self.policy, min(max_entries, self.max_entries), min(max_bytes, self.max_bytes)
+        )
+        return segment
+    
+    def _segment_for(self, key: str) -> _CacheSegment:
+        return self._prefixes.get(key.split(':', 1)[0], self._default_segment)
+    
     def _start_cleanup_task(self):
-        """Start background task to clean expired entries."""
+        """Start background tasks to clean expired entries and follow L2 invalidations (once an event loop is running)."""
         if self._cleanup_task is None or self._cleanup_task.done():
-            self._cleanup_task = asyncio.create_task(self._periodic_cleanup())
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                # Created at import time; started by the first set()
+                self._cleanup_task = None
+                return
+            self._cleanup_task = loop.create_task(self._periodic_cleanup())
+            if self.l2 is not None and (self._l2_listener is None or self._l2_listener.done()):
+                self._l2_listener = loop.create_task(self.l2.listen(self._apply_remote_invalidation))
     
     async def _periodic_cleanup(self):
         """Periodically clean up expired cache entries."""
@@ -33,166 +229,405 @@ class CacheService:
             except Exception as e:
                 logger.error(f"Cache cleanup error: {e}")
     
-    async def set(self, key: str, value: Any, ttl: Optional[int] = None) -> None:
-        """Set a value in cache with optional TTL."""
+    async def set(self, key: str, value: Any, ttl: Optional[int] = None, stale_ttl: int = 0) -> None:
+        """Set a value in cache with optional TTL.
+        
+        stale_ttl keeps the entry for that many seconds past its TTL so
+        get_or_compute can serve it stale while refreshing; get() never returns it.
+        """
+        self._set_calls += 1
+        if self._set_calls % self.latency_sample_every:
+            self._store(key, value, ttl, stale_ttl)
+        else:
+            started = time.perf_counter_ns()
+            self._store(key, value, ttl, stale_ttl)
+            self._set_latency.record(time.perf_counter_ns() - started)
+        if self.l2 is not None:
+            await self.l2.set(key, value, ttl or self.default_ttl)
+    
+    def _store(self, key: str, value: Any, ttl: Optional[int], stale_ttl: int = 0,
+               compute_time: float = 0.0) -> Optional[_CacheEntry]:
+        if self._cleanup_task is None:
+            self._start_cleanup_task()
         ttl = ttl or self.default_ttl
-        expiry = time.time() + ttl
+        now = time.time()
         
-        serialized_value = self._serialize(value)
-        self.cache[key] = {
-            'value': serialized_value,
-            'expiry': expiry,
-            'created_at': time.time()
-        }
-        logger.debug(f"Cache SET: {key} (TTL: {ttl}s)")
+        serialized_value, size = self._serialize(value)
+        segment = self._segment_for(key)
+        if size > segment.max_bytes:
+            # Would evict the whole namespace and still not fit
+            self._remove(key)
+            logger.debug(f"Cache SKIP: {key} ({size} bytes exceeds the {segment.name} budget)")
+            return None
+        
+        entry = self.cache.get(key)
+        if entry is not None:
+            entry.value = serialized_value
+            entry.expiry = now + ttl
+            entry.created_at = now
+            self._resize(entry, size)
+            segment.policy.access(key)
+        else:
+            entry = self.cache[key] = _CacheEntry(serialized_value, now + ttl, now, 0, segment)
+            self._resize(entry, size)
+            segment.entries += 1
+            segment.policy.insert(key)
+        entry.stale_until = entry.expiry + stale_ttl
+        entry.compute_time = compute_time
+        segment.sets += 1
+        self._enforce_budget(segment)
+        logger.debug("Cache SET: %s (TTL: %ss)", key, ttl)
+        return entry
+    
+    def _resize(self, entry: _CacheEntry, size: int):
+        delta = size - entry.size
+        entry.size = size
+        entry.segment.bytes += delta
+        self.total_bytes += delta
+    
+    def _remove(self, key: str) -> Optional[_CacheEntry]:
+        entry = self.cache.pop(key, None)
+        if entry is not None:
+            entry.segment.policy.remove(key)
+            self._forget(entry)
+        return entry
+    
+    def _forget(self, entry: _CacheEntry):
+        entry.segment.entries -= 1
+        entry.segment.bytes -= entry.size
+        self.total_bytes -= entry.size
+    
+    def _evict_from(self, segment: _CacheSegment) -> bool:
+        key = segment.policy.evict()
+        if key is None:
+            return False
+        self._forget(self.cache.pop(key))
+        segment.evictions += 1
+        logger.debug(f"Cache EVICT: {key}")
+        return True
+    
+    def _enforce_budget(self, segment: _CacheSegment):
+        """Evict until the namespace and then the whole cache are within budget."""
+        while segment.over_quota() and self._evict_from(segment):
+            pass
+        while len(self.cache) > self.max_entries or self.total_bytes > self.max_bytes:
+            # Take from the namespace using the largest share of the exceeded budget
+            if self.total_bytes > self.max_bytes:
+                largest = max(self._segments.values(), key=lambda candidate: candidate.bytes)
+            else:
+                largest = max(self._segments.values(), key=lambda candidate: candidate.entries)
+            if not self._evict_from(largest):
+                break
     
     async def get(self, key: str) -> Optional[Any]:
         """Get a value from cache."""
-        if key not in self.cache:
-            logger.debug(f"Cache MISS: {key}")
+        self._get_calls += 1
+        if self._get_calls % self.latency_sample_every:
+            value = self._lookup(key)
+        else:
+            started = time.perf_counter_ns()
+            value = self._lookup(key)
+            self._get_latency.record(time.perf_counter_ns() - started)
+        if value is None and self.l2 is not None:
+            return await self._read_through(key)
+        return value
+    
+    async def _read_through(self, key: str, stale_ttl: int = 0) -> Optional[Any]:
+        """Fetch an L1 miss from the L2 and keep it in the L1 for the L2's remaining TTL."""
+        found, value, remaining = await self.l2.get(key)
+        if not found:
+            return None
+        entry = self._store(key, value, math.ceil(remaining), stale_ttl)
+        if entry is None:
+            return value
+        entry.segment.l2_hits += 1
+        return self._deserialize(entry.value)
+    
+    def _lookup(self, key: str) -> Optional[Any]:
+        entry = self.cache.get(key)
+        if entry is None:
+            # _segment_for, inlined; per-key hit/miss debug logging is replaced by the counters
+            self._prefixes.get(key.split(':', 1)[0], self._default_segment).misses += 1
             return None
         
-        entry = self.cache[key]
-        
+        segment = entry.segment
         # Check if expired
-        if time.time() > entry['expiry']:
-            del self.cache[key]
-            logger.debug(f"Cache EXPIRED: {key}")
+        now = time.time()
+        if now > entry.expiry:
+            segment.misses += 1
+            if now > entry.stale_until:
+                self._remove(key)
+                segment.expirations += 1
+                logger.debug("Cache EXPIRED: %s", key)
             return None
         
-        logger.debug(f"Cache HIT: {key}")
-        return self._deserialize(entry['value'])
+        segment.policy.access(key)
+        segment.hits += 1
+        return self._deserialize(entry.value)
     
     async def delete(self, key: str) -> bool:
         """Delete a key from cache."""
-        if key in self.cache:
-            del self.cache[key]
+        removed = self._drop_local(key)
+        if self.l2 is not None:
+            removed = await self.l2.delete([key]) > 0 or removed
+        if removed:
             logger.debug(f"Cache DELETE: {key}")
-            return True
-        return False
+        return removed
+    
+    def _drop_local(self, key: str) -> bool:
+        # A computation already running for the key must not write back what was just invalidated
+        self._inflight.pop(key, None)
+        return self._remove(key) is not None
     
     async def exists(self, key: str) -> bool:
         """Check if key exists and is not expired."""
-        if key not in self.cache:
-            return False
+        entry = self.cache.get(key)
+        if entry is None:
+            return self.l2 is not None and await self.l2.exists(key)
         
-        entry = self.cache[key]
-        if time.time() > entry['expiry']:
-            del self.cache[key]
-            return False
+        now = time.time()
+        if now > entry.expiry:
+            if now > entry.stale_until:
+                self._remove(key)
+                entry.segment.expirations += 1
+            return self.l2 is not None and await self.l2.exists(key)
         
         return True
     
     async def clear(self) -> None:
-        """Clear all cache entries."""
-        self.cache.clear()
+        """Clear all cache entries (with an L2: on every replica)."""
+        self._clear_local()
+        if self.l2 is not None:
+            await self.l2.clear()
         logger.info("Cache cleared")
     
+    def _clear_local(self):
+        self._inflight.clear()
+        for key in list(self.cache):
+            self._remove(key)
+    
+    def _apply_remote_invalidation(self, message: Dict[str, Any]):
+        """Drop L1 entries another replica changed or invalidated in the L2."""
+        op = message.get('op')
+        if op == 'keys':
+            for key in message.get('keys', []):
+                self._drop_local(key)
+        elif op == 'pattern':
+            for key in fnmatch.filter(list(self.cache), message.get('pattern', '')):
+                self._drop_local(key)
+        elif op == 'clear':
+            self._clear_local()
+    
     async def cleanup_expired(self) -> int:
-        """Remove all expired entries."""
+        """Remove all expired entries (including stale ones past their stale_ttl)."""
         current_time = time.time()
         expired_keys = [
             key for key, entry in self.cache.items()
-            if current_time > entry['expiry']
+            if current_time > entry.stale_until
         ]
         
         for key in expired_keys:
-            del self.cache[key]
+            self._remove(key).segment.expirations += 1
         
         if expired_keys:
             logger.info(f"Cleaned up {len(expired_keys)} expired cache entries")
         
         return len(expired_keys)
     
-    async def get_stats(self) -> Dict[str, Any]:
-        """Get cache statistics."""
-        current_time = time.time()
-        valid_entries = 0
-        expired_entries = 0
-        total_size = 0
-        
-        for entry in self.cache.values():
-            if current_time > entry['expiry']:
-                expired_entries += 1
-            else:
-                valid_entries += 1
-            
-            # Estimate size
-            try:
-                total_size += len(json.dumps(entry['value']))
-            except:
-                total_size += len(str(entry['value']))
+    async def get_stats(self, scan_expired: bool = False) -> Dict[str, Any]:
+        """Get cache statistics.
         
-        return {
+        Counters and sizes are maintained incrementally, so this is O(namespaces);
+        scan_expired additionally counts entries past their TTL (O(entries)).
+        """
+        segments = self._segments.values()
+        hits = sum(segment.hits for segment in segments)
+        misses = sum(segment.misses for segment in segments)
+        stats = {
             'total_entries': len(self.cache),
-            'valid_entries': valid_entries,
-            'expired_entries': expired_entries,
-            'estimated_size_bytes': total_size,
-            'hit_rate': getattr(self, '_hit_count', 0) / max(getattr(self, '_total_requests', 1), 1) * 100
+            'estimated_size_bytes': self.total_bytes,
+            'max_entries': self.max_entries,
+            'max_bytes': self.max_bytes,
+            'eviction_policy': self.policy,
+            'hits': hits,
+            'misses': misses,
+            'expirations': sum(segment.expirations for segment in segments),
+            'evictions': sum(segment.evictions for segment in segments),
+            'hit_rate': hits / (hits + misses) * 100 if hits + misses else 0.0,
+            'namespaces': {
+                segment.name: segment.get_stats()
+                for segment in segments
+                if segment.entries or segment.sets or segment.misses
+            },
+            'latency': {operation: histogram.snapshot() for operation, histogram in self.latency.items()}
         }
+        if self.l2 is not None:
+            stats['l2'] = self.l2.get_stats()
+        if scan_expired:
+            current_time = time.time()
+            stats['expired_entries'] = sum(1 for entry in self.cache.values() if current_time > entry.expiry)
+            stats['valid_entries'] = len(self.cache) - stats['expired_entries']
+        return stats
     
-    def _serialize(self, value: Any) -> Any:
-        """Serialize value for storage."""
+    def reset_stats(self):
+        """Zero hit/miss/expiration/eviction counters and latency histograms (sizes are kept)."""
+        for segment in self._segments.values():
+            segment.reset_counters()
+        self._reset_latency()
+    
+    def _reset_latency(self):
+        # Bound to attributes so the hot path skips a dict lookup per call
+        self._get_latency = LatencyHistogram()
+        self._set_latency = LatencyHistogram()
+        self.latency = {'get': self._get_latency, 'set': self._set_latency}
+    
+    def _serialize(self, value: Any) -> Tuple[Any, int]:
+        """Serialize value for storage; returns the stored value and its estimated size in bytes."""
+        if isinstance(value, (bytes, str)):
+            # Immutable already: stored as-is, no copy
+            return value, len(value)
         try:
             # Try to serialize complex objects to JSON
             if isinstance(value, (dict, list)):
-                return json.loads(json.dumps(value, default=str))
-            return value
+                encoded = json.dumps(value, default=str)
+                return json.loads(encoded), len(encoded)
+            return value, len(str(value))
         except Exception:
             # Fallback to string representation
-            return str(value)
+            value = str(value)
+            return value, len(value)
     
     def _deserialize(self, value: Any) -> Any:
         """Deserialize value from storage."""
         return value
     
-    async def set_with_callback(self, key: str, callback, ttl: Optional[int] = None, *args, **kwargs) -> Any:
-        """Set cache with a callback function to generate the value."""
-        cached_value = await self.get(key)
-        if cached_value is not None:
-            return cached_value
-        
-        # Generate value using callback
-        if asyncio.iscoroutinefunction(callback):
-            value = await callback(*args, **kwargs)
-        else:
-            value = callback(*args, **kwargs)
+    async def set_json(self, key: str, value: Any, ttl: Optional[int] = None) -> bytes:
+        """Encode value (pydantic models included) to JSON once and cache the bytes.
+        
+        Hits return the same bytes object, ready to send as a response body:
+        nothing is copied, decoded or re-validated per request.
+        """
+        body = to_json(value)
+        await self.set(key, body, ttl)
+        return body
+    
+    async def get_or_compute(self, key: str, factory: Callable[[], Union[Any, Awaitable[Any]]],
+                             ttl: Optional[int] = None, stale_ttl: int = 0) -> Any:
+        """Get a value, computing and caching it on a miss.
+        
+        - Single flight: concurrent misses for a key await one computation.
+        - Stale-while-revalidate: for stale_ttl seconds after the TTL the old
+          value is returned at once while one background task refreshes it.
+        - Probabilistic early refresh: shortly before the TTL, a hit may
+          trigger that background refresh, more likely the closer the expiry
+          and the slower the last computation (XFetch), so popular keys are
+          rarely seen expired at all.
+        
+        factory takes no arguments and may be sync or async. A failing
+        computation raises in every caller waiting on it and caches nothing.
+        """
+        entry = self.cache.get(key)
+        if entry is not None:
+            segment = entry.segment
+            now = time.time()
+            if now <= entry.expiry:
+                if self._should_refresh_early(entry, now) and key not in self._inflight:
+                    segment.early_refreshes += 1
+                    self._compute_task(key, factory, ttl, stale_ttl)
+                segment.policy.access(key)
+                segment.hits += 1
+                return self._deserialize(entry.value)
+            if now <= entry.stale_until:
+                segment.stale_hits += 1
+                self._compute_task(key, factory, ttl, stale_ttl)
+                segment.policy.access(key)
+                return self._deserialize(entry.value)
+            self._remove(key)
+            segment.expirations += 1
         
-        await self.set(key, value, ttl)
+        segment = self._segment_for(key)
+        segment.misses += 1
+        if key in self._inflight:
+            segment.coalesced += 1
+        # Shielded: a caller giving up must not cancel the computation the others are waiting for
+        return await asyncio.shield(self._compute_task(key, factory, ttl, stale_ttl))
+    
+    def _should_refresh_early(self, entry: _CacheEntry, now: float) -> bool:
+        # XFetch: refresh when now - compute_time * beta * ln(U) passes the expiry, U uniform in (0, 1]
+        if not entry.compute_time or not self.early_refresh_beta:
+            return False
+        return now - entry.compute_time * self.early_refresh_beta * math.log(1.0 - random.random()) >= entry.expiry
+    
+    def _compute_task(self, key: str, factory, ttl: Optional[int], stale_ttl: int) -> asyncio.Task:
+        """The task computing key's value, started unless one is already in flight."""
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.get_running_loop().create_task(self._compute(key, factory, ttl, stale_ttl))
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._compute_done(key, done))
+        return task
+    
+    async def _compute(self, key: str, factory, ttl: Optional[int], stale_ttl: int) -> Any:
+        if self.l2 is not None and key not in self.cache:
+            # A plain miss (not a refresh): another replica may have computed it already
+            found, value, remaining = await self.l2.get(key)
+            if found:
+                entry = None
+                if self._inflight.get(key) is asyncio.current_task():
+                    entry = self._store(key, value, math.ceil(remaining), stale_ttl)
+                if entry is None:
+                    return value
+                entry.segment.l2_hits += 1
+                return self._deserialize(entry.value)
+        
+        started = time.perf_counter()
+        value = factory()
+        if inspect.isawaitable(value):
+            value = await value
+        # Skip the write if the key was deleted or cleared meanwhile
+        if self._inflight.get(key) is asyncio.current_task():
+            self._store(key, value, ttl, stale_ttl, time.perf_counter() - started)
+            if self.l2 is not None:
+                await self.l2.set(key, value, ttl or self.default_ttl)
         return value
     
+    def _compute_done(self, key: str, task: asyncio.Task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled() and task.exception() is not None:
+            # Retrieved here so background refreshes nobody awaits still get logged
+            logger.warning(f"Cache computation for {key} failed: {task.exception()}")
+    
+    async def set_with_callback(self, key: str, callback, ttl: Optional[int] = None, *args, **kwargs) -> Any:
+        """Set cache with a callback function to generate the value (single flight, see get_or_compute)."""
+        return await self.get_or_compute(key, lambda: callback(*args, **kwargs), ttl)
+    
     async def invalidate_pattern(self, pattern: str) -> int:
-        """Invalidate all keys matching a pattern."""
-        import fnmatch
-        
-        matching_keys = [
-            key for key in self.cache.keys()
-            if fnmatch.fnmatch(key, pattern)
-        ]
+        """Invalidate all keys matching a pattern (with an L2: on every replica, see RedisCacheTier)."""
+        matching_keys = fnmatch.filter(list(self.cache), pattern)
         
         for key in matching_keys:
-            await self.delete(key)
+            self._drop_local(key)
         
-        logger.info(f"Invalidated {len(matching_keys)} cache entries matching pattern: {pattern}")
-        return len(matching_keys)
-
-# Cache service configurations for different use cases
-CACHE_CONFIGS = {
-    'integration_data': {'ttl': 1800},      # 30 minutes
-    'workflow_execution': {'ttl': 300},      # 5 minutes  
-    'user_sessions': {'ttl': 86400},         # 24 hours
-    'ai_responses': {'ttl': 7200},           # 2 hours
-    'analytics_data': {'ttl': 600},          # 10 minutes
-    'template_data': {'ttl': 3600},          # 1 hour
-    'node_types': {'ttl': 86400},            # 24 hours
-}
+        invalidated = len(matching_keys)
+        if self.l2 is not None:
+            invalidated = max(invalidated, await self.l2.invalidate_pattern(pattern))
+        
+        logger.info(f"Invalidated {invalidated} cache entries matching pattern: {pattern}")
+        return invalidated
 
 # Global cache instance
-cache_service = CacheService()
+cache_service = CacheService(
+    max_entries=int(os.environ.get('CACHE_MAX_ENTRIES', '50000')),
+    max_bytes=int(os.environ.get('CACHE_MAX_BYTES', str(128 * 1024 * 1024))),
+    policy=os.environ.get('CACHE_EVICTION_POLICY', 'lru'),
+    # Shared across replicas when set; otherwise every process caches on its own
+    l2=RedisCacheTier.from_url(os.environ['REDIS_URL']) if os.environ.get('REDIS_URL') else None
+)
 
 # Cache decorators for common patterns
-def cached(key_pattern: str, ttl: Optional[int] = None):
-    """Decorator for caching function results."""
+def cached(key_pattern: str, ttl: Optional[int] = None, stale_ttl: int = 0):
+    """Decorator for caching function results (concurrent misses share one call)."""
     def decorator(func):
         async def wrapper(*args, **kwargs):
             # Generate cache key
@@ -200,19 +635,9 @@ def cached(key_pattern: str, ttl: Optional[int] = None):
             key_data = f"{func.__name__}:{args}:{kwargs}"
             cache_key = f"{key_pattern}:{hashlib.md5(key_data.encode()).hexdigest()}"
             
-            # Try to get from cache
-            cached_result = await cache_service.get(cache_key)
-            if cached_result is not None:
-                return cached_result
-            
-            # Execute function and cache result
-            if asyncio.iscoroutinefunction(func):
-                result = await func(*args, **kwargs)
-            else:
-                result = func(*args, **kwargs)
-            
-            await cache_service.set(cache_key, result, ttl)
-            return result
+            return await cache_service.get_or_compute(
+                cache_key, lambda: func(*args, **kwargs), ttl, stale_ttl
+            )
         
         return wrapper
     return decorator
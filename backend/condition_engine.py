@@ -0,0 +1,224 @@
+"""
+Condition expressions for CONDITION nodes and connection conditions.
+
+Expressions are JSON documents, compiled once (at execution plan build time)
+into plain closures so evaluating them is a handful of dict lookups::
+
+    {"field": "status", "operator": "equals", "value": "paid"}
+    {"field": "order.total", "op": ">=", "value": 100}
+    {"field": "customer.tier", "in": ["gold", "platinum"]}
+    {"field": "email", "matches": "@example\\\\.com$"}
+    {"all": [<expr>, ...]}   {"any": [<expr>, ...]}   {"not": <expr>}
+
+Fields are dotted paths into the execution context; list items are
+addressed by position (``items.0.sku``). A missing field makes every
+comparison false except ``not_exists``; so does a missing or empty ``value``
+for operators that need one (a half-configured node in the editor).
+"""
+import re
+from typing import Any, Callable, Dict, Mapping, Optional, Tuple
+
+Predicate = Callable[[Mapping[str, Any]], bool]
+
+_MISSING = object()
+
+OPERATOR_ALIASES = {
+    "equals": "equals", "==": "equals", "eq": "equals",
+    "not_equals": "not_equals", "!=": "not_equals", "ne": "not_equals",
+    "greater_than": "greater_than", ">": "greater_than", "gt": "greater_than",
+    "less_than": "less_than", "<": "less_than", "lt": "less_than",
+    "greater_or_equal": "greater_or_equal", ">=": "greater_or_equal", "gte": "greater_or_equal",
+    "less_or_equal": "less_or_equal", "<=": "less_or_equal", "lte": "less_or_equal",
+    "contains": "contains", "not_contains": "not_contains",
+    "in": "in", "not_in": "not_in",
+    "starts_with": "starts_with", "ends_with": "ends_with",
+    "matches": "matches", "regex": "matches",
+    "exists": "exists", "not_exists": "not_exists",
+}
+
+_NUMERIC = {
+    "greater_than": lambda a, b: a > b,
+    "less_than": lambda a, b: a < b,
+    "greater_or_equal": lambda a, b: a >= b,
+    "less_or_equal": lambda a, b: a <= b,
+}
+
+
+def _always_false(context: Mapping[str, Any]) -> bool:
+    return False
+
+
+def _always_true(context: Mapping[str, Any]) -> bool:
+    return True
+
+
+def _to_number(value: Any) -> Optional[float]:
+    if isinstance(value, bool):
+        return float(value)
+    if isinstance(value, (int, float)):
+        return value
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def compile_path(path: str) -> Callable[[Mapping[str, Any]], Any]:
+    """Compile a dotted path into a getter returning _MISSING when absent."""
+    if "." not in path:
+        return lambda context: context.get(path, _MISSING)
+
+    parts: Tuple[Any, ...] = tuple(int(part) if part.isdigit() else part for part in path.split("."))
+
+    def get(context: Mapping[str, Any]) -> Any:
+        value: Any = context
+        for part in parts:
+            if isinstance(value, Mapping):
+                value = value.get(part if not isinstance(part, int) else str(part), _MISSING)
+            elif isinstance(part, int) and isinstance(value, (list, tuple)) and -len(value) <= part < len(value):
+                value = value[part]
+            else:
+                return _MISSING
+            if value is _MISSING:
+                return _MISSING
+        return value
+
+    return get
+
+
+def _compile_comparison(field: str, operator: str, expected: Any) -> Predicate:
+    get = compile_path(field)
+
+    if operator == "exists":
+        return lambda context: get(context) is not _MISSING
+    if operator == "not_exists":
+        return lambda context: get(context) is _MISSING
+
+    if operator == "equals":
+        return lambda context: get(context) == expected
+    if operator == "not_equals":
+        def not_equals(context):
+            actual = get(context)
+            return actual is not _MISSING and actual != expected
+        return not_equals
+
+    if expected is None or (isinstance(expected, str) and not expected.strip()):
+        # Unconfigured value (editor default): never matches rather than failing the whole plan
+        return _always_false
+
+    if operator in _NUMERIC:
+        compare = _NUMERIC[operator]
+        bound = _to_number(expected)
+        if bound is None:
+            raise ValueError(f"Operator '{operator}' needs a numeric value, got {expected!r}")
+
+        def numeric(context):
+            actual = _to_number(get(context))
+            return actual is not None and compare(actual, bound)
+        return numeric
+
+    if operator in ("contains", "not_contains"):
+        needle = str(expected)
+        negate = operator == "not_contains"
+
+        def contains(context):
+            actual = get(context)
+            if actual is _MISSING:
+                return False
+            if isinstance(actual, (list, tuple, set, dict)):
+                found = expected in actual
+            else:
+                found = needle in str(actual)
+            return found != negate
+        return contains
+
+    if operator in ("in", "not_in"):
+        if not isinstance(expected, (list, tuple, set, str)):
+            raise ValueError(f"Operator '{operator}' needs a list value, got {expected!r}")
+        try:
+            members = frozenset(expected) if not isinstance(expected, str) else expected
+        except TypeError:
+            members = tuple(expected)
+        negate = operator == "not_in"
+
+        def membership(context):
+            actual = get(context)
+            if actual is _MISSING:
+                return False
+            try:
+                return (actual in members) != negate
+            except TypeError:
+                return negate
+        return membership
+
+    if operator in ("starts_with", "ends_with"):
+        affix = str(expected)
+        check = str.startswith if operator == "starts_with" else str.endswith
+
+        def affix_match(context):
+            actual = get(context)
+            return actual is not _MISSING and check(str(actual), affix)
+        return affix_match
+
+    if operator == "matches":
+        try:
+            pattern = re.compile(str(expected))
+        except re.error as e:
+            raise ValueError(f"Invalid regular expression {expected!r}: {e}")
+
+        def matches(context):
+            actual = get(context)
+            return actual is not _MISSING and pattern.search(str(actual)) is not None
+        return matches
+
+    raise ValueError(f"Unknown condition operator '{operator}'")
+
+
+def compile_condition(spec: Optional[Dict[str, Any]]) -> Predicate:
+    """Compile a condition expression into a predicate over the execution context."""
+    if not spec:
+        return _always_true
+
+    if not isinstance(spec, dict):
+        raise ValueError(f"Condition must be an object, got {spec!r}")
+
+    if "all" in spec:
+        parts = tuple(compile_condition(part) for part in spec["all"])
+        return lambda context: all(part(context) for part in parts)
+    if "any" in spec:
+        parts = tuple(compile_condition(part) for part in spec["any"])
+        return lambda context: any(part(context) for part in parts)
+    if "not" in spec:
+        inner = compile_condition(spec["not"])
+        return lambda context: not inner(context)
+
+    field = spec.get("field")
+    if not field:
+        # Unconfigured condition nodes (editor default) never match
+        return _always_false
+
+    operator = spec.get("operator") or spec.get("op")
+    expected = spec.get("value")
+    if operator is None:
+        # Shorthand form: {"field": "x", "in": [...]}
+        shorthand = [key for key in spec if key in OPERATOR_ALIASES]
+        if len(shorthand) > 1:
+            raise ValueError(f"Ambiguous condition on '{field}': {shorthand}")
+        operator = shorthand[0] if shorthand else "equals"
+        if shorthand:
+            expected = spec[operator]
+
+    canonical = OPERATOR_ALIASES.get(str(operator).lower())
+    if canonical is None:
+        raise ValueError(f"Unknown condition operator '{operator}'")
+    return _compile_comparison(str(field), canonical, expected)
+
+
+def compile_node_condition(config: Dict[str, Any]) -> Predicate:
+    """Compile the expression of a CONDITION node (nested under 'condition' or inline)."""
+    expression = config.get("condition")
+    if not isinstance(expression, dict):
+        expression = config
+    if not expression:
+        return _always_false
+    return compile_condition(expression)
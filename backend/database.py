@@ -40,6 +40,21 @@ async def create_indexes():
     # Executions indexes
     await db.workflow_executions.create_index([("workflow_id", 1), ("started_at", -1)])
     await db.workflow_executions.create_index("user_id")
+    await db.workflow_executions.create_index("id")
+    await db.workflow_executions.create_index([("status", 1), ("deadline_at", 1)])
+    
+    # Execution queue indexes
+    await db.execution_queue.create_index("id", unique=True)
+    await db.execution_queue.create_index([("status", 1), ("available_at", 1)])
+    await db.execution_queue.create_index([("status", 1), ("lease_expires_at", 1)])
+    await db.execution_queue.create_index([("status", 1), ("priority", 1), ("vtime", 1), ("available_at", 1)])
+    await db.execution_queue_tenants.create_index([("lane", 1), ("user_id", 1)], unique=True)
+    await db.execution_queue_lanes.create_index("lane", unique=True)
+    
+    # Delay timer indexes
+    await db.execution_timers.create_index("id", unique=True)
+    await db.execution_timers.create_index([("status", 1), ("resume_at", 1)])
+    await db.execution_timers.create_index("execution_id")
     
     # Integrations indexes
     await db.user_integrations.create_index([("user_id", 1), ("integration_id", 1)])
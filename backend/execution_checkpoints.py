@@ -0,0 +1,66 @@
+"""
+Per-node execution checkpoints.
+
+As nodes complete, their output is written into the execution document in
+``workflow_executions`` (``checkpoint.completed`` / ``skipped`` / ``outputs`` /
+``waiting``; outputs hold each node's own result, not its whole context),
+so an execution whose worker dies can be resumed from the last completed
+nodes instead of re-running every integration action and AI call.
+"""
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+import logging
+
+from database import get_database
+from workflow_engine import CheckpointCallback
+
+logger = logging.getLogger(__name__)
+
+
+class ExecutionCheckpointStore:
+    """Writes incremental node checkpoints to workflow_executions."""
+
+    @property
+    def collection(self):
+        return get_database().workflow_executions
+
+    def callback(self, execution_id: str) -> CheckpointCallback:
+        """Build the engine's on_checkpoint hook for one execution."""
+        async def save(node_id: str, output: Dict[str, Any], resume_at: Optional[str], skipped: List[str]):
+            await self.save_node(execution_id, node_id, output, resume_at, skipped)
+        return save
+
+    async def save_node(self, execution_id: str, node_id: str, output: Dict[str, Any],
+                        resume_at: Optional[str] = None, skipped: Optional[List[str]] = None):
+        """Record a completed node's result and the nodes its branch skipped."""
+        if not self._is_safe_key(node_id):
+            # Dotted ids cannot be addressed in an update path; the final checkpoint still covers them
+            logger.debug(f"Skipping incremental checkpoint for node id {node_id!r}")
+            return
+
+        update: Dict[str, Any] = {
+            "$addToSet": {"checkpoint.completed": node_id},
+            "$set": {
+                f"checkpoint.outputs.{node_id}": output,
+                "checkpoint.updated_at": datetime.utcnow()
+            }
+        }
+        if resume_at:
+            update["$set"][f"checkpoint.waiting.{node_id}"] = resume_at
+        if skipped:
+            update["$addToSet"]["checkpoint.skipped"] = {"$each": skipped}
+
+        await self.collection.update_one({"id": execution_id}, update)
+
+    @staticmethod
+    def has_progress(execution: Optional[Dict[str, Any]]) -> bool:
+        """Whether an execution document has completed nodes to resume from."""
+        return bool(execution and (execution.get("checkpoint") or {}).get("completed"))
+
+    @staticmethod
+    def _is_safe_key(node_id: str) -> bool:
+        return bool(node_id) and "." not in node_id and not node_id.startswith("$")
+
+
+# Global instance
+checkpoint_store = ExecutionCheckpointStore()
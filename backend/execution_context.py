@@ -0,0 +1,162 @@
+"""
+Layered, copy-on-write execution contexts.
+
+Every node of an execution reads an ExecutionContext: a read-only view over
+the trigger data and the results of the nodes upstream of it. A context only
+holds its own node's result (its frame) plus references to the contexts it
+was derived from, so parallel branches share their parents without copying
+and an execution costs the size of its node results, however deep the graph.
+
+A key resolves to the latest writer in topological order, i.e. what applying
+the upstream results with dict.update() one after the other would give.
+Results of upstream nodes are also addressable by id under ``$nodes``
+(``{"field": "$nodes.fetch_order.result.status", ...}`` in conditions).
+"""
+import heapq
+from typing import Any, Dict, Iterator, List, Mapping, Optional, Tuple
+
+NODES_KEY = "$nodes"
+
+_MISSING = object()
+
+
+class ExecutionContext(Mapping):
+    """Immutable context layer: one frame of values on top of its parent contexts."""
+
+    __slots__ = ("node_id", "position", "frame", "parents")
+
+    def __init__(self, frame: Mapping[str, Any], node_id: Optional[str] = None, position: int = -1,
+                 parents: Tuple["ExecutionContext", ...] = ()):
+        self.node_id = node_id
+        # Topological position of the node; every parent has a lower one
+        self.position = position
+        self.frame = frame
+        self.parents = parents
+
+    @classmethod
+    def root(cls, trigger_data: Optional[Mapping[str, Any]] = None) -> "ExecutionContext":
+        """Create the base layer of an execution from its trigger data."""
+        return cls(dict(trigger_data or {}))
+
+    @classmethod
+    def merge(cls, parents: Tuple["ExecutionContext", ...], position: int) -> "ExecutionContext":
+        """View over several incoming branches (a single branch is returned as is)."""
+        if len(parents) == 1:
+            return parents[0]
+        return cls({}, None, position, parents)
+
+    def child(self, frame: Mapping[str, Any], node_id: str, position: int) -> "ExecutionContext":
+        """Layer a node's result on top of this context."""
+        return ExecutionContext(frame, node_id, position, (self,))
+
+    def _find(self, key: str) -> Any:
+        current = self
+        # Fast path: walk straight up linear chains
+        while True:
+            if key in current.frame:
+                return current.frame[key]
+            parents = current.parents
+            if not parents:
+                return _MISSING
+            if len(parents) > 1:
+                break
+            current = parents[0]
+
+        # Below a merge visit ancestors latest first; the first frame holding the key is the latest writer
+        heap = [(-parent.position, id(parent), parent) for parent in parents]
+        heapq.heapify(heap)
+        seen = {id(parent) for parent in parents}
+        while heap:
+            _, _, layer = heapq.heappop(heap)
+            if key in layer.frame:
+                return layer.frame[key]
+            for parent in layer.parents:
+                if id(parent) not in seen:
+                    seen.add(id(parent))
+                    heapq.heappush(heap, (-parent.position, id(parent), parent))
+        return _MISSING
+
+    def __getitem__(self, key: str) -> Any:
+        if key == NODES_KEY:
+            return NodeResults(self)
+        value = self._find(key)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def get(self, key: str, default: Any = None) -> Any:
+        if key == NODES_KEY:
+            return NodeResults(self)
+        value = self._find(key)
+        return default if value is _MISSING else value
+
+    def __contains__(self, key: object) -> bool:
+        return key == NODES_KEY or self._find(key) is not _MISSING
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.to_dict())
+
+    def __len__(self) -> int:
+        return len(self.to_dict())
+
+    def layers(self) -> List["ExecutionContext"]:
+        """Every layer this context sees, oldest first."""
+        seen = {id(self)}
+        stack = [self]
+        layers = []
+        while stack:
+            layer = stack.pop()
+            layers.append(layer)
+            for parent in layer.parents:
+                if id(parent) not in seen:
+                    seen.add(id(parent))
+                    stack.append(parent)
+        layers.sort(key=lambda layer: layer.position)
+        return layers
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Flatten into a plain dict (for persistence and APIs that need one)."""
+        flat: Dict[str, Any] = {}
+        for layer in self.layers():
+            flat.update(layer.frame)
+        return flat
+
+    def node_output(self, node_id: str) -> Optional[Mapping[str, Any]]:
+        """Result of an upstream node, or None if it is not an ancestor of this context."""
+        for layer in reversed(self.layers()):
+            if layer.node_id == node_id:
+                return layer.frame
+        return None
+
+    def __repr__(self) -> str:
+        return f"ExecutionContext(node_id={self.node_id!r}, keys={len(self.frame)}, parents={len(self.parents)})"
+
+
+def as_dict(data: Optional[Mapping[str, Any]]) -> Dict[str, Any]:
+    """Plain dict view of a context (or any mapping) for code that needs real dicts, e.g. json.dumps."""
+    if isinstance(data, ExecutionContext):
+        return data.to_dict()
+    if isinstance(data, dict):
+        return data
+    return dict(data or {})
+
+
+class NodeResults(Mapping):
+    """Read-only mapping of node id to the result of every upstream node."""
+
+    __slots__ = ("_context",)
+
+    def __init__(self, context: ExecutionContext):
+        self._context = context
+
+    def __getitem__(self, node_id: str) -> Mapping[str, Any]:
+        frame = self._context.node_output(node_id)
+        if frame is None:
+            raise KeyError(node_id)
+        return frame
+
+    def __iter__(self) -> Iterator[str]:
+        return iter([layer.node_id for layer in self._context.layers() if layer.node_id is not None])
+
+    def __len__(self) -> int:
+        return sum(1 for layer in self._context.layers() if layer.node_id is not None)
@@ -0,0 +1,219 @@
+"""
+In-process stream of execution progress events.
+
+The workflow engine publishes execution_started, node_started, node_finished
+and execution_finished events here as they happen. Subscribers (the streaming
+progress endpoint) get them through a bounded queue per subscription, and
+every event is also forwarded to the workflow's websocket collaboration room.
+
+Publishing is fire-and-forget and costs next to nothing when nobody listens.
+
+With REDIS_URL set, events are also relayed between processes over a Redis
+pub/sub channel: every process publishes its events in order through one
+sender task, and processes that serve streams (the API, see start_relay)
+deliver the events of other processes to their local subscribers and rooms.
+Separate worker processes (workflow_worker) then stream as live as in-process
+ones. Without Redis, events only reach subscribers in the process running the
+execution and the streaming endpoint polls the database for the others.
+"""
+import asyncio
+import json
+import uuid
+from datetime import datetime
+from typing import Any, Dict, Optional, Set
+import logging
+import os
+
+from websocket_manager import websocket_manager
+
+logger = logging.getLogger(__name__)
+
+
+class EventType:
+    EXECUTION_STARTED = "execution_started"
+    NODE_STARTED = "node_started"
+    NODE_FINISHED = "node_finished"
+    EXECUTION_FINISHED = "execution_finished"
+
+
+class Subscription:
+    """Events of one execution for one listener, oldest dropped when the listener falls behind."""
+
+    def __init__(self, bus: "ExecutionEventBus", execution_id: str, max_queue: int):
+        self.bus = bus
+        self.execution_id = execution_id
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self.dropped = 0
+
+    def put(self, event: Dict[str, Any]):
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(event)
+
+    async def get(self, timeout: float) -> Optional[Dict[str, Any]]:
+        """Next event, or None if none arrived within timeout seconds."""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def close(self):
+        self.bus.unsubscribe(self)
+
+    def __enter__(self) -> "Subscription":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class ExecutionEventBus:
+    """Fans out execution events to subscribers and websocket rooms, across processes with a Redis client."""
+
+    def __init__(self, max_queue: int = 1000, redis_client=None, channel: str = "execution_events",
+                 max_outbox: int = 10000, reconnect_delay: float = 1.0):
+        self.max_queue = max_queue
+        self._subscribers: Dict[str, Set[Subscription]] = {}
+        self._broadcasts: Set[asyncio.Task] = set()
+        self.published = 0
+        # Any redis.asyncio-compatible client; None keeps events in this process
+        self.redis = redis_client
+        self.channel = channel
+        self.reconnect_delay = reconnect_delay
+        # Lets a process ignore its own events coming back from the channel
+        self.instance_id = uuid.uuid4().hex
+        self._outbox: Optional[asyncio.Queue] = None
+        self.max_outbox = max_outbox
+        self._sender: Optional[asyncio.Task] = None
+        self._listener: Optional[asyncio.Task] = None
+        self.relay_stats = {"sent": 0, "received": 0, "dropped": 0, "errors": 0}
+
+    @classmethod
+    def from_url(cls, url: str, **kwargs) -> "ExecutionEventBus":
+        import redis.asyncio as redis_async
+        return cls(redis_client=redis_async.from_url(url), **kwargs)
+
+    @property
+    def is_relayed(self) -> bool:
+        """Whether events of executions run in other processes reach this process's subscribers."""
+        return self._listener is not None and not self._listener.done()
+
+    def subscribe(self, execution_id: str) -> Subscription:
+        subscription = Subscription(self, execution_id, self.max_queue)
+        self._subscribers.setdefault(execution_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        subscribers = self._subscribers.get(subscription.execution_id)
+        if subscribers is not None:
+            subscribers.discard(subscription)
+            if not subscribers:
+                del self._subscribers[subscription.execution_id]
+
+    def publish(self, event_type: str, execution_id: str, workflow_id: str, **data: Any):
+        """Publish an event without waiting for any listener."""
+        subscribers = self._subscribers.get(execution_id)
+        room = websocket_manager.rooms.get(workflow_id)
+        if not subscribers and room is None and self.redis is None:
+            return
+        self.published += 1
+        event = {
+            "type": event_type,
+            "execution_id": execution_id,
+            "workflow_id": workflow_id,
+            "timestamp": datetime.utcnow().isoformat(),
+            **data
+        }
+        self._deliver(event)
+        if self.redis is not None:
+            self._send(event)
+
+    def _deliver(self, event: Dict[str, Any]):
+        """Hand an event to this process's subscribers and websocket room."""
+        for subscription in list(self._subscribers.get(event["execution_id"]) or ()):
+            subscription.put(event)
+        workflow_id = event["workflow_id"]
+        if websocket_manager.rooms.get(workflow_id) is not None:
+            task = asyncio.create_task(websocket_manager.broadcast_workflow_execution_update(workflow_id, event))
+            self._broadcasts.add(task)
+            task.add_done_callback(self._broadcasts.discard)
+
+    def _send(self, event: Dict[str, Any]):
+        # One sender task keeps the events of an execution in order on the channel
+        if self._outbox is None:
+            self._outbox = asyncio.Queue(maxsize=self.max_outbox)
+        if self._outbox.full():
+            self._outbox.get_nowait()
+            self.relay_stats["dropped"] += 1
+        self._outbox.put_nowait(json.dumps({"origin": self.instance_id, "event": event}, default=str))
+        if self._sender is None or self._sender.done():
+            self._sender = asyncio.create_task(self._send_loop())
+
+    async def _send_loop(self):
+        while True:
+            message = await self._outbox.get()
+            try:
+                await self.redis.publish(self.channel, message)
+                self.relay_stats["sent"] += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Subscribers miss the event; streams still see the final status in the database
+                self.relay_stats["errors"] += 1
+                logger.warning(f"Relaying execution event failed: {e}")
+
+    def start_relay(self):
+        """Deliver events published by other processes here (on the running event loop)."""
+        if self.redis is not None and not self.is_relayed:
+            self._listener = asyncio.create_task(self._listen())
+
+    async def stop_relay(self):
+        tasks = [task for task in (self._listener, self._sender) if task is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._listener = self._sender = None
+
+    async def _listen(self):
+        while True:
+            pubsub = None
+            try:
+                pubsub = self.redis.pubsub()
+                await pubsub.subscribe(self.channel)
+                async for message in pubsub.listen():
+                    if message.get("type") != "message":
+                        continue
+                    payload = json.loads(message["data"])
+                    if payload.get("origin") == self.instance_id:
+                        continue
+                    self.relay_stats["received"] += 1
+                    self._deliver(payload["event"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.relay_stats["errors"] += 1
+                logger.warning(f"Execution event relay subscription failed: {e}")
+                await asyncio.sleep(self.reconnect_delay)
+            finally:
+                if pubsub is not None:
+                    try:
+                        await pubsub.aclose()
+                    except Exception:
+                        pass
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = {
+            "published": self.published,
+            "subscribed_executions": len(self._subscribers),
+            "subscriptions": sum(len(subscribers) for subscribers in self._subscribers.values())
+        }
+        if self.redis is not None:
+            stats["relay"] = {**self.relay_stats, "listening": self.is_relayed, "channel": self.channel}
+        return stats
+
+
+# Global instance; shared across processes when REDIS_URL is set
+execution_events = (
+    ExecutionEventBus.from_url(os.environ['REDIS_URL']) if os.environ.get('REDIS_URL') else ExecutionEventBus()
+)
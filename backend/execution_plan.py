@@ -0,0 +1,206 @@
+"""
+Compiled workflow execution plans.
+
+A plan is built once per workflow version and holds everything the engine
+needs to schedule a run without rescanning ``workflow.nodes`` or
+``workflow.connections``: node lookup, adjacency and in-degree arrays indexed
+by topological position, topological levels, the validated trigger set, the
+compiled predicates of CONDITION nodes and conditional connections and each
+node's retry policy.
+"""
+from collections import OrderedDict, deque
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+import logging
+
+from models import Workflow, WorkflowNode, NodeType
+from condition_engine import Predicate, compile_condition, compile_node_condition
+from retry_policy import RetryPolicy
+
+logger = logging.getLogger(__name__)
+
+
+class ExecutionPlan:
+    """Immutable, precompiled DAG of a single workflow version."""
+
+    __slots__ = (
+        "workflow_id", "user_id", "version", "nodes", "index", "successors",
+        "predecessors", "in_degree", "levels", "trigger_indexes", "sink_indexes",
+        "conditions", "edge_conditions", "retry_policies"
+    )
+
+    def __init__(self, workflow_id: str, user_id: str, version: Optional[datetime], nodes: List[WorkflowNode],
+                 successors: List[Tuple[int, ...]], predecessors: List[Tuple[int, ...]],
+                 levels: List[Tuple[int, ...]], trigger_indexes: Tuple[int, ...],
+                 conditions: List[Optional[Predicate]], edge_conditions: List[Tuple[Optional[Predicate], ...]],
+                 retry_policies: List[RetryPolicy]):
+        self.workflow_id = workflow_id
+        self.user_id = user_id
+        self.version = version
+        # All per-node arrays are indexed by topological position
+        self.nodes = nodes
+        self.index: Dict[str, int] = {node.id: position for position, node in enumerate(nodes)}
+        self.successors = successors
+        self.predecessors = predecessors
+        self.in_degree = [len(previous) for previous in predecessors]
+        self.levels = levels
+        self.trigger_indexes = trigger_indexes
+        self.sink_indexes = tuple(position for position, following in enumerate(successors) if not following)
+        # Predicate per CONDITION node, and per outgoing edge (None = unconditional)
+        self.conditions = conditions
+        self.edge_conditions = edge_conditions
+        self.retry_policies = retry_policies
+
+    def __len__(self) -> int:
+        return len(self.nodes)
+
+    def node(self, node_id: str) -> WorkflowNode:
+        """Get a node by id."""
+        return self.nodes[self.index[node_id]]
+
+    @classmethod
+    def compile(cls, workflow: Workflow) -> "ExecutionPlan":
+        """Validate a workflow and compile it into an execution plan."""
+        nodes_by_id = {node.id: node for node in workflow.nodes}
+
+        trigger_ids = [node.id for node in workflow.nodes if node.type == NodeType.TRIGGER]
+        if not trigger_ids:
+            raise ValueError("No trigger node found")
+
+        successors: Dict[str, List[str]] = {node_id: [] for node_id in nodes_by_id}
+        edge_specs: Dict[str, List[Optional[dict]]] = {node_id: [] for node_id in nodes_by_id}
+        for conn in workflow.connections:
+            if conn.from_node in nodes_by_id and conn.to_node in nodes_by_id:
+                successors[conn.from_node].append(conn.to_node)
+                edge_specs[conn.from_node].append(conn.condition)
+
+        # Only nodes reachable from a trigger take part in an execution
+        reachable = set()
+        stack = list(trigger_ids)
+        while stack:
+            node_id = stack.pop()
+            if node_id not in reachable:
+                reachable.add(node_id)
+                stack.extend(successors[node_id])
+
+        in_degree = {node_id: 0 for node_id in reachable}
+        for node_id in reachable:
+            for next_id in successors[node_id]:
+                in_degree[next_id] += 1
+
+        # Kahn's algorithm; anything left over sits on a cycle
+        ready = deque(node_id for node_id in nodes_by_id if node_id in reachable and in_degree[node_id] == 0)
+        order: List[str] = []
+        while ready:
+            node_id = ready.popleft()
+            order.append(node_id)
+            for next_id in successors[node_id]:
+                in_degree[next_id] -= 1
+                if in_degree[next_id] == 0:
+                    ready.append(next_id)
+
+        if len(order) != len(reachable):
+            raise ValueError("Workflow contains a cycle")
+
+        position = {node_id: index for index, node_id in enumerate(order)}
+        successor_array = [tuple(position[next_id] for next_id in successors[node_id]) for node_id in order]
+        predecessor_lists: List[List[int]] = [[] for _ in order]
+        for index, following in enumerate(successor_array):
+            for next_index in following:
+                predecessor_lists[next_index].append(index)
+        # Predecessors stay in topological order so merged contexts are deterministic
+        predecessor_array = [tuple(previous) for previous in predecessor_lists]
+
+        depth = [0] * len(order)
+        for index, previous in enumerate(predecessor_array):
+            if previous:
+                depth[index] = max(depth[p] for p in previous) + 1
+        levels: List[List[int]] = [[] for _ in range(max(depth, default=-1) + 1)]
+        for index, level in enumerate(depth):
+            levels[level].append(index)
+
+        conditions: List[Optional[Predicate]] = []
+        edge_conditions: List[Tuple[Optional[Predicate], ...]] = []
+        retry_policies: List[RetryPolicy] = []
+        for node_id in order:
+            node = nodes_by_id[node_id]
+            try:
+                conditions.append(compile_node_condition(node.config) if node.type == NodeType.CONDITION else None)
+                edge_conditions.append(tuple(_compile_edge(spec) for spec in edge_specs[node_id]))
+            except ValueError as e:
+                raise ValueError(f"Invalid condition on node '{node.name}': {e}")
+            if node.type == NodeType.SUBWORKFLOW:
+                callee_id = node.config.get("workflow_id")
+                if not callee_id:
+                    raise ValueError(f"Sub-workflow node '{node.name}' has no workflow_id")
+                if callee_id == workflow.id:
+                    raise ValueError(f"Sub-workflow node '{node.name}' calls its own workflow")
+            try:
+                retry_policies.append(RetryPolicy.for_node(node.type, node.config.get("retry")))
+            except (ValueError, TypeError) as e:
+                raise ValueError(f"Invalid retry policy on node '{node.name}': {e}")
+
+        return cls(
+            workflow_id=workflow.id,
+            user_id=workflow.user_id,
+            version=workflow.updated_at,
+            nodes=[nodes_by_id[node_id] for node_id in order],
+            successors=successor_array,
+            predecessors=predecessor_array,
+            levels=[tuple(level) for level in levels],
+            trigger_indexes=tuple(position[node_id] for node_id in trigger_ids),
+            conditions=conditions,
+            edge_conditions=edge_conditions,
+            retry_policies=retry_policies,
+        )
+
+
+def _compile_edge(spec: Optional[dict]) -> Optional[Predicate]:
+    """Compile a connection condition; {"branch": true/false} follows a CONDITION node's outcome."""
+    if not spec:
+        return None
+    if set(spec) == {"branch"}:
+        spec = {"field": "condition_met", "equals": bool(spec["branch"])}
+    return compile_condition(spec)
+
+
+class ExecutionPlanCache:
+    """LRU cache of compiled plans keyed by (workflow.id, updated_at)."""
+
+    def __init__(self, max_size: int = 512):
+        self.max_size = max_size
+        self._plans: "OrderedDict[Tuple[str, Optional[datetime]], ExecutionPlan]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get_plan(self, workflow: Workflow) -> ExecutionPlan:
+        """Return the plan for this workflow version, compiling it on first use."""
+        key = (workflow.id, workflow.updated_at)
+        plan = self._plans.get(key)
+        if plan is not None:
+            self._plans.move_to_end(key)
+            self.hits += 1
+            return plan
+
+        self.misses += 1
+        plan = ExecutionPlan.compile(workflow)
+        self._plans[key] = plan
+        if len(self._plans) > self.max_size:
+            self._plans.popitem(last=False)
+        logger.debug(f"Compiled execution plan for workflow {workflow.id} ({len(plan)} nodes)")
+        return plan
+
+    def invalidate(self, workflow_id: str) -> int:
+        """Drop every cached plan of a workflow."""
+        stale = [key for key in self._plans if key[0] == workflow_id]
+        for key in stale:
+            del self._plans[key]
+        return len(stale)
+
+    def get_stats(self) -> Dict[str, int]:
+        """Get cache statistics."""
+        return {"plans": len(self._plans), "hits": self.hits, "misses": self.misses}
+
+
+# Global instance
+execution_plan_cache = ExecutionPlanCache()
@@ -0,0 +1,601 @@
+"""
+Durable execution queue for workflow runs.
+
+Jobs live in the MongoDB ``execution_queue`` collection so queued work
+survives a restart. Workers claim a job by taking a lease on it; a job whose
+lease expires (worker crashed, deploy, hung run) becomes visible again and is
+delivered to another worker, giving at-least-once delivery.
+
+Every run gets a deadline (``deadline_at``). A reaper fails RUNNING executions
+whose deadline passed long ago, i.e. whose worker died without releasing them,
+and workers watch for ``cancel_requested`` set by the cancel API on executions
+they are running.
+
+Claim order is by priority lane first (interactive runs ahead of standard
+runs ahead of item batches), then by start-time fair queueing across tenants
+inside a lane: each job is stamped with a virtual start time from its
+tenant's running finish tag, advanced by cost / weight, where the weight comes
+from the tenant's subscription tier. A tenant that floods the queue only
+pushes its own tags forward, so other tenants' new jobs still go near the
+front, and higher tiers get a proportionally larger share.
+
+Callers cannot simply ask for the interactive lane: it is only granted to
+paid tiers, and only for a few queued jobs per tenant at a time (editor test
+runs), beyond which runs go to the standard lane.
+"""
+import asyncio
+import os
+import socket
+import time
+import uuid
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+import logging
+
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from database import get_database
+from execution_checkpoints import checkpoint_store
+from models import Workflow, WorkflowExecution, ExecutionStatus
+from timer_service import delay_scheduler
+from workflow_engine import workflow_engine
+
+logger = logging.getLogger(__name__)
+
+
+TERMINAL_STATUSES = [ExecutionStatus.SUCCESS.value, ExecutionStatus.FAILED.value, ExecutionStatus.CANCELLED.value]
+
+
+class JobStatus:
+    QUEUED = "queued"
+    LEASED = "leased"
+    DEAD = "dead"
+
+
+class Lane:
+    """Priority lanes; a lower rank is always claimed first."""
+    INTERACTIVE = "interactive"
+    STANDARD = "standard"
+    BATCH = "batch"
+
+
+LANE_RANKS = {Lane.INTERACTIVE: 0, Lane.STANDARD: 1, Lane.BATCH: 2}
+
+# Fair-share weight per subscription tier; tenants without an active subscription are "free"
+FREE_TIER = "free"
+TIER_WEIGHTS = {FREE_TIER: 1, "basic": 2, "pro": 4, "enterprise": 8}
+ACTIVE_SUBSCRIPTION_STATUSES = ["trial", "active"]
+# Tiers that may put runs in the interactive lane
+INTERACTIVE_TIERS = frozenset({"basic", "pro", "enterprise"})
+
+
+def _percentile(samples: List[float], fraction: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class ExecutionQueue:
+    """MongoDB-backed job queue with leases, visibility timeouts and per-tenant fair sharing."""
+
+    def __init__(self, visibility_timeout: int = 300, max_attempts: int = 5, retry_delay: int = 10,
+                 tier_cache_ttl: float = 60.0, queue_time_samples: int = 1000, interactive_jobs_per_tenant: int = 3):
+        self.visibility_timeout = visibility_timeout
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.interactive_jobs_per_tenant = interactive_jobs_per_tenant
+        self.tier_cache_ttl = tier_cache_ttl
+        self.queue_time_samples = queue_time_samples
+        self._wakeup = asyncio.Event()
+        self._tiers: Dict[str, Tuple[str, float]] = {}
+        # Seconds from enqueue to first claim, by (lane, tier), for jobs claimed by this process
+        self._queue_times: Dict[Tuple[str, str], deque] = {}
+        self._claimed: Dict[Tuple[str, str], int] = {}
+
+    @property
+    def collection(self):
+        return get_database().execution_queue
+
+    async def tenant_tier(self, user_id: str) -> str:
+        """Subscription tier used to weight a tenant's share, cached for tier_cache_ttl seconds."""
+        cached = self._tiers.get(user_id)
+        if cached and cached[1] > time.monotonic():
+            return cached[0]
+        subscription = await get_database().subscriptions.find_one(
+            {"user_id": user_id, "status": {"$in": ACTIVE_SUBSCRIPTION_STATUSES}}, {"tier": 1}
+        )
+        tier = subscription.get("tier") if subscription else None
+        tier = tier if tier in TIER_WEIGHTS else FREE_TIER
+        if len(self._tiers) > 10000:
+            self._tiers.clear()
+        self._tiers[user_id] = (tier, time.monotonic() + self.tier_cache_ttl)
+        return tier
+
+    async def admit_lane(self, user_id: str, requested: str) -> str:
+        """Lane a tenant's API request actually gets; interactive is downgraded to standard
+        for free tiers and once the tenant already has its share of interactive jobs waiting."""
+        if requested not in LANE_RANKS:
+            raise ValueError(f"Unknown queue lane: {requested}")
+        if requested != Lane.INTERACTIVE:
+            return requested
+        if await self.tenant_tier(user_id) not in INTERACTIVE_TIERS:
+            return Lane.STANDARD
+        waiting = await self.collection.count_documents({
+            "user_id": user_id, "lane": Lane.INTERACTIVE, "status": {"$in": [JobStatus.QUEUED, JobStatus.LEASED]}
+        }, limit=self.interactive_jobs_per_tenant)
+        return Lane.INTERACTIVE if waiting < self.interactive_jobs_per_tenant else Lane.STANDARD
+
+    async def _start_tag(self, lane: str, user_id: str, cost: float) -> float:
+        """Virtual start time for a tenant's next job: max(lane clock, tenant's last finish tag)."""
+        db = get_database()
+        clock = await db.execution_queue_lanes.find_one({"lane": lane})
+        virtual_time = clock["vtime"] if clock else 0.0
+        try:
+            await db.execution_queue_tenants.update_one(
+                {"lane": lane, "user_id": user_id}, {"$max": {"finish": virtual_time}}, upsert=True
+            )
+        except DuplicateKeyError:
+            # Lost a race to create the tenant's first tag; the document exists now
+            await db.execution_queue_tenants.update_one(
+                {"lane": lane, "user_id": user_id}, {"$max": {"finish": virtual_time}}
+            )
+        tenant = await db.execution_queue_tenants.find_one_and_update(
+            {"lane": lane, "user_id": user_id}, {"$inc": {"finish": cost}},
+            return_document=ReturnDocument.AFTER
+        )
+        return tenant["finish"] - cost
+
+    async def enqueue(self, execution_id: str, workflow_id: str, user_id: str,
+                      trigger_data: Optional[Dict[str, Any]] = None, kind: str = "execute",
+                      payload: Optional[Dict[str, Any]] = None, lane: Optional[str] = None) -> Dict[str, Any]:
+        """Add a job to the queue and wake up idle local workers.
+
+        Item batches default to the batch lane and everything else to the
+        standard lane. A batch costs one unit of its tenant's share per item.
+        """
+        lane = lane or (Lane.BATCH if kind == "batch" else Lane.STANDARD)
+        if lane not in LANE_RANKS:
+            raise ValueError(f"Unknown queue lane: {lane}")
+        tier = await self.tenant_tier(user_id)
+        cost = max(len((payload or {}).get("items") or []), 1) if kind == "batch" else 1
+        vtime = await self._start_tag(lane, user_id, cost / TIER_WEIGHTS[tier])
+        now = datetime.utcnow()
+        job = {
+            "id": str(uuid.uuid4()),
+            "kind": kind,
+            "execution_id": execution_id,
+            "workflow_id": workflow_id,
+            "user_id": user_id,
+            "trigger_data": trigger_data or {},
+            "payload": payload or {},
+            "lane": lane,
+            "priority": LANE_RANKS[lane],
+            "tier": tier,
+            "vtime": vtime,
+            "status": JobStatus.QUEUED,
+            "attempts": 0,
+            "available_at": now,
+            "enqueued_at": now,
+            "lease_owner": None,
+            "lease_expires_at": None,
+            "last_error": None
+        }
+        await self.collection.insert_one(job)
+        job.pop('_id', None)
+        self._wakeup.set()
+        return job
+
+    async def claim(self, worker_id: str) -> Optional[Dict[str, Any]]:
+        """Lease the next visible job by lane, then virtual start time; expired leases are visible again."""
+        now = datetime.utcnow()
+        job = await self.collection.find_one_and_update(
+            {
+                "$or": [
+                    {"status": JobStatus.QUEUED, "available_at": {"$lte": now}},
+                    {"status": JobStatus.LEASED, "lease_expires_at": {"$lte": now}}
+                ]
+            },
+            {
+                "$set": {
+                    "status": JobStatus.LEASED,
+                    "lease_owner": worker_id,
+                    "lease_expires_at": now + timedelta(seconds=self.visibility_timeout),
+                    "leased_at": now
+                },
+                "$inc": {"attempts": 1}
+            },
+            sort=[("priority", 1), ("vtime", 1), ("available_at", 1)],
+            return_document=ReturnDocument.AFTER
+        )
+        if job:
+            job.pop('_id', None)
+            if job.get("lane") is not None:
+                # The lane clock follows the start tag of the job entering service
+                await get_database().execution_queue_lanes.update_one(
+                    {"lane": job["lane"]}, {"$max": {"vtime": job["vtime"]}}, upsert=True
+                )
+            if job["attempts"] == 1:
+                self._record_queue_time(job, now)
+        return job
+
+    def _record_queue_time(self, job: Dict[str, Any], claimed_at: datetime):
+        key = (job.get("lane") or Lane.STANDARD, job.get("tier") or FREE_TIER)
+        samples = self._queue_times.get(key)
+        if samples is None:
+            samples = self._queue_times[key] = deque(maxlen=self.queue_time_samples)
+        samples.append((claimed_at - job["enqueued_at"]).total_seconds())
+        self._claimed[key] = self._claimed.get(key, 0) + 1
+
+    def get_queue_time_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Queue time percentiles (seconds) over recent first deliveries, by lane and tier."""
+        stats: Dict[str, Dict[str, Any]] = {}
+        for (lane, tier), samples in self._queue_times.items():
+            if not samples:
+                continue
+            values = list(samples)
+            stats.setdefault(lane, {})[tier] = {
+                "claimed": self._claimed[(lane, tier)],
+                "p50": round(_percentile(values, 0.5), 3),
+                "p95": round(_percentile(values, 0.95), 3),
+                "p99": round(_percentile(values, 0.99), 3),
+                "max": round(max(values), 3)
+            }
+        return stats
+
+    async def extend_lease(self, job_id: str, worker_id: str) -> bool:
+        """Push the visibility timeout forward while a job is still being worked on."""
+        result = await self.collection.update_one(
+            {"id": job_id, "lease_owner": worker_id, "status": JobStatus.LEASED},
+            {"$set": {"lease_expires_at": datetime.utcnow() + timedelta(seconds=self.visibility_timeout)}}
+        )
+        return result.modified_count == 1
+
+    async def ack(self, job_id: str, worker_id: str) -> bool:
+        """Remove a finished job from the queue."""
+        result = await self.collection.delete_one({"id": job_id, "lease_owner": worker_id})
+        return result.deleted_count == 1
+
+    async def nack(self, job: Dict[str, Any], worker_id: str, error: str) -> str:
+        """Release a job after a failed attempt, or park it once attempts are exhausted."""
+        if job.get("attempts", 0) >= self.max_attempts:
+            status = JobStatus.DEAD
+            available_at = None
+        else:
+            status = JobStatus.QUEUED
+            available_at = datetime.utcnow() + timedelta(seconds=self.retry_delay * job.get("attempts", 1))
+
+        await self.collection.update_one(
+            {"id": job["id"], "lease_owner": worker_id},
+            {"$set": {
+                "status": status,
+                "available_at": available_at,
+                "lease_owner": None,
+                "lease_expires_at": None,
+                "last_error": error
+            }}
+        )
+        return status
+
+    async def wait_for_work(self, timeout: float):
+        """Sleep until a job is enqueued in this process or the timeout elapses."""
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        self._wakeup.clear()
+
+    async def get_stats(self, top_tenants: int = 10) -> Dict[str, Any]:
+        """Get queue depth by status and lane, the deepest tenants and queue times."""
+        counts = {JobStatus.QUEUED: 0, JobStatus.LEASED: 0, JobStatus.DEAD: 0}
+        lanes = {lane: {JobStatus.QUEUED: 0, JobStatus.LEASED: 0} for lane in LANE_RANKS}
+        async for row in self.collection.aggregate([
+            {"$group": {"_id": {"status": "$status", "lane": "$lane"}, "count": {"$sum": 1}}}
+        ]):
+            status, lane = row["_id"]["status"], row["_id"].get("lane") or Lane.STANDARD
+            counts[status] = counts.get(status, 0) + row["count"]
+            if status != JobStatus.DEAD:
+                lanes.setdefault(lane, {})[status] = row["count"]
+        tenants = [
+            {"user_id": row["_id"], "queued": row["count"]}
+            async for row in self.collection.aggregate([
+                {"$match": {"status": JobStatus.QUEUED}},
+                {"$group": {"_id": "$user_id", "count": {"$sum": 1}}},
+                {"$sort": {"count": -1}},
+                {"$limit": top_tenants}
+            ])
+        ]
+        return {
+            **counts,
+            "lanes": lanes,
+            "top_tenants": tenants,
+            "queue_time_seconds": self.get_queue_time_stats()
+        }
+
+
+class ExecutionWorkerPool:
+    """Pool of async worker coroutines that pull jobs from the execution queue."""
+
+    def __init__(self, queue: ExecutionQueue, concurrency: int = 4, poll_interval: float = 2.0,
+                 cancel_poll_interval: float = 5.0, reap_interval: float = 60.0, reap_grace: float = 300.0,
+                 run_maintenance: bool = True):
+        self.queue = queue
+        self.concurrency = concurrency
+        # Whether this pool also runs the reaper and loads persisted timers; one pool per deployment is enough
+        self.run_maintenance = run_maintenance
+        self.poll_interval = poll_interval
+        self.cancel_poll_interval = cancel_poll_interval
+        self.reap_interval = reap_interval
+        # How long past its deadline a RUNNING execution may stay before it is presumed orphaned
+        self.reap_grace = reap_grace
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._workers: List[asyncio.Task] = []
+        self.jobs_processed = 0
+        self.jobs_failed = 0
+        self.executions_reaped = 0
+
+    @property
+    def is_running(self) -> bool:
+        return any(not worker.done() for worker in self._workers)
+
+    def start(self):
+        """Start the worker coroutines and the delay scheduler (with run_maintenance, also the reaper) on the running event loop."""
+        if self.is_running:
+            return
+        self._workers = [
+            asyncio.create_task(self._worker_loop(f"{self.worker_id}#{number}"))
+            for number in range(self.concurrency)
+        ]
+        # Every pool fires the timers its executions suspend on; the maintenance pool also loads the others
+        delay_scheduler.start(self.queue, load_persisted=self.run_maintenance)
+        if self.run_maintenance:
+            self._workers.append(asyncio.create_task(self._reaper_loop()))
+        logger.info(f"Started {self.concurrency} execution workers ({self.worker_id})")
+
+    async def stop(self):
+        """Stop the workers; jobs in flight are redelivered once their lease expires."""
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        await delay_scheduler.stop()
+
+    async def _worker_loop(self, worker_id: str):
+        while True:
+            try:
+                job = await self.queue.claim(worker_id)
+                if job is None:
+                    await self.queue.wait_for_work(self.poll_interval)
+                    continue
+                await self._process(job, worker_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Execution worker {worker_id} error: {e}")
+                await asyncio.sleep(self.poll_interval)
+
+    async def _reaper_loop(self):
+        while True:
+            await asyncio.sleep(self.reap_interval)
+            try:
+                await self.reap_expired()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Execution reaper error: {e}")
+
+    async def reap_expired(self) -> int:
+        """Fail RUNNING executions that are well past their deadline (their worker is gone)."""
+        db = get_database()
+        cutoff = datetime.utcnow() - timedelta(seconds=self.reap_grace)
+        reaped = 0
+        async for execution in db.workflow_executions.find(
+            {"status": ExecutionStatus.RUNNING.value, "deadline_at": {"$lt": cutoff}}, {"id": 1}
+        ):
+            if execution["id"] in workflow_engine.running_workflows:
+                continue
+            result = await db.workflow_executions.update_one(
+                {"id": execution["id"], "status": ExecutionStatus.RUNNING.value},
+                {"$set": {
+                    "status": ExecutionStatus.FAILED.value,
+                    "error_message": "Execution exceeded its deadline and was reaped",
+                    "completed_at": datetime.utcnow()
+                }}
+            )
+            if result.modified_count:
+                reaped += 1
+                await delay_scheduler.cancel_execution(execution["id"])
+                logger.warning(f"Reaped execution {execution['id']} past its deadline")
+        self.executions_reaped += reaped
+        return reaped
+
+    async def _process(self, job: Dict[str, Any], worker_id: str):
+        heartbeat = asyncio.create_task(self._heartbeat(job["id"], job["execution_id"], worker_id))
+        try:
+            await self.run_job(job)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.jobs_failed += 1
+            status = await self.queue.nack(job, worker_id, str(e))
+            logger.error(f"Execution job {job['id']} failed (attempt {job.get('attempts')}): {e}")
+            if status == JobStatus.DEAD:
+                await self._mark_execution_failed(job, f"Execution abandoned after {job.get('attempts')} attempts: {e}")
+        else:
+            self.jobs_processed += 1
+            await self.queue.ack(job["id"], worker_id)
+        finally:
+            heartbeat.cancel()
+
+    async def _heartbeat(self, job_id: str, execution_id: str, worker_id: str):
+        """Extend the job lease and pass on cancel requests made through the API."""
+        db = get_database()
+        lease_interval = max(self.queue.visibility_timeout / 3, 1)
+        next_lease = lease_interval
+        elapsed = 0.0
+        while True:
+            await asyncio.sleep(self.cancel_poll_interval)
+            elapsed += self.cancel_poll_interval
+            if await db.workflow_executions.find_one({"id": execution_id, "cancel_requested": True}, {"id": 1}):
+                if workflow_engine.cancel_workflow(execution_id):
+                    logger.info(f"Cancelling execution {execution_id} on request")
+            if elapsed >= next_lease:
+                next_lease += lease_interval
+                if not await self.queue.extend_lease(job_id, worker_id):
+                    logger.warning(f"Lost lease on execution job {job_id}")
+                    return
+
+    async def run_job(self, job: Dict[str, Any]):
+        """Run (or resume) a queued workflow execution and persist its outcome."""
+        db = get_database()
+
+        workflow_data = await db.workflows.find_one({"id": job["workflow_id"]})
+        if not workflow_data:
+            await self._mark_execution_failed(job, "Workflow not found")
+            return
+        workflow = Workflow(**workflow_data)
+
+        on_checkpoint = checkpoint_store.callback(job["execution_id"])
+        deadline_at = datetime.utcnow() + timedelta(seconds=workflow_engine.execution_timeout_for(workflow))
+        if job.get("kind") == "batch":
+            execution = await self._run_batch(job, workflow, deadline_at)
+            if execution is None:
+                return
+        elif job.get("kind") == "resume":
+            # Delay wake-ups resume WAITING executions, manual resumes were re-queued by the API
+            expected = ExecutionStatus.WAITING if job["payload"].get("reason") == "delay" else ExecutionStatus.QUEUED
+            execution_data = await db.workflow_executions.find_one_and_update(
+                {"id": job["execution_id"], "status": expected.value},
+                {"$set": {"status": ExecutionStatus.RUNNING.value, "deadline_at": deadline_at}}
+            )
+            if not execution_data:
+                # Already resumed by another delivery, or cancelled meanwhile
+                return
+            execution_data.pop('_id', None)
+            execution = await workflow_engine.resume_workflow(
+                workflow, WorkflowExecution(**execution_data), on_checkpoint=on_checkpoint
+            )
+        else:
+            execution_data = await db.workflow_executions.find_one_and_update(
+                {"id": job["execution_id"], "status": {"$nin": TERMINAL_STATUSES}},
+                {"$set": {"status": ExecutionStatus.RUNNING.value, "deadline_at": deadline_at}}
+            )
+            if not execution_data:
+                # Cancelled before it started, or finished (reaped) by an earlier delivery
+                return
+            if checkpoint_store.has_progress(execution_data):
+                # Redelivered after a worker died mid-run: continue after the last completed nodes
+                execution_data.pop('_id', None)
+                execution = await workflow_engine.resume_workflow(
+                    workflow, WorkflowExecution(**execution_data), on_checkpoint=on_checkpoint
+                )
+            else:
+                await db.workflow_executions.update_one(
+                    {"id": job["execution_id"]},
+                    {"$set": {"started_at": datetime.utcnow()}}
+                )
+                execution = await workflow_engine.execute_workflow(
+                    workflow, job.get("trigger_data") or {}, execution_id=job["execution_id"],
+                    suspend_delays=True, on_checkpoint=on_checkpoint
+                )
+
+        await db.workflow_executions.update_one(
+            {"id": execution.id},
+            {"$set": {
+                "status": execution.status.value,
+                "completed_at": execution.completed_at,
+                "error_message": execution.error_message,
+                "execution_data": execution.execution_data,
+                "checkpoint": execution.checkpoint,
+                "item_results": execution.item_results,
+                "deadline_at": execution.deadline_at,
+                "duration": execution.duration,
+                "execution_log": execution.execution_log
+            }, "$unset": {"cancel_requested": ""}}
+        )
+
+        if execution.status == ExecutionStatus.WAITING:
+            # Nothing stays in memory while waiting; the delay scheduler re-enqueues the execution
+            for node_id, resume_at in execution.checkpoint["waiting"].items():
+                await delay_scheduler.schedule(
+                    execution.id, workflow.id, execution.user_id, node_id, datetime.fromisoformat(resume_at)
+                )
+            logger.info(f"Execution {execution.id} of workflow {workflow.id} waiting on {len(execution.checkpoint['waiting'])} delay(s)")
+            return
+
+        # Update workflow stats
+        await db.workflows.update_one(
+            {"id": workflow.id},
+            {
+                "$set": {"last_run": datetime.utcnow()},
+                "$inc": {
+                    "run_count": 1,
+                    "success_count": 1 if execution.status == ExecutionStatus.SUCCESS else 0
+                }
+            }
+        )
+
+        logger.info(f"Executed workflow {workflow.id} with execution ID {execution.id}: {execution.status.value}")
+
+    async def _run_batch(self, job: Dict[str, Any], workflow: Workflow, deadline_at: datetime) -> Optional[WorkflowExecution]:
+        """Run an item-batch execution, saving item results as they come in."""
+        db = get_database()
+        execution_data = await db.workflow_executions.find_one_and_update(
+            {"id": job["execution_id"], "status": {"$nin": TERMINAL_STATUSES}},
+            {"$set": {"status": ExecutionStatus.RUNNING.value, "deadline_at": deadline_at}}
+        )
+        if not execution_data:
+            return None
+        # Items finished by an earlier delivery of this job are not run again
+        previous_results = execution_data.get("item_results") or []
+
+        async def save_items(results: List[Dict[str, Any]]):
+            await db.workflow_executions.update_one(
+                {"id": job["execution_id"]},
+                {"$push": {"item_results": {"$each": results}}}
+            )
+
+        return await workflow_engine.execute_batch(
+            workflow, job["payload"].get("items", []),
+            item_concurrency=job["payload"].get("item_concurrency"),
+            execution_id=job["execution_id"],
+            previous_results=previous_results,
+            on_items=save_items
+        )
+
+    async def _mark_execution_failed(self, job: Dict[str, Any], error: str):
+        db = get_database()
+        await db.workflow_executions.update_one(
+            {"id": job["execution_id"]},
+            {"$set": {
+                "status": ExecutionStatus.FAILED.value,
+                "error_message": error,
+                "completed_at": datetime.utcnow()
+            }}
+        )
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get worker pool statistics."""
+        return {
+            "worker_id": self.worker_id,
+            "concurrency": self.concurrency,
+            "running": self.is_running,
+            "runs_maintenance": self.run_maintenance,
+            "jobs_processed": self.jobs_processed,
+            "jobs_failed": self.jobs_failed,
+            "executions_reaped": self.executions_reaped,
+            "running_executions": len(workflow_engine.get_running_workflows())
+        }
+
+
+# Global instances
+execution_queue = ExecutionQueue(
+    visibility_timeout=int(os.environ.get("EXECUTION_VISIBILITY_TIMEOUT", "300")),
+    max_attempts=int(os.environ.get("EXECUTION_MAX_ATTEMPTS", "5")),
+    interactive_jobs_per_tenant=int(os.environ.get("EXECUTION_INTERACTIVE_JOBS_PER_TENANT", "3"))
+)
+execution_worker_pool = ExecutionWorkerPool(
+    execution_queue,
+    concurrency=int(os.environ.get("EXECUTION_WORKERS", "4")),
+    reap_grace=float(os.environ.get("EXECUTION_REAP_GRACE_SECONDS", "300"))
+)
@@ -0,0 +1,66 @@
+"""
+Per-node execution traces.
+
+While an execution runs, an ExecutionTrace records one compact entry per node
+attempt chain: start and end (seconds since the run started, from the
+monotonic clock), status, error class, retries and payload sizes. The entries
+are saved with the execution as ``execution_log`` in the shape the analytics
+routes read (``node_type`` is ``"integration"`` for integration actions).
+"""
+import json
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from models import NodeType
+
+
+def payload_size(value: Any) -> int:
+    """Approximate size in bytes of a node payload once serialized."""
+    try:
+        return len(json.dumps(value, default=str, separators=(",", ":")))
+    except (TypeError, ValueError):
+        return 0
+
+
+class ExecutionTrace:
+    """Collects the trace entries of one run of an execution."""
+
+    __slots__ = ("run", "clock", "started", "entries")
+
+    def __init__(self, run: int = 0, clock: Callable[[], float] = time.monotonic):
+        # Resumed executions get a new run; offsets are relative to the start of each run
+        self.run = run
+        self.clock = clock
+        self.started = clock()
+        self.entries: List[Dict[str, Any]] = []
+
+    @classmethod
+    def for_execution(cls, execution_log: List[Dict[str, Any]],
+                      clock: Callable[[], float] = time.monotonic) -> "ExecutionTrace":
+        """Start the trace of the next run of an execution with the given log."""
+        return cls(execution_log[-1].get("run", 0) + 1 if execution_log else 0, clock)
+
+    def elapsed(self) -> float:
+        return self.clock() - self.started
+
+    def record(self, node, status: str, started: float, ended: float, attempts: int = 1,
+               error: Optional[str] = None, error_class: Optional[str] = None,
+               input_bytes: int = 0, output_bytes: int = 0):
+        """Add the entry of a node; started and ended are values of the trace's clock."""
+        is_integration = node.type == NodeType.ACTION and bool(node.integration)
+        self.entries.append({
+            "node_id": node.id,
+            "node_name": node.name,
+            "node_type": "integration" if is_integration else node.type.value,
+            "integration_name": node.integration if is_integration else None,
+            "run": self.run,
+            "status": status,
+            "start": round(started - self.started, 4),
+            "end": round(ended - self.started, 4),
+            "duration": round(ended - started, 4),
+            "retries": attempts - 1,
+            "error": error,
+            "error_class": error_class,
+            "input_bytes": input_bytes,
+            "output_bytes": output_bytes
+        })
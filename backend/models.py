@@ -46,6 +46,7 @@ class NodeType(str, Enum):
     CONDITION = "condition"
     DELAY = "delay"
     AI = "ai"
+    SUBWORKFLOW = "subworkflow"
 
 class WorkflowNode(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
@@ -75,6 +76,8 @@ class Workflow(BaseModel):
     last_run: Optional[datetime] = None
     run_count: int = 0
     success_count: int = 0
+    # Max seconds per run of an execution (engine default when unset)
+    timeout_seconds: Optional[int] = None
 
 class WorkflowCreate(BaseModel):
     name: str
@@ -86,6 +89,7 @@ class WorkflowUpdate(BaseModel):
     status: Optional[WorkflowStatus] = None
     nodes: Optional[List[WorkflowNode]] = None
     connections: Optional[List[WorkflowConnection]] = None
+    timeout_seconds: Optional[int] = Field(default=None, gt=0)
 
 # Integration Models
 class IntegrationCategory(str, Enum):
@@ -115,6 +119,8 @@ class Integration(BaseModel):
     config_fields: List[Dict[str, Any]] = []
     actions: List[Dict[str, Any]] = []
     triggers: List[Dict[str, Any]] = []
+    # requests_per_second, burst, max_in_flight, per_connection_requests_per_second, per_connection_burst
+    rate_limit: Optional[Dict[str, Any]] = None
 
 class UserIntegration(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
@@ -137,7 +143,9 @@ class AIWorkflowResponse(BaseModel):
 
 # Execution Models
 class ExecutionStatus(str, Enum):
+    QUEUED = "queued"
     RUNNING = "running"
+    WAITING = "waiting"
     SUCCESS = "success"
     FAILED = "failed"
     CANCELLED = "cancelled"
@@ -150,7 +158,20 @@ class WorkflowExecution(BaseModel):
     started_at: datetime = Field(default_factory=datetime.utcnow)
     completed_at: Optional[datetime] = None
     error_message: Optional[str] = None
+    # Payload the execution was triggered with (execution_data also gets the results)
+    trigger_data: Dict[str, Any] = {}
     execution_data: Dict[str, Any] = {}
+    checkpoint: Dict[str, Any] = {}
+    deadline_at: Optional[datetime] = None
+    # Seconds spent running (all runs of a resumed execution together)
+    duration: Optional[float] = None
+    # Per-node trace entries, see execution_trace.py
+    execution_log: List[Dict[str, Any]] = []
+    item_results: List[Dict[str, Any]] = []
+
+class BatchExecutionRequest(BaseModel):
+    items: List[Any]
+    item_concurrency: Optional[int] = Field(default=None, ge=1, le=100)
 
 # Analytics Models
 class DashboardStats(BaseModel):
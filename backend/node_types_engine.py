@@ -403,8 +403,13 @@ class NodeTypesEngine:
                             "type": "object",
                             "properties": {
                                 "field": {"type": "string", "default": ""},
-                                "operator": {"type": "string", "enum": ["equals", "contains", "greater_than", "less_than"], "default": "equals"},
-                                "value": {"type": "string", "default": ""}
+                                "operator": {"type": "string", "enum": [
+                                    "equals", "not_equals", "contains", "not_contains", "greater_than", "less_than",
+                                    "greater_or_equal", "less_or_equal", "in", "not_in", "starts_with", "ends_with",
+                                    "matches", "exists", "not_exists"
+                                ], "default": "equals"},
+                                "value": {"type": "string", "default": ""},
+                                "condition": {"type": "object", "description": "Full expression with nested paths and all/any/not"}
                             }
                         }
                     },
@@ -423,6 +428,23 @@ class NodeTypesEngine:
                             }
                         }
                     },
+                    {
+                        "id": "subworkflow",
+                        "name": "Call Workflow",
+                        "description": "Run another of your workflows and use its results",
+                        "type": "subworkflow",
+                        "category": "advanced",
+                        "icon": "🧩",
+                        "config_schema": {
+                            "type": "object",
+                            "properties": {
+                                "workflow_id": {"type": "string", "default": ""},
+                                "inputs": {"type": "array", "items": {"type": "string"}, "description": "Fields passed to the workflow (all when empty)"},
+                                "memoize": {"type": "boolean", "default": False, "description": "Reuse results for identical input"},
+                                "memoize_ttl": {"type": "number", "default": 3600}
+                            }
+                        }
+                    },
                     {
                         "id": "loop",
                         "name": "Loop",
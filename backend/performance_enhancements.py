@@ -4,12 +4,8 @@ Implementing cutting-edge performance features for enterprise-grade reliability
 """
 
 import asyncio
-import time
-import json
-import redis
 import psutil
 import logging
-import os
 from typing import Dict, List, Any, Optional
 from datetime import datetime, timedelta
 from collections import defaultdict, deque
@@ -17,14 +13,19 @@ import hashlib
 import pickle
 from functools import wraps
 
+from cache_service import cache_service
+
 logger = logging.getLogger(__name__)
 
 class AdvancedCacheManager:
-    """Advanced caching system with multi-level caching and intelligent invalidation"""
+    """Category-aware facade over the shared two-tier cache_service.
+    
+    Entries are stored as ``{category}:{key}``; with REDIS_URL set they live in
+    the Redis L2 shared by all replicas, and category invalidation reads the
+    category's tag set instead of scanning keys.
+    """
     
     def __init__(self):
-        self.redis_client = None
-        self.memory_cache = {}
         self.cache_stats = defaultdict(int)
         self.cache_policies = {
             "user_data": {"ttl": 3600, "strategy": "lru"},
@@ -33,18 +34,6 @@ class AdvancedCacheManager:
             "ai_responses": {"ttl": 86400, "strategy": "lru"},
             "static_data": {"ttl": 604800, "strategy": "ttl"}
         }
-        
-        try:
-            self.redis_client = redis.Redis(
-                host=os.getenv("REDIS_HOST", "localhost"),
-                port=int(os.getenv("REDIS_PORT", 6379)),
-                db=0,
-                decode_responses=True
-            )
-            self.redis_client.ping()
-            logger.info("Redis cache initialized successfully")
-        except Exception as e:
-            logger.warning(f"Redis not available, using memory cache only: {e}")
     
     def _generate_cache_key(self, prefix: str, *args, **kwargs) -> str:
         """Generate consistent cache key"""
@@ -55,25 +44,14 @@ class AdvancedCacheManager:
         return hashlib.md5(key_data.encode()).hexdigest()[:16]
     
     async def get(self, key: str, category: str = "default") -> Optional[Any]:
-        """Get item from cache with fallback"""
+        """Get item from cache"""
         self.cache_stats[f"{category}_requests"] += 1
         
         try:
-            # Try Redis first
-            if self.redis_client:
-                result = await asyncio.to_thread(self.redis_client.get, key)
-                if result:
-                    self.cache_stats[f"{category}_redis_hits"] += 1
-                    return json.loads(result)
-            
-            # Fall back to memory cache
-            if key in self.memory_cache:
-                item = self.memory_cache[key]
-                if item["expires"] > time.time():
-                    self.cache_stats[f"{category}_memory_hits"] += 1
-                    return item["data"]
-                else:
-                    del self.memory_cache[key]
+            result = await cache_service.get(f"{category}:{key}")
+            if result is not None:
+                self.cache_stats[f"{category}_hits"] += 1
+                return result
             
             self.cache_stats[f"{category}_misses"] += 1
             return None
@@ -87,28 +65,7 @@ class AdvancedCacheManager:
         """Set item in cache with automatic TTL"""
         try:
             policy = self.cache_policies.get(category, {"ttl": 3600})
-            ttl = ttl or policy["ttl"]
-            
-            # Store in Redis
-            if self.redis_client:
-                await asyncio.to_thread(
-                    self.redis_client.setex, 
-                    key, 
-                    ttl, 
-                    json.dumps(value, default=str)
-                )
-            
-            # Store in memory cache
-            self.memory_cache[key] = {
-                "data": value,
-                "expires": time.time() + ttl,
-                "created": time.time()
-            }
-            
-            # Cleanup old memory cache entries
-            if len(self.memory_cache) > 10000:
-                await self._cleanup_memory_cache()
-            
+            await cache_service.set(f"{category}:{key}", value, ttl or policy["ttl"])
             self.cache_stats[f"{category}_sets"] += 1
             return True
             
@@ -119,29 +76,13 @@ class AdvancedCacheManager:
     async def invalidate(self, pattern: str = None, category: str = None):
         """Invalidate cache entries"""
         try:
-            if pattern and self.redis_client:
-                keys = await asyncio.to_thread(self.redis_client.keys, pattern)
-                if keys:
-                    await asyncio.to_thread(self.redis_client.delete, *keys)
-            
-            # Clear memory cache
             if category:
-                keys_to_remove = [k for k in self.memory_cache.keys() if category in k]
-                for key in keys_to_remove:
-                    del self.memory_cache[key]
+                await cache_service.invalidate_pattern(f"{category}:{pattern or '*'}")
+            elif pattern:
+                await cache_service.invalidate_pattern(f"*:{pattern}")
             
         except Exception as e:
             logger.error(f"Cache invalidation error: {e}")
-    
-    async def _cleanup_memory_cache(self):
-        """Clean up expired entries from memory cache"""
-        current_time = time.time()
-        expired_keys = [
-            key for key, item in self.memory_cache.items()
-            if item["expires"] < current_time
-        ]
-        for key in expired_keys:
-            del self.memory_cache[key]
 
 class PerformanceMonitor:
     """Real-time performance monitoring and alerting system"""
@@ -0,0 +1,252 @@
+"""
+Client-side rate limiting of integration calls.
+
+Each integration with a ``rate_limit`` entry in the catalog gets an
+IntegrationLimiter combining:
+
+- a token bucket for the provider-wide request rate,
+- an optional token bucket per user connection,
+- a cap on calls in flight,
+- a fair queue: waiting calls are granted round-robin across connections, so
+  one user's bulk run cannot starve everyone else's.
+
+Calls wait for a permit instead of bursting past the provider's limit and
+collecting 429s.
+"""
+import asyncio
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from typing import Any, Deque, Dict, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONNECTION = "default"
+
+
+class RateLimitExceeded(Exception):
+    """Raised when a call cannot get a permit (queue full or waited too long)."""
+
+
+class TokenBucket:
+    """Token bucket refilled continuously at `rate` tokens per second."""
+
+    __slots__ = ("rate", "capacity", "tokens", "updated")
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = max(capacity, 1)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        if now > self.updated:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+
+    def wait_time(self, now: float) -> float:
+        """Seconds until a token is available (0 if one is available now)."""
+        self._refill(now)
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def take(self, now: float):
+        self._refill(now)
+        self.tokens -= 1
+
+    def is_full(self, now: float) -> bool:
+        self._refill(now)
+        return self.tokens >= self.capacity
+
+
+class IntegrationLimiter:
+    """Token buckets, in-flight cap and a per-connection fair queue for one integration."""
+
+    def __init__(self, integration_id: str, requests_per_second: Optional[float] = None, burst: Optional[int] = None,
+                 max_in_flight: Optional[int] = None, per_connection_requests_per_second: Optional[float] = None,
+                 per_connection_burst: Optional[int] = None, max_queue: int = 1000, max_wait: Optional[float] = None):
+        self.integration_id = integration_id
+        self.bucket = TokenBucket(requests_per_second, burst or requests_per_second) if requests_per_second else None
+        self.max_in_flight = max_in_flight
+        self.per_connection_rate = per_connection_requests_per_second
+        self.per_connection_burst = per_connection_burst or per_connection_requests_per_second
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+
+        self.in_flight = 0
+        self.queued = 0
+        self._queues: "OrderedDict[str, Deque[asyncio.Future]]" = OrderedDict()
+        self._connection_buckets: Dict[str, TokenBucket] = {}
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+        self.granted = 0
+        self.rejected = 0
+        self.total_wait = 0.0
+        self.max_wait_seen = 0.0
+
+    def _connection_bucket(self, connection_id: str) -> Optional[TokenBucket]:
+        if not self.per_connection_rate:
+            return None
+        bucket = self._connection_buckets.get(connection_id)
+        if bucket is None:
+            if len(self._connection_buckets) > 10000:
+                self._prune_buckets()
+            bucket = self._connection_buckets[connection_id] = TokenBucket(self.per_connection_rate, self.per_connection_burst)
+        return bucket
+
+    def _prune_buckets(self):
+        # A full bucket behaves exactly like a new one, so idle connections can be forgotten
+        now = time.monotonic()
+        for connection_id in [key for key, bucket in self._connection_buckets.items()
+                              if key not in self._queues and bucket.is_full(now)]:
+            del self._connection_buckets[connection_id]
+
+    def _ready_in(self, connection_id: str, now: float) -> float:
+        if self.max_in_flight is not None and self.in_flight >= self.max_in_flight:
+            return float("inf")
+        delay = self.bucket.wait_time(now) if self.bucket else 0.0
+        connection_bucket = self._connection_bucket(connection_id)
+        if connection_bucket:
+            delay = max(delay, connection_bucket.wait_time(now))
+        return delay
+
+    def _start(self, connection_id: str, now: float):
+        if self.bucket:
+            self.bucket.take(now)
+        connection_bucket = self._connection_bucket(connection_id)
+        if connection_bucket:
+            connection_bucket.take(now)
+        self.in_flight += 1
+        self.granted += 1
+
+    async def acquire(self, connection_id: str = DEFAULT_CONNECTION):
+        """Wait for a permit; release() must be called once the call is done."""
+        now = time.monotonic()
+        if not self.queued and self._ready_in(connection_id, now) == 0:
+            self._start(connection_id, now)
+            return
+
+        if self.queued >= self.max_queue:
+            self.rejected += 1
+            raise RateLimitExceeded(f"{self.integration_id}: {self.queued} calls already waiting")
+
+        future = asyncio.get_running_loop().create_future()
+        self._queues.setdefault(connection_id, deque()).append(future)
+        self.queued += 1
+        self._dispatch()
+        try:
+            if self.max_wait is not None:
+                await asyncio.wait_for(asyncio.shield(future), self.max_wait)
+            else:
+                await future
+        except (asyncio.CancelledError, asyncio.TimeoutError) as e:
+            if future.done() and not future.cancelled():
+                # Granted just as we gave up: hand the permit back
+                self.release()
+            else:
+                future.cancel()
+                self._discard(connection_id, future)
+            if isinstance(e, asyncio.TimeoutError):
+                self.rejected += 1
+                raise RateLimitExceeded(f"{self.integration_id}: no permit within {self.max_wait}s")
+            raise
+        waited = time.monotonic() - now
+        self.total_wait += waited
+        self.max_wait_seen = max(self.max_wait_seen, waited)
+
+    def release(self):
+        self.in_flight -= 1
+        if self.queued:
+            self._dispatch()
+
+    def _discard(self, connection_id: str, future: asyncio.Future):
+        waiters = self._queues.get(connection_id)
+        if waiters and future in waiters:
+            waiters.remove(future)
+            self.queued -= 1
+            if not waiters:
+                del self._queues[connection_id]
+
+    def _dispatch(self):
+        """Grant permits round-robin across connections while limits allow."""
+        if self._timer:
+            self._timer.cancel()
+            self._timer = None
+        now = time.monotonic()
+        retry_in = float("inf")
+        while self._queues:
+            granted = False
+            for connection_id in list(self._queues):
+                waiters = self._queues[connection_id]
+                while waiters and waiters[0].done():
+                    # Cancelled while waiting, not yet discarded by its caller
+                    waiters.popleft()
+                    self.queued -= 1
+                if not waiters:
+                    del self._queues[connection_id]
+                    continue
+                delay = self._ready_in(connection_id, now)
+                if delay:
+                    retry_in = min(retry_in, delay)
+                    continue
+                future = waiters.popleft()
+                self.queued -= 1
+                if waiters:
+                    # Served connections go to the back of the line
+                    self._queues.move_to_end(connection_id)
+                else:
+                    del self._queues[connection_id]
+                self._start(connection_id, now)
+                future.set_result(None)
+                granted = True
+                break
+            if not granted:
+                break
+        if self._queues and retry_in != float("inf"):
+            self._timer = asyncio.get_running_loop().call_later(retry_in, self._dispatch)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "requests_per_second": self.bucket.rate if self.bucket else None,
+            "max_in_flight": self.max_in_flight,
+            "in_flight": self.in_flight,
+            "queue_depth": self.queued,
+            "waiting_connections": len(self._queues),
+            "granted": self.granted,
+            "rejected": self.rejected,
+            "avg_wait_ms": round(self.total_wait / self.granted * 1000, 2) if self.granted else 0.0,
+            "max_wait_ms": round(self.max_wait_seen * 1000, 2)
+        }
+
+
+class RateLimiterRegistry:
+    """Limiters of every rate-limited integration."""
+
+    def __init__(self):
+        self.limiters: Dict[str, IntegrationLimiter] = {}
+
+    def configure(self, integration_id: str, config: Dict[str, Any]):
+        """Create (or replace) the limiter of an integration from its catalog rate_limit entry."""
+        self.limiters[integration_id] = IntegrationLimiter(integration_id, **config)
+
+    @asynccontextmanager
+    async def limit(self, integration_id: str, connection_id: Optional[str] = None):
+        """Hold a permit of the integration for the duration of the block (no-op when unlimited)."""
+        limiter = self.limiters.get(integration_id)
+        if limiter is None:
+            yield
+            return
+        await limiter.acquire(connection_id or DEFAULT_CONNECTION)
+        try:
+            yield
+        finally:
+            limiter.release()
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        return {integration_id: limiter.get_stats() for integration_id, limiter in self.limiters.items()}
+
+
+# Global instance
+rate_limiter = RateLimiterRegistry()
@@ -0,0 +1,223 @@
+"""
+Retry policies and circuit breakers for node execution.
+
+A node's ``retry`` config (``{"max_attempts": 3, "initial_delay": 1,
+"max_delay": 30, "multiplier": 2, "retry_on": ["timeout", "server_error"]}``)
+is compiled into a RetryPolicy with the execution plan. Failures are sorted
+into error classes so only transient ones are retried, with exponential
+backoff and full jitter.
+
+Each integration also has a circuit breaker: after repeated provider-side
+failures it opens and calls fail fast for a while instead of waiting on a
+dead endpoint, then a single probe call decides whether it closes again.
+"""
+import asyncio
+import os
+import random
+import time
+from typing import Any, Callable, Dict, FrozenSet, Iterable, Optional
+import logging
+
+from models import NodeType
+from rate_limiter import RateLimitExceeded
+
+logger = logging.getLogger(__name__)
+
+
+class ErrorClass:
+    TIMEOUT = "timeout"
+    RATE_LIMITED = "rate_limited"
+    NETWORK = "network"
+    SERVER_ERROR = "server_error"
+    CLIENT_ERROR = "client_error"
+    CIRCUIT_OPEN = "circuit_open"
+    UNKNOWN = "unknown"
+
+
+TRANSIENT_ERRORS = frozenset({ErrorClass.TIMEOUT, ErrorClass.RATE_LIMITED, ErrorClass.NETWORK, ErrorClass.SERVER_ERROR})
+
+# Error classes that say something about the provider's health
+PROVIDER_ERRORS = frozenset({ErrorClass.TIMEOUT, ErrorClass.NETWORK, ErrorClass.SERVER_ERROR})
+
+# Outcomes that say nothing either way (the call may not even have reached the provider)
+NEUTRAL_ERRORS = frozenset({ErrorClass.RATE_LIMITED, ErrorClass.CIRCUIT_OPEN, ErrorClass.UNKNOWN})
+
+_MESSAGE_MARKERS = (
+    (ErrorClass.RATE_LIMITED, ("429", "rate limit", "too many requests", "quota")),
+    (ErrorClass.TIMEOUT, ("timeout", "timed out", "deadline")),
+    (ErrorClass.NETWORK, ("connection", "network", "unreachable", "dns", "reset by peer")),
+    (ErrorClass.SERVER_ERROR, ("500", "502", "503", "504", "server error", "unavailable", "bad gateway")),
+    (ErrorClass.CLIENT_ERROR, ("400", "401", "403", "404", "422", "invalid", "unauthorized", "forbidden", "not found")),
+)
+
+
+class NodeExecutionError(Exception):
+    """A node failed; error_class tells whether trying again can help."""
+
+    def __init__(self, message: str, error_class: str = ErrorClass.UNKNOWN, attempts: int = 1):
+        super().__init__(message)
+        self.error_class = error_class
+        self.attempts = attempts
+
+
+class CircuitOpenError(NodeExecutionError):
+    def __init__(self, integration_id: str, retry_in: float):
+        super().__init__(
+            f"Circuit open for {integration_id}: provider failing, retry in {retry_in:.0f}s",
+            ErrorClass.CIRCUIT_OPEN
+        )
+
+
+def classify_error(error: Any) -> str:
+    """Map an exception or an error message to an error class."""
+    if isinstance(error, NodeExecutionError):
+        return error.error_class
+    if isinstance(error, RateLimitExceeded):
+        return ErrorClass.RATE_LIMITED
+    if isinstance(error, (TimeoutError, asyncio.TimeoutError)) or type(error).__name__.endswith("Timeout"):
+        return ErrorClass.TIMEOUT
+    if isinstance(error, (ConnectionError, OSError)):
+        return ErrorClass.NETWORK
+    if isinstance(error, (ValueError, KeyError, TypeError)):
+        return ErrorClass.CLIENT_ERROR
+
+    message = str(error).lower()
+    for error_class, markers in _MESSAGE_MARKERS:
+        if any(marker in message for marker in markers):
+            return error_class
+    return ErrorClass.UNKNOWN
+
+
+class RetryPolicy:
+    """How often, and after how long, a failed node is tried again."""
+
+    __slots__ = ("max_attempts", "initial_delay", "max_delay", "multiplier", "retry_on")
+
+    def __init__(self, max_attempts: int = 1, initial_delay: float = 1.0, max_delay: float = 30.0,
+                 multiplier: float = 2.0, retry_on: Iterable[str] = TRANSIENT_ERRORS):
+        self.max_attempts = max(1, int(max_attempts))
+        self.initial_delay = initial_delay
+        self.max_delay = max_delay
+        self.multiplier = multiplier
+        self.retry_on: FrozenSet[str] = frozenset(retry_on)
+
+    @classmethod
+    def for_node(cls, node_type: NodeType, config: Optional[Dict[str, Any]]) -> "RetryPolicy":
+        """Compile a node's retry config; ACTION and AI nodes retry transient errors by default."""
+        defaults = {"max_attempts": DEFAULT_MAX_ATTEMPTS if node_type in (NodeType.ACTION, NodeType.AI) else 1}
+        if config is None:
+            return cls(**defaults)
+        if not isinstance(config, dict):
+            raise ValueError(f"Retry config must be an object, got {config!r}")
+        unknown = set(config) - set(cls.__slots__)
+        if unknown:
+            raise ValueError(f"Unknown retry settings: {sorted(unknown)}")
+        return cls(**{**defaults, **config})
+
+    def should_retry(self, error_class: str, attempt: int) -> bool:
+        return attempt < self.max_attempts and error_class in self.retry_on
+
+    def backoff(self, attempt: int, rng: Optional[random.Random] = None) -> float:
+        """Full-jitter exponential backoff before the attempt after `attempt` (drawn from rng if given)."""
+        ceiling = min(self.max_delay, self.initial_delay * self.multiplier ** (attempt - 1))
+        return (rng or random).uniform(0, ceiling)
+
+
+class CircuitBreaker:
+    """Closed → open after failure_threshold consecutive provider failures → half-open probe after reset_timeout."""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probe_in_flight = False
+        self.rejected = 0
+
+    def before_call(self):
+        """Raise CircuitOpenError unless a call may go through now."""
+        if self.state == self.CLOSED:
+            return
+        retry_in = self.opened_at + self.reset_timeout - self.clock()
+        if self.state == self.OPEN and retry_in <= 0:
+            self.state = self.HALF_OPEN
+            self.probe_in_flight = False
+        if self.state == self.HALF_OPEN and not self.probe_in_flight:
+            self.probe_in_flight = True
+            return
+        self.rejected += 1
+        raise CircuitOpenError(self.name, max(retry_in, 0))
+
+    def record(self, error_class: Optional[str]):
+        """Record the outcome of a call; only provider-side errors count as failures.
+
+        Neutral outcomes neither count as failures nor reset the failure count.
+        """
+        if error_class in PROVIDER_ERRORS:
+            self.record_failure()
+        elif error_class in NEUTRAL_ERRORS:
+            self.release_probe()
+        else:
+            self.record_success()
+
+    def release_probe(self):
+        """Forget a probe call that was abandoned (cancelled) before it had an outcome."""
+        self.probe_in_flight = False
+
+    def record_success(self):
+        if self.state != self.CLOSED:
+            logger.info(f"Circuit for {self.name} closed")
+        self.state = self.CLOSED
+        self.failures = 0
+        self.probe_in_flight = False
+
+    def record_failure(self):
+        self.failures += 1
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                logger.warning(f"Circuit for {self.name} opened after {self.failures} failures")
+            self.state = self.OPEN
+            self.opened_at = self.clock()
+            self.probe_in_flight = False
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {"state": self.state, "consecutive_failures": self.failures, "rejected": self.rejected}
+
+
+class CircuitBreakerRegistry:
+    """One circuit breaker per integration."""
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.breakers: Dict[str, CircuitBreaker] = {}
+
+    def get(self, integration_id: str) -> CircuitBreaker:
+        breaker = self.breakers.get(integration_id)
+        if breaker is None:
+            breaker = self.breakers[integration_id] = CircuitBreaker(
+                integration_id, self.failure_threshold, self.reset_timeout, self.clock
+            )
+        return breaker
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        return {name: breaker.get_stats() for name, breaker in self.breakers.items()}
+
+
+DEFAULT_MAX_ATTEMPTS = int(os.environ.get("NODE_RETRY_MAX_ATTEMPTS", "3"))
+
+# Global instance
+circuit_breakers = CircuitBreakerRegistry(
+    failure_threshold=int(os.environ.get("CIRCUIT_FAILURE_THRESHOLD", "5")),
+    reset_timeout=float(os.environ.get("CIRCUIT_RESET_SECONDS", "30"))
+)
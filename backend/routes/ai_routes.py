@@ -3,11 +3,15 @@ from models import AIWorkflowRequest, AIWorkflowResponse
 from auth import get_current_active_user
 from ai_service import ai_service
 from database import get_database
+from cache_service import cache_service, generate_cache_key, CACHE_CONFIGS
 import logging
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/ai", tags=["ai"])
 
+# Seconds past the TTL that cached dashboard insights are still served while being regenerated
+DASHBOARD_INSIGHTS_STALE_TTL = 600
+
 @router.post("/generate-workflow", response_model=AIWorkflowResponse)
 async def generate_workflow_from_description(
     request: AIWorkflowRequest, 
@@ -300,9 +304,10 @@ Keep your response concise but informative.
 @router.get("/dashboard-insights")
 async def get_enhanced_dashboard_insights(current_user: dict = Depends(get_current_active_user)):
     """Get AI-powered dashboard insights"""
-    try:
+    user_id = current_user["user_id"]
+    
+    async def generate_insights():
         db = get_database()
-        user_id = current_user["user_id"]
         
         # Get user's workflow and execution data
         workflows_count = await db.workflows.count_documents({"user_id": user_id})
@@ -320,6 +325,9 @@ Focus on practical advice and optimization opportunities.
 """
         
         ai_response = await ai_service.process_with_groq(insights_prompt)
+        if ai_response.get("error"):
+            # Raising keeps a transient Groq failure out of the cache
+            raise RuntimeError(f"Groq insights failed: {ai_response['error']}")
         
         return {
             "ai_provider": "groq_llama_3.1_8b",
@@ -334,6 +342,14 @@ Focus on practical advice and optimization opportunities.
             }
         }
     
+    try:
+        # One Groq call per user per TTL: concurrent and stale requests share it
+        return await cache_service.get_or_compute(
+            generate_cache_key("ai_responses", "dashboard_insights", user_id),
+            generate_insights,
+            CACHE_CONFIGS['ai_responses']['ttl'],
+            stale_ttl=DASHBOARD_INSIGHTS_STALE_TTL
+        )
     except Exception as e:
         logger.error(f"Failed to get dashboard insights: {str(e)}")
         return {"error": str(e)}
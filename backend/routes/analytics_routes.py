@@ -7,6 +7,8 @@ from typing import Dict, List, Optional, Any
 from datetime import datetime, timedelta
 from database import get_database
 from auth import get_current_active_user
+from models import ExecutionStatus
+from retry_policy import ErrorClass
 import logging
 from collections import defaultdict
 
@@ -40,8 +42,8 @@ async def get_workflow_performance_analytics(
         # Get execution data
         execution_cursor = db.workflow_executions.find({
             "workflow_id": workflow_id,
-            "created_at": {"$gte": start_date}
-        }).sort([("created_at", 1)])
+            "started_at": {"$gte": start_date}
+        }).sort([("started_at", 1)])
         
         executions = await execution_cursor.to_list(length=None)
         
@@ -81,7 +83,7 @@ async def get_workflow_performance_analytics(
         
         if executions:
             # Calculate summary metrics
-            successful = [e for e in executions if e.get("status") == "completed"]
+            successful = [e for e in executions if e.get("status") == ExecutionStatus.SUCCESS.value]
             failed = [e for e in executions if e.get("status") == "failed"]
             
             analytics["summary"]["success_rate"] = (len(successful) / len(executions)) * 100
@@ -97,10 +99,10 @@ async def get_workflow_performance_analytics(
             daily_data = defaultdict(lambda: {"executions": 0, "successes": 0, "durations": []})
             
             for execution in executions:
-                day = execution.get("created_at", datetime.utcnow()).strftime("%Y-%m-%d")
+                day = execution.get("started_at", datetime.utcnow()).strftime("%Y-%m-%d")
                 daily_data[day]["executions"] += 1
                 
-                if execution.get("status") == "completed":
+                if execution.get("status") == ExecutionStatus.SUCCESS.value:
                     daily_data[day]["successes"] += 1
                     if execution.get("duration"):
                         daily_data[day]["durations"].append(execution["duration"])
@@ -118,7 +120,7 @@ async def get_workflow_performance_analytics(
                     analytics["timeline"]["average_duration_per_day"][day] = avg_duration
             
             # Node performance analysis
-            node_stats = defaultdict(lambda: {"executions": 0, "successes": 0, "failures": 0, "avg_duration": 0})
+            node_stats = defaultdict(lambda: {"executions": 0, "successes": 0, "failures": 0, "avg_duration": 0, "retries": 0})
             
             for execution in executions:
                 execution_log = execution.get("execution_log", [])
@@ -126,14 +128,20 @@ async def get_workflow_performance_analytics(
                     node_id = log_entry.get("node_id")
                     if node_id:
                         node_stats[node_id]["executions"] += 1
+                        node_stats[node_id]["retries"] += log_entry.get("retries", 0)
+                        
+                        # Running average of the node's duration (seconds)
+                        count = node_stats[node_id]["executions"]
+                        node_stats[node_id]["avg_duration"] += \
+                            (log_entry.get("duration", 0) - node_stats[node_id]["avg_duration"]) / count
                         
                         if log_entry.get("status") == "success":
                             node_stats[node_id]["successes"] += 1
                         else:
                             node_stats[node_id]["failures"] += 1
                             
-                            # Track error for error analysis
-                            error_type = log_entry.get("error", "Unknown error")
+                            # Track error for error analysis, by class (messages name nodes and attempts)
+                            error_type = log_entry.get("error_class") or ErrorClass.UNKNOWN
                             analytics["error_analysis"]["error_types"][error_type] = \
                                 analytics["error_analysis"]["error_types"].get(error_type, 0) + 1
                             
@@ -188,7 +196,7 @@ async def get_dashboard_analytics_overview(
         thirty_days_ago = datetime.utcnow() - timedelta(days=30)
         executions_cursor = db.workflow_executions.find({
             "workflow_id": {"$in": workflow_ids},
-            "created_at": {"$gte": thirty_days_ago}
+            "started_at": {"$gte": thirty_days_ago}
         })
         executions = await executions_cursor.to_list(length=None)
         
@@ -222,7 +230,7 @@ async def get_dashboard_analytics_overview(
         
         if executions:
             # Success rate calculation
-            successful = [e for e in executions if e.get("status") == "completed"]
+            successful = [e for e in executions if e.get("status") == ExecutionStatus.SUCCESS.value]
             overview["summary"]["success_rate"] = (len(successful) / len(executions)) * 100
             
             # Runtime calculation
@@ -233,7 +241,7 @@ async def get_dashboard_analytics_overview(
             seven_days_ago = datetime.utcnow() - timedelta(days=7)
             recent_workflow_ids = {
                 e["workflow_id"] for e in executions 
-                if e.get("created_at", datetime.utcnow()) > seven_days_ago
+                if e.get("started_at", datetime.utcnow()) > seven_days_ago
             }
             overview["summary"]["active_workflows"] = len(recent_workflow_ids)
             
@@ -257,7 +265,7 @@ async def get_dashboard_analytics_overview(
                 workflow_id = execution["workflow_id"]
                 workflow_performance[workflow_id]["executions"] += 1
                 
-                if execution.get("status") == "completed":
+                if execution.get("status") == ExecutionStatus.SUCCESS.value:
                     workflow_performance[workflow_id]["successes"] += 1
                     
                 duration = execution.get("duration", 0)
@@ -329,7 +337,7 @@ async def get_integration_usage_analytics(
         # Get executions in period
         executions_cursor = db.workflow_executions.find({
             "workflow_id": {"$in": workflow_ids},
-            "created_at": {"$gte": start_date}
+            "started_at": {"$gte": start_date}
         })
         executions = await executions_cursor.to_list(length=None)
         
@@ -363,7 +371,7 @@ async def get_integration_usage_analytics(
         
         for execution in executions:
             execution_log = execution.get("execution_log", [])
-            day = execution.get("created_at", datetime.utcnow()).strftime("%Y-%m-%d")
+            day = execution.get("started_at", datetime.utcnow()).strftime("%Y-%m-%d")
             
             for log_entry in execution_log:
                 if log_entry.get("node_type") == "integration":
@@ -376,8 +384,8 @@ async def get_integration_usage_analytics(
                         integration_data[integration_name]["successful_calls"] += 1
                     else:
                         integration_data[integration_name]["failed_calls"] += 1
-                        error = log_entry.get("error", "Unknown error")
-                        integration_data[integration_name]["error_types"][error] += 1
+                        error_class = log_entry.get("error_class") or ErrorClass.UNKNOWN
+                        integration_data[integration_name]["error_types"][error_class] += 1
                     
                     # Response time analysis
                     response_time = log_entry.get("duration", 0)
@@ -453,7 +461,7 @@ async def get_workflow_comparison_analytics(
         thirty_days_ago = datetime.utcnow() - timedelta(days=30)
         executions_cursor = db.workflow_executions.find({
             "workflow_id": {"$in": workflow_ids},
-            "created_at": {"$gte": thirty_days_ago}
+            "started_at": {"$gte": thirty_days_ago}
         })
         executions = await executions_cursor.to_list(length=None)
         
@@ -476,7 +484,7 @@ async def get_workflow_comparison_analytics(
             workflow_executions = [e for e in executions if e["workflow_id"] == workflow_id]
             
             if workflow_executions:
-                successful = [e for e in workflow_executions if e.get("status") == "completed"]
+                successful = [e for e in workflow_executions if e.get("status") == ExecutionStatus.SUCCESS.value]
                 success_rate = (len(successful) / len(workflow_executions)) * 100
                 
                 avg_duration = 0
@@ -491,7 +499,7 @@ async def get_workflow_comparison_analytics(
                     "average_duration": avg_duration,
                     "total_runtime": sum(e.get("duration", 0) for e in successful),
                     "executions_per_day": len(workflow_executions) / 30,
-                    "last_execution": max(e.get("created_at", datetime.min) for e in workflow_executions).isoformat()
+                    "last_execution": max(e.get("started_at", datetime.min) for e in workflow_executions).isoformat()
                 }
             else:
                 metrics = {
@@ -1,9 +1,11 @@
-from fastapi import APIRouter, HTTPException, Depends, status
+from fastapi import APIRouter, HTTPException, Depends, Response, status
 from typing import List, Optional
 from models import Integration, UserIntegration, IntegrationCategory
 from auth import get_current_active_user
 from database import get_database
 from integrations_engine import integrations_engine
+from rate_limiter import rate_limiter
+from retry_policy import circuit_breakers
 from cache_service import cache_service, cached, generate_cache_key, CACHE_CONFIGS
 from datetime import datetime
 import logging
@@ -12,24 +14,24 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/integrations", tags=["integrations"])
 
+def _json_response(body: bytes) -> Response:
+    """Send a cached, pre-serialized JSON body as-is."""
+    return Response(content=body, media_type="application/json")
+
 @router.get("/", response_model=List[Integration])
 async def get_all_integrations():
     """Get all available integrations with caching."""
     cache_key = generate_cache_key("integrations", "all")
     
-    # Try to get from cache first
-    cached_integrations = await cache_service.get(cache_key)
-    if cached_integrations:
-        return [Integration(**integration) for integration in cached_integrations]
-    
-    # Get from engine and cache
-    integrations = integrations_engine.get_all_integrations()
-    integration_dicts = [integration.dict() for integration in integrations]
-    
-    # Cache for 30 minutes
-    await cache_service.set(cache_key, integration_dicts, CACHE_CONFIGS['integration_data']['ttl'])
+    # Try to get the serialized catalog from cache first
+    body = await cache_service.get(cache_key)
+    if body is None:
+        # Cache for 30 minutes
+        body = await cache_service.set_json(
+            cache_key, integrations_engine.get_all_integrations(), CACHE_CONFIGS['integration_data']['ttl']
+        )
     
-    return integrations
+    return _json_response(body)
 
 @router.get("/categories")
 async def get_integration_categories():
@@ -37,15 +39,13 @@ async def get_integration_categories():
     cache_key = generate_cache_key("integrations", "categories")
     
     # Try cache first
-    cached_categories = await cache_service.get(cache_key)
-    if cached_categories:
-        return cached_categories
+    body = await cache_service.get(cache_key)
+    if body is None:
+        # Generate and cache
+        categories = [{"id": cat.value, "name": cat.value.replace("_", " ").title()} for cat in IntegrationCategory]
+        body = await cache_service.set_json(cache_key, categories, CACHE_CONFIGS['integration_data']['ttl'])
     
-    # Generate and cache
-    categories = [{"id": cat.value, "name": cat.value.replace("_", " ").title()} for cat in IntegrationCategory]
-    await cache_service.set(cache_key, categories, CACHE_CONFIGS['integration_data']['ttl'])
-    
-    return categories
+    return _json_response(body)
 
 @router.get("/category/{category}")
 async def get_integrations_by_category(category: str):
@@ -53,21 +53,21 @@ async def get_integrations_by_category(category: str):
     cache_key = generate_cache_key("integrations", "category", category)
     
     # Try cache first
-    cached_integrations = await cache_service.get(cache_key)
-    if cached_integrations:
-        return [Integration(**integration) for integration in cached_integrations]
+    body = await cache_service.get(cache_key)
+    if body is not None:
+        return _json_response(body)
     
     try:
         category_enum = IntegrationCategory(category)
-        integrations = integrations_engine.get_integrations_by_category(category_enum)
-        integration_dicts = [integration.dict() for integration in integrations]
-        
-        # Cache for 30 minutes
-        await cache_service.set(cache_key, integration_dicts, CACHE_CONFIGS['integration_data']['ttl'])
-        
-        return integrations
     except ValueError:
         raise HTTPException(status_code=400, detail="Invalid category")
+    
+    # Cache for 30 minutes
+    body = await cache_service.set_json(
+        cache_key, integrations_engine.get_integrations_by_category(category_enum),
+        CACHE_CONFIGS['integration_data']['ttl']
+    )
+    return _json_response(body)
 
 @router.get("/search")
 async def search_integrations(
@@ -126,6 +126,16 @@ async def search_integrations(
         "total_results": len(filtered)
     }
 
+@router.get("/rate-limits")
+async def get_rate_limit_stats(current_user: dict = Depends(get_current_active_user)):
+    """Get queue depth, in-flight calls and wait times of every rate-limited integration"""
+    return rate_limiter.get_stats()
+
+@router.get("/circuit-breakers")
+async def get_circuit_breaker_stats(current_user: dict = Depends(get_current_active_user)):
+    """Get the circuit breaker state of every integration called so far"""
+    return circuit_breakers.get_stats()
+
 @router.get("/{integration_id}")
 async def get_integration(integration_id: str):
     """Get a specific integration"""
@@ -236,7 +246,8 @@ async def test_integration_connection(integration_id: str, current_user: dict =
             integration_id,
             "test_connection",
             user_integration["config"],
-            {"test": True}
+            {"test": True},
+            user_integration.get("id")
         )
         
         return {
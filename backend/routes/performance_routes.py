@@ -13,15 +13,42 @@ logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/performance", tags=["performance"])
 
 @router.get("/cache/stats")
-async def get_cache_stats():
-    """Get cache performance statistics."""
-    stats = await cache_service.get_stats()
+async def get_cache_stats(scan_expired: bool = False):
+    """Get cache performance statistics (scan_expired also counts entries past their TTL)."""
+    stats = await cache_service.get_stats(scan_expired=scan_expired)
     return {
         "cache_stats": stats,
         "cache_configs": CACHE_CONFIGS,
         "status": "healthy"
     }
 
+@router.get("/cache/namespaces")
+async def get_cache_namespace_stats():
+    """Get per-namespace hits, misses, expirations, evictions and sizes with their TTLs."""
+    stats = await cache_service.get_stats()
+    namespaces = {}
+    for name, namespace_stats in stats["namespaces"].items():
+        config = CACHE_CONFIGS.get(name, {})
+        namespaces[name] = {**namespace_stats, "ttl": config.get("ttl", cache_service.default_ttl)}
+    return {"namespaces": namespaces, "hit_rate": stats["hit_rate"]}
+
+@router.get("/cache/latency")
+async def get_cache_latency():
+    """Get cache get/set latency histograms (sampled one call in sample_every)."""
+    return {
+        "latency": {operation: histogram.snapshot() for operation, histogram in cache_service.latency.items()},
+        "sample_every": cache_service.latency_sample_every
+    }
+
+@router.delete("/cache/stats")
+async def reset_cache_stats(current_user: dict = Depends(get_current_active_user)):
+    """Reset cache counters and latency histograms (admin only)."""
+    if current_user.get("role") != "admin":
+        raise HTTPException(status_code=403, detail="Admin access required")
+    
+    cache_service.reset_stats()
+    return {"message": "Cache statistics reset"}
+
 @router.delete("/cache/clear")
 async def clear_cache(current_user: dict = Depends(get_current_active_user)):
     """Clear all cache entries (admin only)."""
@@ -283,8 +310,7 @@ async def preload_cache(current_user: dict = Depends(get_current_active_user)):
         from integrations_engine import integrations_engine
         integrations = integrations_engine.get_all_integrations()
         cache_key = generate_cache_key("integrations", "all")
-        await cache_service.set(cache_key, [integration.dict() for integration in integrations], 
-                               CACHE_CONFIGS['integration_data']['ttl'])
+        await cache_service.set_json(cache_key, integrations, CACHE_CONFIGS['integration_data']['ttl'])
         preload_results.append({"type": "integrations", "count": len(integrations), "cached": True})
         
         # Preload node types
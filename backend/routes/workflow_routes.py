@@ -1,11 +1,17 @@
-from fastapi import APIRouter, HTTPException, Depends, status
+from fastapi import APIRouter, HTTPException, Depends, Query, status
+from fastapi.responses import StreamingResponse
 from typing import List, Optional
-from models import Workflow, WorkflowCreate, WorkflowUpdate, WorkflowExecution
+from models import Workflow, WorkflowCreate, WorkflowUpdate, WorkflowExecution, ExecutionStatus, BatchExecutionRequest
 from auth import get_current_active_user
 from database import get_database
 from workflow_engine import workflow_engine
+from execution_plan import execution_plan_cache
+from execution_queue import Lane, execution_queue, execution_worker_pool
+from timer_service import delay_scheduler
+from execution_events import EventType, execution_events
 from node_types_engine import node_types_engine
 from datetime import datetime
+import json
 import logging
 
 logger = logging.getLogger(__name__)
@@ -105,6 +111,9 @@ async def update_workflow(workflow_id: str, workflow_update: WorkflowUpdate, cur
         {"$set": update_data}
     )
     
+    # Compiled plans of the previous version are no longer reachable
+    execution_plan_cache.invalidate(workflow_id)
+    
     logger.info(f"Updated workflow {workflow_id} for user {current_user['user_id']}")
     return {"message": "Workflow updated successfully"}
 
@@ -133,6 +142,8 @@ async def autosave_workflow(workflow_id: str, workflow_data: dict, current_user:
         {"$set": update_data}
     )
     
+    execution_plan_cache.invalidate(workflow_id)
+    
     return {"message": "Workflow auto-saved successfully", "timestamp": update_data["updated_at"]}
 
 @router.delete("/{workflow_id}")
@@ -146,6 +157,7 @@ async def delete_workflow(workflow_id: str, current_user: dict = Depends(get_cur
     
     # Also delete associated executions
     await db.workflow_executions.delete_many({"workflow_id": workflow_id})
+    execution_plan_cache.invalidate(workflow_id)
     
     logger.info(f"Deleted workflow {workflow_id} for user {current_user['user_id']}")
     return {"message": "Workflow deleted successfully"}
@@ -155,6 +167,13 @@ async def execute_workflow(
     workflow_id: str, 
     trigger_data: dict = None,
     idempotency_key: str = None,
+    priority: str = Query(
+        Lane.STANDARD, pattern="^(interactive|standard|batch)$",
+        description=(
+            "Queue lane: interactive (e.g. editor test runs) is claimed before standard, standard before batch. "
+            "Interactive is granted to paid tiers for a few queued runs at a time, otherwise the run goes to standard"
+        )
+    ),
     current_user: dict = Depends(get_current_active_user)
 ):
     """Execute a workflow"""
@@ -174,11 +193,14 @@ async def execute_workflow(
         if existing_execution:
             return existing_execution
     
-    # Create workflow object
-    workflow = Workflow(**workflow_data)
-    
-    # Execute workflow
-    execution = await workflow_engine.execute_workflow(workflow, trigger_data or {})
+    # Record the execution up front and hand the run to the execution workers
+    execution = WorkflowExecution(
+        workflow_id=workflow_id,
+        user_id=current_user["user_id"],
+        status=ExecutionStatus.QUEUED,
+        execution_data=trigger_data or {},
+        trigger_data=trigger_data or {}
+    )
     
     # Add idempotency key if provided
     execution_dict = execution.dict()
@@ -188,23 +210,51 @@ async def execute_workflow(
     # Save execution to database
     await db.workflow_executions.insert_one(execution_dict)
     
-    # Update workflow stats
-    await db.workflows.update_one(
-        {"id": workflow_id},
-        {
-            "$set": {"last_run": datetime.utcnow()},
-            "$inc": {
-                "run_count": 1,
-                "success_count": 1 if execution.status == "success" else 0
-            }
-        }
+    lane = await execution_queue.admit_lane(current_user["user_id"], priority)
+    await execution_queue.enqueue(execution.id, workflow_id, current_user["user_id"], trigger_data or {}, lane=lane)
+    
+    logger.info(f"Queued workflow {workflow_id} with execution ID {execution.id}")
+    return {
+        "execution_id": execution.id,
+        "status": execution.status.value,
+        "priority": lane,
+        "message": "Workflow execution queued"
+    }
+
+@router.post("/{workflow_id}/execute/batch")
+async def execute_workflow_batch(
+    workflow_id: str,
+    request: BatchExecutionRequest,
+    current_user: dict = Depends(get_current_active_user)
+):
+    """Execute a workflow once per item, aggregated into a single execution"""
+    db = get_database()
+    
+    workflow_data = await db.workflows.find_one({"id": workflow_id, "user_id": current_user["user_id"]})
+    if not workflow_data:
+        raise HTTPException(status_code=404, detail="Workflow not found")
+    if not request.items:
+        raise HTTPException(status_code=400, detail="No items to process")
+    
+    execution = WorkflowExecution(
+        workflow_id=workflow_id,
+        user_id=current_user["user_id"],
+        status=ExecutionStatus.QUEUED,
+        execution_data={"batch": {"total": len(request.items), "succeeded": 0, "failed": 0}}
     )
+    await db.workflow_executions.insert_one(execution.dict())
     
-    logger.info(f"Executed workflow {workflow_id} with execution ID {execution.id}")
+    await execution_queue.enqueue(
+        execution.id, workflow_id, current_user["user_id"],
+        kind="batch", payload={"items": request.items, "item_concurrency": request.item_concurrency}
+    )
+    
+    logger.info(f"Queued batch of {len(request.items)} items for workflow {workflow_id} with execution ID {execution.id}")
     return {
         "execution_id": execution.id,
         "status": execution.status.value,
-        "message": "Workflow execution started successfully" if execution.status.value == "running" else f"Workflow execution {execution.status.value}"
+        "items": len(request.items),
+        "message": "Workflow batch execution queued"
     }
 
 @router.get("/{workflow_id}/executions")
@@ -257,13 +307,81 @@ async def duplicate_workflow(workflow_id: str, current_user: dict = Depends(get_
 
 @router.post("/{execution_id}/cancel")
 async def cancel_workflow_execution(execution_id: str, current_user: dict = Depends(get_current_active_user)):
-    """Cancel a running workflow execution"""
-    success = workflow_engine.cancel_workflow(execution_id)
-    if not success:
-        raise HTTPException(status_code=404, detail="Running execution not found")
+    """Cancel a queued, waiting or running workflow execution"""
+    db = get_database()
     
-    logger.info(f"Cancelled workflow execution {execution_id}")
-    return {"message": "Workflow execution cancelled"}
+    execution = await db.workflow_executions.find_one({"id": execution_id, "user_id": current_user["user_id"]})
+    if not execution:
+        raise HTTPException(status_code=404, detail="Execution not found")
+    terminal = [ExecutionStatus.SUCCESS.value, ExecutionStatus.FAILED.value, ExecutionStatus.CANCELLED.value]
+    if execution.get("status") in terminal:
+        raise HTTPException(status_code=409, detail=f"Execution is already {execution.get('status')}")
+    
+    if workflow_engine.cancel_workflow(execution_id):
+        # Running here: the worker saves it as CANCELLED once the task has stopped
+        cancel_status = "cancelling"
+    else:
+        # Not started yet (or suspended on a delay): cancel in place, workers skip it
+        result = await db.workflow_executions.update_one(
+            {"id": execution_id, "status": {"$in": [ExecutionStatus.QUEUED.value, ExecutionStatus.WAITING.value]}},
+            {"$set": {
+                "status": ExecutionStatus.CANCELLED.value,
+                "error_message": "Execution cancelled",
+                "completed_at": datetime.utcnow()
+            }}
+        )
+        if result.modified_count:
+            cancel_status = ExecutionStatus.CANCELLED.value
+        else:
+            # Running on another worker, which polls for the request
+            await db.workflow_executions.update_one(
+                {"id": execution_id, "status": {"$nin": terminal}},
+                {"$set": {"cancel_requested": True}}
+            )
+            cancel_status = "cancelling"
+    await delay_scheduler.cancel_execution(execution_id)
+    
+    logger.info(f"Cancelled workflow execution {execution_id} ({cancel_status})")
+    return {"execution_id": execution_id, "status": cancel_status, "message": "Workflow execution cancelled"}
+
+@router.post("/executions/{execution_id}/resume")
+async def resume_workflow_execution(execution_id: str, current_user: dict = Depends(get_current_active_user)):
+    """Resume a failed or cancelled execution from its last completed nodes"""
+    db = get_database()
+    
+    resumable = [ExecutionStatus.FAILED.value, ExecutionStatus.CANCELLED.value]
+    # Item batches keep no checkpoint of their own and their items only live in the queue job
+    execution = await db.workflow_executions.find_one_and_update(
+        {
+            "id": execution_id, "user_id": current_user["user_id"], "status": {"$in": resumable},
+            "execution_data.batch": {"$exists": False}
+        },
+        {"$set": {"status": ExecutionStatus.QUEUED.value, "error_message": None}, "$unset": {"cancel_requested": ""}}
+    )
+    if not execution:
+        existing = await db.workflow_executions.find_one({"id": execution_id, "user_id": current_user["user_id"]})
+        if not existing:
+            raise HTTPException(status_code=404, detail="Execution not found")
+        if "batch" in (existing.get("execution_data") or {}):
+            raise HTTPException(status_code=409, detail="Batch executions cannot be resumed; start a new batch instead")
+        raise HTTPException(
+            status_code=409,
+            detail=f"Execution is {existing.get('status')}; only failed or cancelled executions can be resumed"
+        )
+    
+    await execution_queue.enqueue(
+        execution_id, execution["workflow_id"], current_user["user_id"],
+        kind="resume", payload={"reason": "manual"}
+    )
+    
+    completed_nodes = (execution.get("checkpoint") or {}).get("completed", [])
+    logger.info(f"Resuming execution {execution_id} after {len(completed_nodes)} completed nodes")
+    return {
+        "execution_id": execution_id,
+        "status": ExecutionStatus.QUEUED.value,
+        "completed_nodes": completed_nodes,
+        "message": "Workflow execution queued for resume"
+    }
 
 @router.get("/executions/running")
 async def get_running_executions(current_user: dict = Depends(get_current_active_user)):
@@ -271,6 +389,15 @@ async def get_running_executions(current_user: dict = Depends(get_current_active
     running_ids = workflow_engine.get_running_workflows()
     return {"running_executions": running_ids, "count": len(running_ids)}
 
+@router.get("/executions/queue")
+async def get_execution_queue_stats(current_user: dict = Depends(get_current_active_user)):
+    """Get execution queue depth and local worker statistics"""
+    return {
+        "queue": await execution_queue.get_stats(),
+        "workers": execution_worker_pool.get_stats(),
+        "delays": await delay_scheduler.get_stats()
+    }
+
 @router.get("/executions/{execution_id}/status")
 async def get_execution_status(execution_id: str, current_user: dict = Depends(get_current_active_user)):
     """Get the status of a specific workflow execution"""
@@ -314,6 +441,98 @@ async def get_execution_status(execution_id: str, current_user: dict = Depends(g
         logger.error(f"Error getting execution status: {e}")
         raise HTTPException(status_code=500, detail="Failed to get execution status")
 
+TERMINAL_STATUSES = {ExecutionStatus.SUCCESS.value, ExecutionStatus.FAILED.value, ExecutionStatus.CANCELLED.value}
+# Without events relayed from other processes, how often the stream re-reads executions run elsewhere (seconds)
+EVENT_STREAM_POLL_INTERVAL = 2.0
+# Longest silence before a keepalive is written (seconds)
+EVENT_STREAM_KEEPALIVE = 15.0
+
+@router.get("/executions/{execution_id}/events")
+async def stream_execution_events(
+    execution_id: str,
+    format: str = Query("sse", pattern="^(sse|ndjson)$", description="Stream format: sse, ndjson"),
+    current_user: dict = Depends(get_current_active_user)
+):
+    """Stream progress events of an execution as Server-Sent Events or NDJSON
+    
+    The stream starts with a snapshot of the stored execution, then pushes node_started,
+    node_finished and execution_finished events from the engine, and ends once the
+    execution reached a final status.
+    """
+    db = get_database()
+    
+    # Subscribe before reading the snapshot so no event falls between the two
+    subscription = execution_events.subscribe(execution_id)
+    projection = {"_id": 0, "id": 1, "workflow_id": 1, "status": 1, "error_message": 1, "duration": 1, "checkpoint.completed": 1}
+    execution = await db.workflow_executions.find_one({"id": execution_id, "user_id": current_user["user_id"]}, projection)
+    if not execution:
+        subscription.close()
+        raise HTTPException(status_code=404, detail="Execution not found")
+    
+    def encode(event: dict) -> str:
+        data = json.dumps(event, default=str)
+        if format == "ndjson":
+            return data + "\n"
+        return f"event: {event['type']}\ndata: {data}\n\n"
+    
+    def finished_event(stored: dict) -> dict:
+        return {
+            "type": EventType.EXECUTION_FINISHED,
+            "execution_id": execution_id,
+            "workflow_id": stored["workflow_id"],
+            "status": stored.get("status"),
+            "error": stored.get("error_message"),
+            "duration": stored.get("duration")
+        }
+    
+    async def events():
+        with subscription:
+            yield encode({
+                "type": "snapshot",
+                "execution_id": execution_id,
+                "workflow_id": execution["workflow_id"],
+                "status": execution.get("status"),
+                "completed_nodes": (execution.get("checkpoint") or {}).get("completed", [])
+            })
+            if execution.get("status") in TERMINAL_STATUSES:
+                yield encode(finished_event(execution))
+                return
+            
+            last_status = execution.get("status")
+            silent = 0.0
+            while True:
+                local = execution_id in workflow_engine.running_workflows
+                # Relayed events make the stored status a safety net, re-read once per keepalive
+                wait = EVENT_STREAM_KEEPALIVE if local or execution_events.is_relayed else EVENT_STREAM_POLL_INTERVAL
+                event = await subscription.get(wait)
+                if event is not None:
+                    silent = 0.0
+                    yield encode(event)
+                    if event["type"] == EventType.EXECUTION_FINISHED and event.get("status") in TERMINAL_STATUSES:
+                        return
+                    continue
+                
+                if not local:
+                    # Queued, waiting or running in another process: fall back to the stored status
+                    stored = await db.workflow_executions.find_one({"id": execution_id}, projection)
+                    if not stored or stored.get("status") in TERMINAL_STATUSES:
+                        if stored:
+                            yield encode(finished_event(stored))
+                        return
+                    if stored.get("status") != last_status:
+                        last_status = stored.get("status")
+                        silent = 0.0
+                        yield encode({"type": "status", "execution_id": execution_id, "status": last_status})
+                        continue
+                
+                silent += wait
+                if silent >= EVENT_STREAM_KEEPALIVE:
+                    silent = 0.0
+                    yield encode({"type": "keepalive"}) if format == "ndjson" else ": keepalive\n\n"
+    
+    media_type = "application/x-ndjson" if format == "ndjson" else "text/event-stream"
+    return StreamingResponse(events(), media_type=media_type, headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
 @router.get("/user/executions/status")
 async def get_user_executions_status(current_user: dict = Depends(get_current_active_user)):
     """Get status of all user's workflow executions"""
@@ -337,6 +337,16 @@ async def startup_db_client():
     await connect_to_mongo()
     logging.info("✅ Connected to MongoDB")
     
+    # Receive progress events of executions run by worker processes (with REDIS_URL)
+    from execution_events import execution_events
+    execution_events.start_relay()
+    
+    # Start the workers that run queued workflow executions
+    from execution_queue import execution_worker_pool
+    if execution_worker_pool.concurrency > 0:
+        execution_worker_pool.start()
+        logging.info(f"✅ Execution workers started ({execution_worker_pool.concurrency})")
+    
     # Initialize subscription system
     try:
         from database import get_database
@@ -365,6 +375,10 @@ async def startup_db_client():
 @app.on_event("shutdown")
 async def shutdown_db_client():
     """Close database connection"""
+    from execution_queue import execution_worker_pool
+    from execution_events import execution_events
+    await execution_worker_pool.stop()
+    await execution_events.stop_relay()
     await close_mongo_connection()
     logging.info("Disconnected from MongoDB")
 
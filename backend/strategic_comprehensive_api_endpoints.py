@@ -315,9 +315,12 @@ def create_strategic_router(db, groq_client=None, redis_client=None):
                 raise HTTPException(status_code=503, detail="Enterprise Scalability not available")
             
             execution_engine = strategic_systems["enterprise_scalability"]["execution_engine"]
-            result = await execution_engine.submit_batch_execution(
-                request.workflow_ids, user_id, request.options or {}
-            )
+            options = {**(request.options or {}), "strategy": request.execution_strategy}
+            try:
+                execution_engine.validate_batch_options(options)
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+            result = await execution_engine.submit_batch_execution(request.workflow_ids, user_id, options)
             
             return {
                 "status": "success",
@@ -328,10 +331,33 @@ def create_strategic_router(db, groq_client=None, redis_client=None):
                 "timestamp": datetime.utcnow()
             }
             
+        except HTTPException:
+            raise
         except Exception as e:
             logger.error(f"Batch execution error: {e}")
             raise HTTPException(status_code=500, detail=str(e))
     
+    @router.get("/execution/batch/{batch_id}")
+    async def get_batch_status(batch_id: str):
+        """Get batch progress and per-workflow failures"""
+        try:
+            if not strategic_systems["enterprise_scalability"]:
+                raise HTTPException(status_code=503, detail="Enterprise Scalability not available")
+            
+            execution_engine = strategic_systems["enterprise_scalability"]["execution_engine"]
+            result = await execution_engine.get_batch_status(batch_id)
+            
+            return {
+                "status": "success",
+                "batch_id": batch_id,
+                "result": result,
+                "timestamp": datetime.utcnow()
+            }
+            
+        except Exception as e:
+            logger.error(f"Batch status error: {e}")
+            raise HTTPException(status_code=500, detail=str(e))
+    
     @router.get("/execution/status/{task_id}")
     async def get_execution_status(task_id: str):
         """Get execution status with queue position"""
@@ -4,23 +4,31 @@ Strategic backend enhancement for enterprise-grade performance
 Zero UI disruption - extends existing dashboard metrics
 """
 import asyncio
+import heapq
+import itertools
 import json
 import logging
+import math
+import os
 from datetime import datetime, timedelta
 from typing import Dict, List, Any, Optional, Union
 import uuid
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass, asdict, field
 from enum import Enum
 import time
-import threading
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from queue import Queue, PriorityQueue
 import psutil
 import numpy as np
-from collections import defaultdict, deque
+from collections import OrderedDict, defaultdict, deque
+
+from models import Workflow, ExecutionStatus
+from rate_limiter import rate_limiter
+from workflow_engine import workflow_engine
 
 logger = logging.getLogger(__name__)
 
+# Seconds between progress writes of a running batch
+BATCH_PROGRESS_INTERVAL = 1.0
+
 class ExecutionPriority(Enum):
     LOW = 1
     NORMAL = 2
@@ -56,6 +64,8 @@ class ExecutionTask:
     result: Optional[Dict[str, Any]] = None
     retry_count: int = 0
     max_retries: int = 3
+    trigger_data: Dict[str, Any] = field(default_factory=dict)
+    batch_id: Optional[str] = None
 
 @dataclass
 class BatchExecutionJob:
@@ -68,6 +78,7 @@ class BatchExecutionJob:
     estimated_completion: datetime
     progress: Dict[str, Any]
     status: str = "queued"
+    options: Dict[str, Any] = field(default_factory=dict)
 
 @dataclass
 class ResourceAllocation:
@@ -93,7 +104,16 @@ class PredictiveInsight:
     created_at: datetime
 
 class DistributedExecutionEngine:
-    def __init__(self, db, redis_client=None, max_workers=20):
+    """Event-driven scheduler that runs submitted workflows on the shared workflow engine.
+
+    Tasks wait in a priority heap. The scheduler wakes whenever a task is submitted
+    or finishes, or capacity changes, and starts every task that fits without polling.
+    Resources are accounted logically: each running task holds its cpu and memory
+    requirement against the engine's capacity until it finishes.
+    """
+
+    def __init__(self, db, redis_client=None, max_workers=20, cpu_capacity: Optional[float] = None,
+                 memory_capacity_mb: Optional[float] = None):
         self.db = db
         self.redis_client = redis_client
         self.max_workers = max_workers
@@ -104,27 +124,42 @@ class DistributedExecutionEngine:
         self.analytics_collection = db.execution_analytics
         self.resource_allocation_collection = db.resource_allocations
         
-        # Execution queues
-        self.priority_queue = PriorityQueue()
-        self.batch_queue = Queue()
-        self.active_tasks = {}
+        # Execution queues: heap of (-priority, sequence, task_id); tasks waiting on dependencies are held aside
+        self._pending: List[tuple] = []
+        self._sequence = itertools.count()
+        self._blocked: Dict[str, ExecutionTask] = {}
+        self.batch_queue: asyncio.Queue = asyncio.Queue()
+        self._batches: Dict[str, BatchExecutionJob] = {}
+        self._batch_saved_at: Dict[str, float] = {}
+        self.active_tasks: Dict[str, ExecutionTask] = {}
+        self._finished: "OrderedDict[str, str]" = OrderedDict()
+        self._completions: Dict[str, asyncio.Future] = {}
+        self._wakeup = asyncio.Event()
+        self._background: List[asyncio.Task] = []
         
-        # Resource management
-        self.resource_pool = {}
+        # Resource management (cpu in percent of one core, memory in MB)
+        self.resource_pool = {
+            "cpu": cpu_capacity or 100.0 * (os.cpu_count() or 1),
+            "memory": memory_capacity_mb or psutil.virtual_memory().total / (1024 ** 2) * 0.85
+        }
+        self.allocated = {"cpu": 0.0, "memory": 0.0}
+        # resource_id -> (allocation, requirements held by the running task)
+        self.allocations: Dict[str, tuple] = {}
         self.resource_monitor = ResourceMonitor()
         
         # Scaling logic
         self.auto_scaler = AutoScaler(self)
         
-        # Workers
-        self.executor = ThreadPoolExecutor(max_workers=max_workers)
         self.is_running = False
         
         # Performance metrics
+        self._completed_at: deque = deque()
+        self._dispatched = 0
         self.metrics = {
             "tasks_completed": 0,
             "tasks_failed": 0,
             "average_execution_time": 0,
+            "average_queue_time": 0,
             "resource_utilization": {},
             "throughput_per_minute": 0
         }
@@ -133,20 +168,46 @@ class DistributedExecutionEngine:
 
     async def start_engine(self):
         """Start the distributed execution engine"""
+        if self.is_running:
+            return
         self.is_running = True
         
         # Start background workers
-        asyncio.create_task(self._task_scheduler())
-        asyncio.create_task(self._batch_processor())
-        asyncio.create_task(self._resource_monitor_worker())
-        asyncio.create_task(self._auto_scaling_worker())
+        self._background = [
+            asyncio.create_task(self._task_scheduler()),
+            asyncio.create_task(self._batch_processor()),
+            asyncio.create_task(self._resource_monitor_worker()),
+            asyncio.create_task(self._auto_scaling_worker())
+        ]
         
         logger.info("🚀 Distributed Execution Engine started")
 
+    async def stop_engine(self):
+        """Stop the background workers; tasks already running are left to finish"""
+        self.is_running = False
+        self._wakeup.set()
+        for worker in self._background:
+            worker.cancel()
+        await asyncio.gather(*self._background, return_exceptions=True)
+        self._background = []
+
+    @property
+    def queue_size(self) -> int:
+        return len(self._pending) + len(self._blocked)
+
+    @property
+    def running_count(self) -> int:
+        return len(self.allocations)
+
+    def set_max_workers(self, max_workers: int):
+        """Change how many tasks may run at once; takes effect immediately"""
+        self.max_workers = max_workers
+        self._wakeup.set()
+
     async def submit_distributed_execution(self, workflow_id: str, user_id: str, priority: str = "normal", options: Dict = None) -> Dict[str, Any]:
         """Submit workflow for distributed execution"""
         try:
-            # Create execution task
+            options = options or {}
             task = ExecutionTask(
                 task_id=str(uuid.uuid4()),
                 workflow_id=workflow_id,
@@ -155,30 +216,31 @@ class DistributedExecutionEngine:
                 estimated_duration=options.get("estimated_duration", 300),
                 resource_requirements=options.get("resources", {"cpu": 50, "memory": 512}),
                 dependencies=options.get("dependencies", []),
-                created_at=datetime.utcnow()
+                created_at=datetime.utcnow(),
+                trigger_data=options.get("trigger_data") or {}
             )
-            
-            # Add to priority queue
-            self.priority_queue.put((task.priority.value * -1, task))  # Negative for max priority
-            self.active_tasks[task.task_id] = task
+            if not self._within_capacity(task.resource_requirements):
+                return {"status": "error", "message": f"Resource requirements exceed engine capacity {self.resource_pool}"}
             
             # Store in database
-            self.executions_collection.insert_one({
+            await self.executions_collection.insert_one({
                 "task_id": task.task_id,
                 "workflow_id": workflow_id,
                 "user_id": user_id,
                 "type": "distributed",
                 "status": "queued",
                 "priority": priority,
-                "created_at": datetime.utcnow(),
+                "created_at": task.created_at,
                 "resource_requirements": task.resource_requirements
             })
             
+            self._submit(task)
+            
             return {
                 "status": "success",
                 "task_id": task.task_id,
                 "estimated_start_time": datetime.utcnow() + timedelta(seconds=self._estimate_queue_time()),
-                "position_in_queue": self.priority_queue.qsize(),
+                "position_in_queue": self._get_queue_position(task.task_id),
                 "priority": priority
             }
             
@@ -186,9 +248,28 @@ class DistributedExecutionEngine:
             logger.error(f"Distributed execution submission error: {e}")
             return {"status": "error", "message": str(e)}
 
+    def validate_batch_options(self, options: Dict[str, Any]):
+        """Reject batch options every workflow of the batch would fail on; raises ValueError"""
+        priority = options.get("priority", "normal")
+        if not isinstance(priority, str) or priority.upper() not in ExecutionPriority.__members__:
+            raise ValueError(f"Invalid priority {priority!r}, expected one of "
+                             f"{', '.join(name.lower() for name in ExecutionPriority.__members__)}")
+        resources = options.get("resources")
+        if resources is None:
+            return
+        if not isinstance(resources, dict) or not all(
+            key in ("cpu", "memory") and isinstance(amount, (int, float)) and not isinstance(amount, bool) and amount >= 0
+            for key, amount in resources.items()
+        ):
+            raise ValueError("resources must map 'cpu' and 'memory' to non-negative numbers")
+        if not self._within_capacity(resources):
+            raise ValueError(f"Resource requirements exceed engine capacity {self.resource_pool}")
+
     async def submit_batch_execution(self, workflow_ids: List[str], user_id: str, options: Dict = None) -> Dict[str, Any]:
         """Submit multiple workflows for batch execution"""
         try:
+            options = options or {}
+            self.validate_batch_options(options)
             batch_id = str(uuid.uuid4())
             
             batch_job = BatchExecutionJob(
@@ -198,15 +279,16 @@ class DistributedExecutionEngine:
                 batch_size=len(workflow_ids),
                 execution_strategy=options.get("strategy", "parallel"),
                 created_at=datetime.utcnow(),
-                estimated_completion=datetime.utcnow() + timedelta(minutes=len(workflow_ids) * 2),
-                progress={"completed": 0, "failed": 0, "running": 0}
+                estimated_completion=datetime.utcnow() + timedelta(seconds=self._estimate_batch_time(len(workflow_ids), options)),
+                progress={"completed": 0, "failed": 0, "running": 0, "failures": []},
+                options=options
             )
             
-            # Add to batch queue
-            self.batch_queue.put(batch_job)
-            
             # Store in database
-            self.db.batch_executions.insert_one(asdict(batch_job))
+            await self.db.batch_executions.insert_one(asdict(batch_job))
+            
+            # Add to batch queue
+            self.batch_queue.put_nowait(batch_job)
             
             return {
                 "status": "success",
@@ -233,7 +315,7 @@ class DistributedExecutionEngine:
                 }
             else:
                 # Check database for completed tasks
-                execution = self.executions_collection.find_one({"task_id": task_id})
+                execution = await self.executions_collection.find_one({"task_id": task_id}, {"_id": 0})
                 if execution:
                     return {"status": "found", "execution": execution}
                 else:
@@ -243,67 +325,102 @@ class DistributedExecutionEngine:
             logger.error(f"Execution status error: {e}")
             return {"status": "error", "message": str(e)}
 
+    async def wait_for_task(self, task_id: str) -> Dict[str, Any]:
+        """Wait until a submitted task finishes and return its result"""
+        if task_id not in self._completions:
+            task = self.active_tasks.get(task_id)
+            return task.result if task else {"error": "Task not found"}
+        return await asyncio.shield(self._completions[task_id])
+
+    def _submit(self, task: ExecutionTask):
+        self.active_tasks[task.task_id] = task
+        self._completions[task.task_id] = asyncio.get_running_loop().create_future()
+        if self._unfinished_dependencies(task):
+            self._blocked[task.task_id] = task
+        else:
+            self._enqueue(task)
+
+    def _enqueue(self, task: ExecutionTask):
+        task.status = "queued"
+        task.scheduled_at = datetime.utcnow()
+        heapq.heappush(self._pending, (-task.priority.value, next(self._sequence), task.task_id))
+        self._wakeup.set()
+
+    def _unfinished_dependencies(self, task: ExecutionTask) -> List[str]:
+        # Dependencies this engine has never seen are taken as already satisfied
+        return [dependency for dependency in task.dependencies if dependency in self.active_tasks]
+
     # Background workers
     async def _task_scheduler(self):
-        """Background task scheduler"""
+        """Start queued tasks whenever a submission, completion or capacity change makes room"""
         while self.is_running:
+            self._wakeup.clear()
             try:
-                if not self.priority_queue.empty():
-                    priority, task = self.priority_queue.get_nowait()
-                    
-                    # Check resource availability
-                    if self._check_resource_availability(task.resource_requirements):
-                        # Allocate resources
-                        allocation = self._allocate_resources(task)
-                        
-                        # Execute task
-                        future = self.executor.submit(self._execute_task, task, allocation)
-                        task.started_at = datetime.utcnow()
-                        task.status = "running"
-                        
-                        # Update metrics
-                        self.metrics["throughput_per_minute"] += 1
-                        
-                await asyncio.sleep(1)  # Check every second
-                
+                self._dispatch_ready()
             except Exception as e:
                 logger.error(f"Task scheduler error: {e}")
-                await asyncio.sleep(5)
+            await self._wakeup.wait()
+
+    def _dispatch_ready(self):
+        while self._pending and self.running_count < self.max_workers:
+            task = self.active_tasks[self._pending[0][2]]
+            # Strict priority: the head of the queue waits for room rather than being overtaken
+            if not self._check_resource_availability(task.resource_requirements):
+                return
+            heapq.heappop(self._pending)
+            allocation = self._allocate_resources(task)
+            task.started_at = datetime.utcnow()
+            task.status = "running"
+            self._dispatched += 1
+            self._update_average("average_queue_time", (task.started_at - task.scheduled_at).total_seconds(),
+                                 self._dispatched)
+            asyncio.create_task(self._execute_task(task, allocation))
 
     async def _batch_processor(self):
-        """Background batch processor"""
+        """Start each submitted batch; batches run concurrently, bounded by the scheduler's capacity"""
         while self.is_running:
-            try:
-                if not self.batch_queue.empty():
-                    batch_job = self.batch_queue.get_nowait()
-                    
-                    # Process batch based on strategy
-                    if batch_job.execution_strategy == "parallel":
-                        await self._execute_batch_parallel(batch_job)
-                    elif batch_job.execution_strategy == "sequential":
-                        await self._execute_batch_sequential(batch_job)
-                    else:
-                        await self._execute_batch_optimized(batch_job)
-                
-                await asyncio.sleep(2)
-                
-            except Exception as e:
-                logger.error(f"Batch processor error: {e}")
-                await asyncio.sleep(5)
+            batch_job = await self.batch_queue.get()
+            asyncio.create_task(self._process_batch(batch_job))
+
+    async def _process_batch(self, batch_job: BatchExecutionJob):
+        self._batches[batch_job.batch_id] = batch_job
+        batch_job.status = "running"
+        try:
+            # Process batch based on strategy
+            if batch_job.execution_strategy == "parallel":
+                await self._execute_batch_parallel(batch_job)
+            elif batch_job.execution_strategy == "sequential":
+                await self._execute_batch_sequential(batch_job)
+            else:
+                await self._execute_batch_optimized(batch_job)
+        except Exception as e:
+            logger.error(f"Batch processor error: {e}")
+            batch_job.status = "failed"
+            batch_job.progress["error"] = str(e)
+        finally:
+            await self._save_batch_progress(batch_job, force=True)
+            self._batches.pop(batch_job.batch_id, None)
+            self._batch_saved_at.pop(batch_job.batch_id, None)
+            logger.info(f"Batch {batch_job.batch_id} {batch_job.status}: "
+                        f"{batch_job.progress['completed']} succeeded, {batch_job.progress['failed']} failed")
 
     async def _resource_monitor_worker(self):
         """Monitor system resources"""
         while self.is_running:
             try:
-                # Update resource metrics
-                cpu_percent = psutil.cpu_percent(interval=1)
+                # Update resource metrics (cpu_percent blocks for its sampling interval)
+                cpu_percent = await asyncio.to_thread(psutil.cpu_percent, 1)
                 memory = psutil.virtual_memory()
                 
                 self.metrics["resource_utilization"] = {
                     "cpu": cpu_percent,
                     "memory": memory.percent,
-                    "available_memory_gb": memory.available / (1024**3)
+                    "available_memory_gb": memory.available / (1024**3),
+                    "allocated_cpu": self.allocated["cpu"],
+                    "allocated_memory_mb": self.allocated["memory"]
                 }
+                # A fresh sample may clear the overload guard
+                self._wakeup.set()
                 
                 # Trigger auto-scaling if needed
                 await self.auto_scaler.check_scaling_triggers(self.metrics)
@@ -326,74 +443,114 @@ class DistributedExecutionEngine:
                 await asyncio.sleep(120)
 
     # Helper methods
-    def _execute_task(self, task: ExecutionTask, allocation: ResourceAllocation) -> Dict[str, Any]:
-        """Execute individual task"""
+    async def _execute_task(self, task: ExecutionTask, allocation: ResourceAllocation) -> Dict[str, Any]:
+        """Run the task's workflow on the workflow engine and record the outcome"""
+        start_time = time.perf_counter()
         try:
-            # Simulate workflow execution
-            start_time = time.time()
+            await self.resource_allocation_collection.insert_one(
+                {**asdict(allocation), "resource_type": allocation.resource_type.value, "user_id": task.user_id}
+            )
             
-            # Actual workflow execution would happen here
-            # For now, simulate with sleep based on estimated duration
-            time.sleep(min(task.estimated_duration / 1000, 5))  # Max 5 seconds for demo
+            workflow_data = await self.workflows_collection.find_one({"id": task.workflow_id, "user_id": task.user_id})
+            if not workflow_data:
+                raise LookupError(f"Workflow {task.workflow_id} not found")
+            workflow_data.pop('_id', None)
             
-            execution_time = time.time() - start_time
+            execution = await workflow_engine.execute_workflow(Workflow(**workflow_data), task.trigger_data)
+            await self.db.workflow_executions.insert_one(execution.dict())
             
-            # Update task
-            task.completed_at = datetime.utcnow()
-            task.status = "completed"
+            execution_time = time.perf_counter() - start_time
+            success = execution.status == ExecutionStatus.SUCCESS
             task.result = {
+                "execution_id": execution.id,
+                "execution_status": execution.status.value,
+                "error_message": execution.error_message,
                 "execution_time": execution_time,
                 "resources_used": allocation.allocated_amount,
-                "success": True
+                "success": success
             }
-            
-            # Release resources
-            self._release_resources(allocation)
-            
-            # Update metrics
-            self.metrics["tasks_completed"] += 1
-            self._update_average_execution_time(execution_time)
-            
-            # Update database
-            self.executions_collection.update_one(
-                {"task_id": task.task_id},
-                {"$set": {"status": "completed", "completed_at": datetime.utcnow(), "result": task.result}}
-            )
-            
-            # Remove from active tasks
-            if task.task_id in self.active_tasks:
-                del self.active_tasks[task.task_id]
-            
-            return task.result
+            self._finish_task(task, allocation, "completed" if success else "failed", execution_time)
             
         except Exception as e:
             logger.error(f"Task execution error: {e}")
-            task.status = "failed"
-            task.result = {"error": str(e)}
-            self.metrics["tasks_failed"] += 1
+            self._release_resources(allocation)
             
-            # Retry logic
-            if task.retry_count < task.max_retries:
+            # Retry logic (a missing workflow will not appear on retry)
+            if task.retry_count < task.max_retries and not isinstance(e, LookupError):
                 task.retry_count += 1
-                self.priority_queue.put((task.priority.value * -1, task))
+                self._enqueue(task)
+                return {"error": str(e)}
             
-            return {"error": str(e)}
+            task.result = {"error": str(e), "success": False}
+            self._finish_task(task, allocation, "failed", time.perf_counter() - start_time)
+        
+        await self._record_completion(task)
+        return task.result
 
-    def _check_resource_availability(self, requirements: Dict[str, Any]) -> bool:
-        """Check if resources are available"""
+    def _finish_task(self, task: ExecutionTask, allocation: ResourceAllocation, status: str, execution_time: float):
+        task.completed_at = datetime.utcnow()
+        task.status = status
+        self._release_resources(allocation)
+        
+        # Update metrics
+        if status == "completed":
+            self.metrics["tasks_completed"] += 1
+        else:
+            self.metrics["tasks_failed"] += 1
+        self._update_average("average_execution_time", execution_time,
+                             self.metrics["tasks_completed"] + self.metrics["tasks_failed"])
+        now = time.monotonic()
+        self._completed_at.append(now)
+        while self._completed_at and self._completed_at[0] < now - 60:
+            self._completed_at.popleft()
+        self.metrics["throughput_per_minute"] = len(self._completed_at)
+        
+        # Remove from active tasks and release dependents
+        self.active_tasks.pop(task.task_id, None)
+        self._finished[task.task_id] = status
+        if len(self._finished) > 10000:
+            self._finished.popitem(last=False)
+        completion = self._completions.pop(task.task_id, None)
+        if completion and not completion.done():
+            completion.set_result(task.result)
+        self._release_dependents()
+
+    def _release_dependents(self):
+        for task_id, task in list(self._blocked.items()):
+            if self._unfinished_dependencies(task):
+                continue
+            del self._blocked[task_id]
+            failed = [dependency for dependency in task.dependencies if self._finished.get(dependency) == "failed"]
+            if failed:
+                task.result = {"error": f"Dependencies failed: {', '.join(failed)}", "success": False}
+                self._finish_task(task, None, "failed", 0.0)
+                asyncio.create_task(self._record_completion(task))
+            else:
+                self._enqueue(task)
+
+    async def _record_completion(self, task: ExecutionTask):
         try:
-            current_cpu = psutil.cpu_percent()
-            current_memory = psutil.virtual_memory().percent
-            
-            required_cpu = requirements.get("cpu", 50)
-            required_memory = requirements.get("memory", 512)
-            
-            # Simple availability check
-            return (current_cpu + required_cpu) < 90 and (current_memory + (required_memory / 1024)) < 85
-            
+            await self.executions_collection.update_one(
+                {"task_id": task.task_id},
+                {"$set": {"status": task.status, "completed_at": task.completed_at, "result": task.result,
+                          "started_at": task.started_at, "retry_count": task.retry_count}}
+            )
         except Exception as e:
-            logger.error(f"Resource availability check error: {e}")
+            logger.error(f"Task status update error: {e}")
+
+    def _within_capacity(self, requirements: Dict[str, Any]) -> bool:
+        return (requirements.get("cpu", 50) <= self.resource_pool["cpu"]
+                and requirements.get("memory", 512) <= self.resource_pool["memory"])
+
+    def _check_resource_availability(self, requirements: Dict[str, Any]) -> bool:
+        """Check if the task's requirements fit in the unallocated capacity"""
+        if (self.allocated["cpu"] + requirements.get("cpu", 50) > self.resource_pool["cpu"]
+                or self.allocated["memory"] + requirements.get("memory", 512) > self.resource_pool["memory"]):
             return False
+        # Hold back while the host is overloaded, but never stall with nothing running
+        utilization = self.metrics["resource_utilization"]
+        overloaded = utilization.get("cpu", 0) >= 90 or utilization.get("memory", 0) >= 85
+        return not (overloaded and self.running_count)
 
     def _allocate_resources(self, task: ExecutionTask) -> ResourceAllocation:
         """Allocate resources for task"""
@@ -401,20 +558,31 @@ class DistributedExecutionEngine:
             resource_id=str(uuid.uuid4()),
             resource_type=ResourceType.CPU,
             allocated_amount=task.resource_requirements.get("cpu", 50),
-            max_capacity=100,
-            current_usage=psutil.cpu_percent(),
+            max_capacity=self.resource_pool["cpu"],
+            current_usage=self.allocated["cpu"],
             allocation_time=datetime.utcnow(),
             expected_release_time=datetime.utcnow() + timedelta(seconds=task.estimated_duration)
         )
-        
-        self.resource_allocation_collection.insert_one(asdict(allocation))
+        self.allocated["cpu"] += task.resource_requirements.get("cpu", 50)
+        self.allocated["memory"] += task.resource_requirements.get("memory", 512)
+        self.allocations[allocation.resource_id] = (allocation, task.resource_requirements)
         return allocation
 
-    def _release_resources(self, allocation: ResourceAllocation):
+    def _release_resources(self, allocation: Optional[ResourceAllocation]):
         """Release allocated resources"""
+        held = self.allocations.pop(allocation.resource_id, None) if allocation else None
+        if not held:
+            return
+        requirements = held[1]
+        self.allocated["cpu"] -= requirements.get("cpu", 50)
+        self.allocated["memory"] -= requirements.get("memory", 512)
+        self._wakeup.set()
+        asyncio.create_task(self._persist_release(allocation.resource_id))
+
+    async def _persist_release(self, resource_id: str):
         try:
-            self.resource_allocation_collection.update_one(
-                {"resource_id": allocation.resource_id},
+            await self.resource_allocation_collection.update_one(
+                {"resource_id": resource_id},
                 {"$set": {"released_at": datetime.utcnow(), "status": "released"}}
             )
         except Exception as e:
@@ -422,95 +590,216 @@ class DistributedExecutionEngine:
 
     def _estimate_queue_time(self) -> int:
         """Estimate time until task execution starts"""
-        return self.priority_queue.qsize() * 30  # 30 seconds per task estimate
+        average = self.metrics["average_execution_time"] or 30  # 30 seconds per task until measured
+        return int(self.queue_size * average / max(self.max_workers, 1))
 
     def _get_queue_position(self, task_id: str) -> int:
-        """Get position in queue for task"""
-        return self.priority_queue.qsize()  # Simplified
+        """Get position in queue for task (0 once it is running)"""
+        if task_id in self._blocked:
+            return len(self._pending) + 1
+        for position, entry in enumerate(sorted(self._pending), start=1):
+            if entry[2] == task_id:
+                return position
+        return 0
 
     def _estimate_completion_time(self, task: ExecutionTask) -> datetime:
         """Estimate task completion time"""
         if task.status == "running":
-            return datetime.utcnow() + timedelta(seconds=task.estimated_duration)
+            return task.started_at + timedelta(seconds=task.estimated_duration)
         elif task.status == "queued":
             return datetime.utcnow() + timedelta(seconds=self._estimate_queue_time() + task.estimated_duration)
         else:
             return task.completed_at or datetime.utcnow()
 
-    def _update_average_execution_time(self, execution_time: float):
-        """Update average execution time metric"""
-        current_avg = self.metrics["average_execution_time"]
-        completed = self.metrics["tasks_completed"]
-        
-        if completed == 1:
-            self.metrics["average_execution_time"] = execution_time
+    def _update_average(self, metric: str, value: float, count: int):
+        """Fold a new sample into a running-average metric"""
+        if count <= 1:
+            self.metrics[metric] = value
         else:
-            self.metrics["average_execution_time"] = ((current_avg * (completed - 1)) + execution_time) / completed
+            self.metrics[metric] = ((self.metrics[metric] * (count - 1)) + value) / count
 
-    async def _execute_batch_parallel(self, batch_job: BatchExecutionJob):
-        """Execute batch in parallel"""
+    def _batch_task(self, batch_job: BatchExecutionJob, workflow_id: str) -> ExecutionTask:
+        return ExecutionTask(
+            task_id=str(uuid.uuid4()),
+            workflow_id=workflow_id,
+            user_id=batch_job.user_id,
+            priority=ExecutionPriority[batch_job.options.get("priority", "normal").upper()],
+            estimated_duration=180,
+            resource_requirements=batch_job.options.get("resources", {"cpu": 30, "memory": 256}),
+            dependencies=[],
+            created_at=datetime.utcnow(),
+            trigger_data=batch_job.options.get("trigger_data") or {},
+            batch_id=batch_job.batch_id
+        )
+
+    async def _run_batch_workflow(self, batch_job: BatchExecutionJob, workflow_id: str) -> Dict[str, Any]:
+        """Run one workflow of a batch through the scheduler and fold its outcome into the progress"""
+        task = None
+        batch_job.progress["running"] += 1
         try:
-            futures = []
-            for workflow_id in batch_job.workflow_ids:
-                task = ExecutionTask(
-                    task_id=str(uuid.uuid4()),
-                    workflow_id=workflow_id,
-                    user_id=batch_job.user_id,
-                    priority=ExecutionPriority.NORMAL,
-                    estimated_duration=180,
-                    resource_requirements={"cpu": 30, "memory": 256},
-                    dependencies=[],
-                    created_at=datetime.utcnow()
-                )
-                
-                future = self.executor.submit(self._execute_task, task, self._allocate_resources(task))
-                futures.append(future)
-            
-            # Wait for completion
-            for future in as_completed(futures):
-                result = future.result()
-                if result.get("success"):
-                    batch_job.progress["completed"] += 1
-                else:
-                    batch_job.progress["failed"] += 1
-            
-            batch_job.status = "completed"
-            
+            # Built inside the try: a bad option fails this workflow, not the whole gather
+            task = self._batch_task(batch_job, workflow_id)
+            self._submit(task)
+            result = await self.wait_for_task(task.task_id)
         except Exception as e:
-            logger.error(f"Batch parallel execution error: {e}")
-            batch_job.status = "failed"
+            result = {"error": str(e), "success": False}
+        batch_job.progress["running"] -= 1
+        self._count_result(batch_job, workflow_id, result, task.task_id if task else None)
+        await self._save_batch_progress(batch_job)
+        return result
 
-    async def _execute_batch_sequential(self, batch_job: BatchExecutionJob):
-        """Execute batch sequentially"""
+    def _count_result(self, batch_job: BatchExecutionJob, workflow_id: str, result: Dict[str, Any],
+                      task_id: Optional[str] = None):
+        if result.get("success"):
+            batch_job.progress["completed"] += 1
+        else:
+            batch_job.progress["failed"] += 1
+            batch_job.progress["failures"].append({
+                "workflow_id": workflow_id,
+                "task_id": task_id,
+                "execution_id": result.get("execution_id"),
+                "error": result.get("error") or result.get("error_message")
+            })
+
+    async def _save_batch_progress(self, batch_job: BatchExecutionJob, force: bool = False):
+        """Persist batch progress, at most once per BATCH_PROGRESS_INTERVAL unless forced"""
+        now = time.monotonic()
+        if not force and now - self._batch_saved_at.get(batch_job.batch_id, 0.0) < BATCH_PROGRESS_INTERVAL:
+            return
+        self._batch_saved_at[batch_job.batch_id] = now
         try:
-            for workflow_id in batch_job.workflow_ids:
-                task = ExecutionTask(
-                    task_id=str(uuid.uuid4()),
-                    workflow_id=workflow_id,
-                    user_id=batch_job.user_id,
-                    priority=ExecutionPriority.NORMAL,
-                    estimated_duration=180,
-                    resource_requirements={"cpu": 30, "memory": 256},
-                    dependencies=[],
-                    created_at=datetime.utcnow()
-                )
-                
-                result = self._execute_task(task, self._allocate_resources(task))
-                if result.get("success"):
-                    batch_job.progress["completed"] += 1
-                else:
-                    batch_job.progress["failed"] += 1
-            
-            batch_job.status = "completed"
-            
+            await self.db.batch_executions.update_one(
+                {"batch_id": batch_job.batch_id},
+                {"$set": {"status": batch_job.status, "progress": batch_job.progress}}
+            )
         except Exception as e:
-            logger.error(f"Batch sequential execution error: {e}")
+            logger.error(f"Batch progress update error: {e}")
+
+    async def _run_bounded(self, batch_job: BatchExecutionJob, workflow_ids: List[str], max_parallel: int,
+                           integrations: Optional[Dict[str, List[str]]] = None):
+        """Run workflows with at most max_parallel in flight, in the given order.
+
+        Only max_parallel tasks are handed to the scheduler at a time, so a large batch
+        does not flood the queue ahead of other submissions. With `integrations`
+        (workflow id -> integrations used), each workflow also holds a slot of every
+        integration it uses, capped by integration_concurrency.
+        """
+        semaphore = asyncio.Semaphore(max_parallel)
+        integration_slots: Dict[str, asyncio.Semaphore] = {}
+
+        async def run_one(workflow_id: str):
+            held = []
+            try:
+                # Integration slots first (in sorted order, so two workflows never wait on each other),
+                # so workflows queued behind a saturated integration do not hold batch slots
+                for integration in sorted((integrations or {}).get(workflow_id, [])):
+                    slot = integration_slots.get(integration)
+                    if slot is None:
+                        slot = integration_slots[integration] = asyncio.Semaphore(
+                            self._integration_concurrency(integration, max_parallel)
+                        )
+                    await slot.acquire()
+                    held.append(slot)
+                async with semaphore:
+                    await self._run_batch_workflow(batch_job, workflow_id)
+            finally:
+                for slot in held:
+                    slot.release()
+
+        # Semaphore waiters are woken in arrival order, so workflows start in list order
+        await asyncio.gather(*(run_one(workflow_id) for workflow_id in workflow_ids))
+
+    def _integration_concurrency(self, integration: str, default: int) -> int:
+        """Concurrent workflows allowed on one integration: its in-flight cap, else its request rate"""
+        limiter = rate_limiter.limiters.get(integration)
+        if limiter is None:
+            return default
+        if limiter.max_in_flight:
+            return max(1, min(default, limiter.max_in_flight))
+        if limiter.bucket:
+            return max(1, min(default, math.ceil(limiter.bucket.rate)))
+        return default
+
+    def _max_parallel(self, batch_job: BatchExecutionJob) -> int:
+        return max(1, int(batch_job.options.get("max_parallel") or self.max_workers))
+
+    def _estimate_batch_time(self, count: int, options: Dict[str, Any]) -> float:
+        average = self.metrics["average_execution_time"] or 120  # 2 minutes per workflow until measured
+        if options.get("strategy") == "sequential":
+            return count * average
+        return math.ceil(count / max(1, int(options.get("max_parallel") or self.max_workers))) * average
+
+    def _finish_batch(self, batch_job: BatchExecutionJob):
+        progress = batch_job.progress
+        if not progress["failed"]:
+            batch_job.status = "completed"
+        elif progress["completed"]:
+            batch_job.status = "partial_failure"
+        else:
             batch_job.status = "failed"
+        progress["duration"] = (datetime.utcnow() - batch_job.created_at).total_seconds()
+
+    async def _execute_batch_parallel(self, batch_job: BatchExecutionJob):
+        """Execute batch in parallel, at most max_parallel workflows at a time"""
+        await self._run_bounded(batch_job, batch_job.workflow_ids, self._max_parallel(batch_job))
+        self._finish_batch(batch_job)
+
+    async def _execute_batch_sequential(self, batch_job: BatchExecutionJob):
+        """Execute batch sequentially, optionally stopping at the first failure"""
+        for index, workflow_id in enumerate(batch_job.workflow_ids):
+            result = await self._run_batch_workflow(batch_job, workflow_id)
+            if not result.get("success") and batch_job.options.get("stop_on_failure"):
+                batch_job.progress["skipped"] = len(batch_job.workflow_ids) - index - 1
+                break
+        self._finish_batch(batch_job)
 
     async def _execute_batch_optimized(self, batch_job: BatchExecutionJob):
-        """Execute batch with optimization"""
-        # Combine parallel and sequential based on dependencies and resources
-        await self._execute_batch_parallel(batch_job)
+        """Execute batch grouped by the integrations the workflows use.
+
+        Workflows sharing integrations run next to each other, so pooled provider
+        connections are reused while warm. Each integration gets at most as many
+        concurrent workflows as its rate limiter admits, so the batch queues at the
+        batch level instead of collecting 429s.
+        """
+        integrations: Dict[str, List[str]] = {}
+        async for workflow in self.workflows_collection.find(
+            {"id": {"$in": list(set(batch_job.workflow_ids))}, "user_id": batch_job.user_id},
+            {"id": 1, "nodes.integration": 1}
+        ):
+            integrations[workflow["id"]] = sorted({
+                node["integration"] for node in workflow.get("nodes", []) if node.get("integration")
+            })
+
+        runnable = []
+        for workflow_id in batch_job.workflow_ids:
+            if workflow_id in integrations:
+                runnable.append(workflow_id)
+            else:
+                self._count_result(batch_job, workflow_id, {"error": f"Workflow {workflow_id} not found"})
+
+        groups: Dict[tuple, List[str]] = defaultdict(list)
+        for workflow_id in runnable:
+            groups[tuple(integrations[workflow_id])].append(workflow_id)
+        # Largest groups first; stable within a group
+        ordered_groups = sorted(groups.items(), key=lambda group: -len(group[1]))
+        batch_job.progress["groups"] = [
+            {"integrations": list(signature), "workflows": len(workflow_ids)}
+            for signature, workflow_ids in ordered_groups
+        ]
+        ordered = [workflow_id for _, workflow_ids in ordered_groups for workflow_id in workflow_ids]
+
+        await self._run_bounded(batch_job, ordered, self._max_parallel(batch_job), integrations)
+        self._finish_batch(batch_job)
+
+    async def get_batch_status(self, batch_id: str) -> Dict[str, Any]:
+        """Get progress and failures of a batch"""
+        batch_job = self._batches.get(batch_id)
+        if batch_job:
+            return {"status": "success", "batch": asdict(batch_job)}
+        batch = await self.db.batch_executions.find_one({"batch_id": batch_id}, {"_id": 0})
+        if batch:
+            return {"status": "found", "batch": batch}
+        return {"status": "not_found", "message": "Batch not found"}
 
 class ResourceMonitor:
     def __init__(self):
@@ -559,7 +848,7 @@ class AutoScaler:
         try:
             cpu_usage = metrics.get("resource_utilization", {}).get("cpu", 0)
             memory_usage = metrics.get("resource_utilization", {}).get("memory", 0)
-            queue_size = self.execution_engine.priority_queue.qsize()
+            queue_size = self.execution_engine.queue_size
             
             # Check if cooldown period has passed
             if datetime.utcnow() - self.last_scaling_action < self.cooldown_period:
@@ -589,8 +878,7 @@ class AutoScaler:
             new_workers = min(current_workers + 5, 50)  # Max 50 workers
             
             if new_workers > current_workers:
-                self.execution_engine.max_workers = new_workers
-                self.execution_engine.executor._max_workers = new_workers
+                self.execution_engine.set_max_workers(new_workers)
                 self.last_scaling_action = datetime.utcnow()
                 
                 logger.info(f"🔺 Scaled UP: {current_workers} → {new_workers} workers")
@@ -605,8 +893,7 @@ class AutoScaler:
             new_workers = max(current_workers - 2, 5)  # Min 5 workers
             
             if new_workers < current_workers:
-                self.execution_engine.max_workers = new_workers
-                self.execution_engine.executor._max_workers = new_workers
+                self.execution_engine.set_max_workers(new_workers)
                 self.last_scaling_action = datetime.utcnow()
                 
                 logger.info(f"🔻 Scaled DOWN: {current_workers} → {new_workers} workers")
@@ -0,0 +1,264 @@
+"""
+Persisted timers for suspended DELAY nodes.
+
+A DELAY node longer than the engine's inline threshold checkpoints its
+execution and registers a wake-up time here instead of parking a coroutine.
+Timers live in the MongoDB ``execution_timers`` collection; only the ones due
+within the next ``horizon`` seconds are loaded into an in-memory hierarchical
+timer wheel, so hundreds of thousands of pending delays cost nothing in RAM.
+When a timer fires it is claimed atomically and a ``resume`` job is put on the
+execution queue.
+
+Every worker process runs a scheduler and fires the timers it schedules
+itself on time; only one (``load_persisted``) also polls MongoDB for timers
+scheduled elsewhere, such as by a process that died before they were due.
+"""
+import asyncio
+import math
+import time
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Hashable, List, Optional, Sequence
+import logging
+
+from pymongo import ReturnDocument
+
+from database import get_database
+
+logger = logging.getLogger(__name__)
+
+
+class HierarchicalTimerWheel:
+    """Hierarchical timing wheel with O(1) insert and cancel.
+
+    Level 0 has one slot per tick; each higher level slot spans a full
+    revolution of the level below and is cascaded down when reached.
+    Timers beyond the last level wait in an overflow map.
+    """
+
+    def __init__(self, tick: float = 1.0, slots_per_level: Sequence[int] = (64, 64, 64), start: Optional[float] = None):
+        self.tick = tick
+        self.slots_per_level = tuple(slots_per_level)
+        self.levels: List[List[Dict[Hashable, int]]] = [[{} for _ in range(n)] for n in self.slots_per_level]
+        # Ticks spanned by one slot of each level
+        self.resolutions = [math.prod(self.slots_per_level[:level]) for level in range(len(self.slots_per_level))]
+        self.capacity = math.prod(self.slots_per_level)
+        self.current_tick = self._to_tick(time.time() if start is None else start)
+        self.overflow: Dict[Hashable, int] = {}
+        self.expired: List[Hashable] = []
+        self.timers: Dict[Hashable, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.timers)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self.timers
+
+    def _to_tick(self, timestamp: float) -> int:
+        return int(timestamp // self.tick)
+
+    def add(self, key: Hashable, due: float):
+        """Schedule key to fire at the given epoch timestamp (replaces an existing timer)."""
+        if key in self.timers:
+            self.cancel(key)
+        due_tick = math.ceil(due / self.tick)
+        self.timers[key] = due_tick
+        self._place(key, due_tick)
+
+    def cancel(self, key: Hashable) -> bool:
+        """Cancel a timer; slots are cleaned lazily."""
+        return self.timers.pop(key, None) is not None
+
+    def _place(self, key: Hashable, due_tick: int):
+        delta = due_tick - self.current_tick
+        if delta <= 0:
+            self.expired.append(key)
+            return
+        if delta >= self.capacity:
+            self.overflow[key] = due_tick
+            return
+        for level, resolution in enumerate(self.resolutions):
+            if delta < resolution * self.slots_per_level[level]:
+                slot = (due_tick // resolution) % self.slots_per_level[level]
+                self.levels[level][slot][key] = due_tick
+                return
+
+    def advance(self, now: Optional[float] = None) -> List[Hashable]:
+        """Move the wheel forward to now and return the keys that are due."""
+        target_tick = self._to_tick(time.time() if now is None else now)
+        fired = self._collect(self.expired)
+        self.expired = []
+
+        while self.current_tick < target_tick:
+            self.current_tick += 1
+            tick = self.current_tick
+
+            # Cascade higher levels when the level below completes a revolution, top level first
+            if self.overflow and tick % self.capacity == 0:
+                overflow, self.overflow = self.overflow, {}
+                for key, due_tick in overflow.items():
+                    if self.timers.get(key) == due_tick:
+                        self._place(key, due_tick)
+            for level in range(len(self.slots_per_level) - 1, 0, -1):
+                if tick % self.resolutions[level]:
+                    continue
+                slot = (tick // self.resolutions[level]) % self.slots_per_level[level]
+                bucket = self.levels[level][slot]
+                self.levels[level][slot] = {}
+                for key, due_tick in bucket.items():
+                    if self.timers.get(key) == due_tick:
+                        self._place(key, due_tick)
+
+            slot = tick % self.slots_per_level[0]
+            bucket = self.levels[0][slot]
+            self.levels[0][slot] = {}
+            fired.extend(self._collect(
+                [key for key, due_tick in bucket.items() if self.timers.get(key) == due_tick]
+            ))
+            if self.expired:
+                fired.extend(self._collect(self.expired))
+                self.expired = []
+
+        return fired
+
+    def _collect(self, keys: List[Hashable]) -> List[Hashable]:
+        collected = []
+        for key in keys:
+            if self.timers.pop(key, None) is not None:
+                collected.append(key)
+        return collected
+
+
+class DelayScheduler:
+    """Schedules resumption of executions suspended at DELAY nodes."""
+
+    def __init__(self, horizon: int = 300, tick: float = 1.0, clock: Callable[[], float] = time.time):
+        self.horizon = horizon
+        self.tick = tick
+        self.clock = clock
+        self.wheel = HierarchicalTimerWheel(tick=tick, start=clock())
+        self.queue = None
+        # Whether this scheduler also picks up timers persisted by other processes
+        self.load_persisted = True
+        self._task: Optional[asyncio.Task] = None
+        self.timers_fired = 0
+
+    @property
+    def collection(self):
+        return get_database().execution_timers
+
+    @property
+    def is_running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def schedule(self, execution_id: str, workflow_id: str, user_id: str, node_id: str, resume_at: datetime):
+        """Persist a wake-up for a suspended node; idempotent per (execution, node).
+
+        A timer that already fired is armed again: its resume job may have found
+        the execution running (woken by a parallel delay) and left this node waiting.
+        """
+        timer_id = f"{execution_id}:{node_id}"
+        result = await self.collection.update_one(
+            {"id": timer_id},
+            {"$setOnInsert": {
+                "id": timer_id,
+                "execution_id": execution_id,
+                "workflow_id": workflow_id,
+                "user_id": user_id,
+                "node_id": node_id,
+                "resume_at": resume_at,
+                "status": "pending",
+                "created_at": datetime.utcnow()
+            }},
+            upsert=True
+        )
+        if result.matched_count:
+            await self.collection.update_one(
+                {"id": timer_id, "status": "fired"},
+                {"$set": {"status": "pending", "resume_at": resume_at}, "$unset": {"fired_at": ""}}
+            )
+        if self.is_running and resume_at <= datetime.utcnow() + timedelta(seconds=self.horizon):
+            self.wheel.add(timer_id, self._timestamp(resume_at))
+
+    async def cancel_execution(self, execution_id: str) -> int:
+        """Drop all pending timers of an execution."""
+        cursor = self.collection.find({"execution_id": execution_id, "status": "pending"}, {"id": 1})
+        async for timer in cursor:
+            self.wheel.cancel(timer["id"])
+        result = await self.collection.delete_many({"execution_id": execution_id, "status": "pending"})
+        return result.deleted_count
+
+    def start(self, queue, load_persisted: bool = True):
+        """Start firing timers into the given execution queue.
+
+        Without load_persisted only timers scheduled through this instance fire;
+        one scheduler per deployment should load the rest from MongoDB.
+        """
+        self.queue = queue
+        self.load_persisted = load_persisted
+        if not self.is_running:
+            self.wheel = HierarchicalTimerWheel(tick=self.tick, start=self.clock())
+            self._task = asyncio.create_task(self._run())
+            logger.info("Delay scheduler started")
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self):
+        next_load = 0.0
+        while True:
+            try:
+                now = self.clock()
+                if self.load_persisted and now >= next_load:
+                    await self._load_upcoming()
+                    next_load = now + self.horizon / 2
+                for timer_id in self.wheel.advance(now):
+                    await self._fire(timer_id)
+                await asyncio.sleep(self.tick)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Delay scheduler error: {e}")
+                await asyncio.sleep(self.tick * 5)
+
+    async def _load_upcoming(self):
+        """Pull timers due within the horizon (including overdue ones) into the wheel."""
+        until = datetime.utcnow() + timedelta(seconds=self.horizon)
+        cursor = self.collection.find({"status": "pending", "resume_at": {"$lte": until}}, {"id": 1, "resume_at": 1})
+        async for timer in cursor:
+            if timer["id"] not in self.wheel:
+                self.wheel.add(timer["id"], self._timestamp(timer["resume_at"]))
+
+    async def _fire(self, timer_id: str):
+        # Several processes may hold the same timer; only the one that claims it enqueues
+        timer = await self.collection.find_one_and_update(
+            {"id": timer_id, "status": "pending"},
+            {"$set": {"status": "fired", "fired_at": datetime.utcnow()}},
+            return_document=ReturnDocument.AFTER
+        )
+        if not timer:
+            return
+        await self.queue.enqueue(
+            timer["execution_id"], timer["workflow_id"], timer["user_id"],
+            kind="resume", payload={"reason": "delay", "node_id": timer["node_id"]}
+        )
+        self.timers_fired += 1
+
+    @staticmethod
+    def _timestamp(value: datetime) -> float:
+        # Stored datetimes are naive UTC
+        return (value - datetime(1970, 1, 1)).total_seconds()
+
+    async def get_stats(self) -> Dict[str, Any]:
+        return {
+            "running": self.is_running,
+            "timers_in_memory": len(self.wheel),
+            "timers_pending": await self.collection.count_documents({"status": "pending"}),
+            "timers_fired": self.timers_fired
+        }
+
+
+# Global instance
+delay_scheduler = DelayScheduler()
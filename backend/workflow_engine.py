@@ -1,37 +1,264 @@
 import asyncio
-from typing import Dict, Any, List, Optional
-from datetime import datetime
+import contextvars
+import hashlib
+import json
+import os
+import random
+from typing import Dict, Any, List, Mapping, Optional, Awaitable, Callable, Iterable, AsyncIterable, Union
+from datetime import datetime, timedelta
 from models import Workflow, WorkflowExecution, ExecutionStatus, NodeType
 from integrations_engine import integrations_engine
+from execution_plan import ExecutionPlan, execution_plan_cache
+from condition_engine import Predicate, compile_node_condition
+from execution_context import ExecutionContext, as_dict
+from action_batcher import ActionBatcher
+from execution_trace import ExecutionTrace, payload_size
+from execution_events import EventType, execution_events
+from retry_policy import CircuitBreakerRegistry, ErrorClass, NodeExecutionError, circuit_breakers, classify_error
 import logging
+import time
 
 logger = logging.getLogger(__name__)
 
+CheckpointCallback = Callable[[str, Dict[str, Any], Optional[str], List[str]], Awaitable[None]]
+ItemsCallback = Callable[[List[Dict[str, Any]]], Awaitable[None]]
+
+# Extra time the engine gives a node call beyond the timeout passed down to it
+NODE_TIMEOUT_GRACE = 1.0
+
+# How deep SUBWORKFLOW nodes may nest calls to other workflows
+MAX_SUBWORKFLOW_DEPTH = 5
+# Workflows running in the current task, the executed one first, then those called by SUBWORKFLOW nodes
+_subworkflow_stack: contextvars.ContextVar = contextvars.ContextVar("subworkflow_stack", default=())
+
 class WorkflowEngine:
     """Engine for executing workflows."""
     
-    def __init__(self):
+    def __init__(self, max_concurrency: int = 10, inline_delay_threshold: float = 5,
+                 node_timeout: float = 300, execution_timeout: float = 3600,
+                 clock: Callable[[], float] = time.monotonic, rng: Optional[random.Random] = None,
+                 breakers: Optional[CircuitBreakerRegistry] = None):
+        """clock, rng and breakers default to the process-wide ones; replays inject their own
+        (the loop's virtual time, a seeded RNG and a private breaker registry)."""
         self.running_workflows: Dict[str, asyncio.Task] = {}
+        self._cancel_requested: set = set()
+        self.max_concurrency = max_concurrency
+        # Longer DELAY nodes suspend the execution instead of sleeping (when the caller supports resuming)
+        self.inline_delay_threshold = inline_delay_threshold
+        # Default deadlines: per ACTION/AI node call, and per run of an execution
+        self.node_timeout = node_timeout
+        self.execution_timeout = execution_timeout
+        # Deadlines, durations and traces are measured on clock; retry backoff draws from rng
+        self.clock = clock
+        self.rng = rng
+        self.circuit_breakers = breakers or circuit_breakers
     
-    async def execute_workflow(self, workflow: Workflow, trigger_data: Dict[str, Any] = None) -> WorkflowExecution:
-        """Execute a workflow."""
+    def execution_timeout_for(self, workflow: Workflow) -> float:
+        """Seconds a run of this workflow may take before it is failed."""
+        return workflow.timeout_seconds or self.execution_timeout
+    
+    async def execute_workflow(self, workflow: Workflow, trigger_data: Dict[str, Any] = None, max_concurrency: Optional[int] = None,
+                               execution_id: Optional[str] = None, suspend_delays: bool = False,
+                               on_checkpoint: Optional[CheckpointCallback] = None) -> WorkflowExecution:
+        """Execute a workflow, running independent branches concurrently (at most max_concurrency nodes at once).
+        
+        With suspend_delays, long DELAY nodes leave the execution WAITING with a checkpoint
+        that resume_workflow continues from once the delay is due. on_checkpoint is awaited
+        after every completed node so the caller can persist progress.
+        """
         execution = WorkflowExecution(
             workflow_id=workflow.id,
             user_id=workflow.user_id,
             status=ExecutionStatus.RUNNING,
-            execution_data=trigger_data or {}
+            execution_data=trigger_data or {},
+            trigger_data=dict(trigger_data or {})
+        )
+        if execution_id:
+            # Executions created ahead of time (e.g. queued jobs) keep their id
+            execution.id = execution_id
+        
+        return await self._run_execution(workflow, execution, max_concurrency, suspend_delays, on_checkpoint)
+    
+    async def resume_workflow(self, workflow: Workflow, execution: WorkflowExecution, max_concurrency: Optional[int] = None,
+                              on_checkpoint: Optional[CheckpointCallback] = None) -> WorkflowExecution:
+        """Continue an execution from its checkpoint, skipping every node that already completed.
+        
+        Used when delays are due and to recover executions that failed or whose worker died;
+        delays that are due are released, the others keep waiting.
+        """
+        now = datetime.utcnow()
+        waiting = execution.checkpoint.get("waiting", {})
+        execution.checkpoint["waiting"] = {
+            node_id: resume_at for node_id, resume_at in waiting.items()
+            if datetime.fromisoformat(resume_at) > now
+        }
+        execution.status = ExecutionStatus.RUNNING
+        execution.error_message = None
+        execution.completed_at = None
+        
+        return await self._run_execution(workflow, execution, max_concurrency, True, on_checkpoint)
+    
+    async def execute_batch(self, workflow: Workflow, items: Union[Iterable[Any], AsyncIterable[Any]],
+                            item_concurrency: Optional[int] = None, execution_id: Optional[str] = None,
+                            previous_results: Optional[List[Dict[str, Any]]] = None,
+                            on_items: Optional[ItemsCallback] = None, flush_size: int = 100) -> WorkflowExecution:
+        """Run a workflow once per item and aggregate the runs into a single execution.
+        
+        Items (a list, iterator or async iterator, consumed lazily) run at most item_concurrency
+        at a time; concurrent calls of bulk-capable actions are sent in chunks. Each item gets
+        an entry in execution.item_results with its status, error and terminal node results.
+        Items already in previous_results are skipped (redelivered jobs), and on_items is
+        awaited with every flush_size new results so callers can persist progress. Items
+        still pending once the workflow's execution timeout has passed fail.
+        """
+        execution = WorkflowExecution(
+            workflow_id=workflow.id,
+            user_id=workflow.user_id,
+            status=ExecutionStatus.RUNNING
         )
+        if execution_id:
+            execution.id = execution_id
+        timeout = self.execution_timeout_for(workflow)
+        execution.deadline_at = datetime.utcnow() + timedelta(seconds=timeout)
+        run_started = self.clock()
+        execution_events.publish(EventType.EXECUTION_STARTED, execution.id, workflow.id, batch=True)
+        
+        try:
+            task = asyncio.create_task(self._run_items(
+                workflow, execution, items, item_concurrency or self.max_concurrency,
+                previous_results or [], on_items, flush_size, self.clock() + timeout
+            ))
+            self.running_workflows[execution.id] = task
+            try:
+                await task
+            except asyncio.CancelledError:
+                if not self._was_cancelled(execution):
+                    raise
+                return execution
+            
+            summary = execution.execution_data["batch"]
+            if summary["total"] and summary["failed"] == summary["total"]:
+                execution.status = ExecutionStatus.FAILED
+            else:
+                execution.status = ExecutionStatus.SUCCESS
+            if summary["failed"]:
+                execution.error_message = f"{summary['failed']} of {summary['total']} items failed"
+        except Exception as e:
+            logger.error(f"Batch execution failed: {str(e)}")
+            execution.status = ExecutionStatus.FAILED
+            execution.error_message = str(e)
+        finally:
+            execution.completed_at = datetime.utcnow()
+            execution.duration = self.clock() - run_started
+            self.running_workflows.pop(execution.id, None)
+            self._cancel_requested.discard(execution.id)
+            self._publish_finished(execution)
+        
+        return execution
+    
+    async def _run_items(self, workflow: Workflow, execution: WorkflowExecution, items: Union[Iterable[Any], AsyncIterable[Any]],
+                         item_concurrency: int, previous_results: List[Dict[str, Any]],
+                         on_items: Optional[ItemsCallback], flush_size: int, deadline: Optional[float] = None):
+        plan = execution_plan_cache.get_plan(workflow)
+        _subworkflow_stack.set((workflow.id,))
+        batcher = ActionBatcher()
+        done = {result["index"] for result in previous_results}
+        results = list(previous_results)
+        unflushed: List[Dict[str, Any]] = []
+        
+        if isinstance(items, AsyncIterable):
+            source = items.__aiter__()
+        else:
+            source = _aiter_sync(items)
+        source_lock = asyncio.Lock()
+        position = -1
+        
+        async def next_item():
+            nonlocal position
+            async with source_lock:
+                while True:
+                    try:
+                        item = await source.__anext__()
+                    except StopAsyncIteration:
+                        return None
+                    position += 1
+                    if position not in done:
+                        return position, item
         
+        async def flush():
+            batch = unflushed[:]
+            unflushed.clear()
+            if on_items and batch:
+                try:
+                    await on_items(batch)
+                except Exception as e:
+                    logger.error(f"Saving item results of execution {execution.id} failed: {e}")
+        
+        async def worker():
+            while True:
+                claimed = await next_item()
+                if claimed is None:
+                    return
+                index, item = claimed
+                trigger_data = item if isinstance(item, dict) else {"item": item}
+                try:
+                    contexts = await self._execute_dag(
+                        plan, trigger_data, self.max_concurrency, {}, batcher=batcher, deadline=deadline
+                    )
+                    result = {
+                        "index": index,
+                        "status": ExecutionStatus.SUCCESS.value,
+                        "output": {plan.nodes[sink].id: contexts[sink].frame for sink in plan.sink_indexes if sink in contexts}
+                    }
+                except Exception as e:
+                    result = {"index": index, "status": ExecutionStatus.FAILED.value, "error": str(e)}
+                results.append(result)
+                unflushed.append(result)
+                if len(unflushed) >= flush_size:
+                    await flush()
+        
+        try:
+            await asyncio.gather(*(worker() for _ in range(max(1, item_concurrency))))
+        finally:
+            await batcher.close()
+            await flush()
+            results.sort(key=lambda result: result["index"])
+            failed = sum(1 for result in results if result["status"] != ExecutionStatus.SUCCESS.value)
+            execution.item_results = results
+            execution.execution_data["batch"] = {
+                "total": len(results),
+                "succeeded": len(results) - failed,
+                "failed": failed,
+                "bulk_calls": batcher.bulk_calls
+            }
+    
+    async def _run_execution(self, workflow: Workflow, execution: WorkflowExecution, max_concurrency: Optional[int],
+                             suspend_delays: bool, on_checkpoint: Optional[CheckpointCallback]) -> WorkflowExecution:
+        timeout = self.execution_timeout_for(workflow)
+        execution.deadline_at = datetime.utcnow() + timedelta(seconds=timeout)
+        run_started = self.clock()
+        deadline = run_started + timeout
+        execution_events.publish(EventType.EXECUTION_STARTED, execution.id, workflow.id)
         try:
             # Create execution task
-            task = asyncio.create_task(self._run_workflow_nodes(workflow, execution))
+            task = asyncio.create_task(
+                self._run_workflow_nodes(workflow, execution, max_concurrency, suspend_delays, on_checkpoint, deadline)
+            )
             self.running_workflows[execution.id] = task
             
             # Wait for completion
-            await task
+            try:
+                await task
+            except asyncio.CancelledError:
+                if not self._was_cancelled(execution):
+                    raise
+                return execution
             
-            execution.status = ExecutionStatus.SUCCESS
-            execution.completed_at = datetime.utcnow()
+            if execution.checkpoint.get("waiting"):
+                execution.status = ExecutionStatus.WAITING
+            else:
+                execution.status = ExecutionStatus.SUCCESS
+                execution.completed_at = datetime.utcnow()
             
         except Exception as e:
             logger.error(f"Workflow execution failed: {str(e)}")
@@ -39,57 +266,304 @@ class WorkflowEngine:
             execution.error_message = str(e)
             execution.completed_at = datetime.utcnow()
         finally:
+            # Duration adds up the runs of the execution, not the time spent waiting between them
+            execution.duration = (execution.duration or 0) + self.clock() - run_started
             # Clean up
-            if execution.id in self.running_workflows:
-                del self.running_workflows[execution.id]
+            self.running_workflows.pop(execution.id, None)
+            self._cancel_requested.discard(execution.id)
+            self._publish_finished(execution)
         
         return execution
     
-    async def _run_workflow_nodes(self, workflow: Workflow, execution: WorkflowExecution):
-        """Execute workflow nodes in order."""
-        # Find trigger nodes
-        trigger_nodes = [node for node in workflow.nodes if node.type == NodeType.TRIGGER]
-        if not trigger_nodes:
-            raise ValueError("No trigger node found")
+    def _publish_finished(self, execution: WorkflowExecution):
+        execution_events.publish(
+            EventType.EXECUTION_FINISHED, execution.id, execution.workflow_id,
+            status=execution.status.value, error=execution.error_message, duration=execution.duration
+        )
+    
+    def _was_cancelled(self, execution: WorkflowExecution) -> bool:
+        """Record a cancel_workflow() cancellation; False when the caller itself is being cancelled."""
+        if execution.id not in self._cancel_requested:
+            return False
+        execution.status = ExecutionStatus.CANCELLED
+        execution.error_message = "Execution cancelled"
+        execution.completed_at = datetime.utcnow()
+        logger.info(f"Execution {execution.id} cancelled")
+        return True
+    
+    async def _run_workflow_nodes(self, workflow: Workflow, execution: WorkflowExecution, max_concurrency: int = None,
+                                  suspend_delays: bool = False, on_checkpoint: Optional[CheckpointCallback] = None,
+                                  deadline: Optional[float] = None):
+        """Execute workflow nodes as a DAG, running every ready node concurrently."""
+        plan = execution_plan_cache.get_plan(workflow)
+        _subworkflow_stack.set((workflow.id,))
+        
+        trace = ExecutionTrace.for_execution(execution.execution_log, self.clock)
+        try:
+            contexts = await self._execute_dag(
+                plan, execution.execution_data, max_concurrency or self.max_concurrency,
+                execution.checkpoint, suspend_delays, on_checkpoint, deadline=deadline, trace=trace,
+                execution_id=execution.id
+            )
+        finally:
+            execution.execution_log.extend(trace.entries)
         
-        # Start execution from trigger nodes
-        for trigger_node in trigger_nodes:
-            await self._execute_node_chain(workflow, trigger_node, execution)
+        # Update execution data with the results of every terminal node once nothing is waiting
+        if not execution.checkpoint.get("waiting"):
+            for index in plan.sink_indexes:
+                if index in contexts:
+                    execution.execution_data.update(contexts[index].to_dict())
     
-    async def _execute_node_chain(self, workflow: Workflow, start_node, execution: WorkflowExecution, context: Dict[str, Any] = None):
-        """Execute a chain of connected nodes."""
-        if context is None:
-            context = execution.execution_data.copy()
+    async def _execute_dag(self, plan: ExecutionPlan, trigger_data: Dict[str, Any], max_concurrency: int,
+                           checkpoint: Dict[str, Any], suspend_delays: bool = False,
+                           on_checkpoint: Optional[CheckpointCallback] = None,
+                           batcher: Optional[ActionBatcher] = None,
+                           deadline: Optional[float] = None,
+                           trace: Optional[ExecutionTrace] = None,
+                           execution_id: Optional[str] = None) -> Dict[int, ExecutionContext]:
+        """Run nodes as soon as all their predecessors finished, bounded by max_concurrency.
         
-        current_node = start_node
-        visited_nodes = set()
+        Each node reads a layered ExecutionContext over the trigger data and the results of its
+        active predecessors, and its own result becomes a new layer shared by its successors.
+        A connection with a condition only feeds its target when the condition holds on the
+        source's context; a node whose inbound connections are all inactive is skipped, and
+        so are the nodes only it feeds.
         
-        while current_node and current_node.id not in visited_nodes:
-            visited_nodes.add(current_node.id)
-            
-            # Execute current node
-            node_result = await self._execute_node(current_node, context)
-            context.update(node_result)
-            
-            # Find next nodes
-            next_connections = [conn for conn in workflow.connections if conn.from_node == current_node.id]
-            
-            if not next_connections:
-                break
+        The checkpoint holds the ids of completed and skipped nodes, the result of every
+        completed node and the DELAY nodes waiting to be resumed; it is read on entry (contexts
+        are rebuilt from the results) and rewritten on exit (also when a node fails).
+        on_checkpoint is awaited after every completed node with (node_id, result, resume_at,
+        skipped_node_ids) so callers can persist progress. ACTION nodes go through batcher when
+        one is given (item-batch executions).
+        
+        Every node attempt is bounded by its timeout (config timeout_seconds, by default
+        node_timeout for ACTION and AI nodes) and by what is left until deadline
+        (on self.clock); no node starts or retries once the deadline has passed.
+        
+        With a trace, every node that completes or fails gets an entry with its timing,
+        retries and payload sizes (the input size is that of the results it reads). With an
+        execution_id, node_started and node_finished events are published for it.
+        """
+        semaphore = asyncio.Semaphore(max(1, max_concurrency))
+        root = ExecutionContext.root(trigger_data)
+        completed = {plan.index[node_id] for node_id in checkpoint.get("completed", []) if node_id in plan.index}
+        skipped = {plan.index[node_id] for node_id in checkpoint.get("skipped", []) if node_id in plan.index}
+        results: Dict[int, Dict[str, Any]] = {
+            plan.index[node_id]: result for node_id, result in checkpoint.get("outputs", {}).items()
+            if node_id in plan.index
+        }
+        waiting: Dict[int, str] = {
+            plan.index[node_id]: resume_at for node_id, resume_at in checkpoint.get("waiting", {}).items()
+            if node_id in plan.index
+        }
+        contexts: Dict[int, ExecutionContext] = {}
+        remaining = list(plan.in_degree)
+        # Predecessors whose connection to a node is active, in topological order
+        active_inputs: List[List[int]] = [[] for _ in range(len(plan))]
+        started = set()
+        pending = set()
+        sizes: Dict[int, int] = {}
+        
+        def input_size(index: int) -> int:
+            if not active_inputs[index]:
+                if -1 not in sizes:
+                    sizes[-1] = payload_size(trigger_data)
+                return sizes[-1]
+            total = 0
+            for previous in active_inputs[index]:
+                if previous not in sizes:
+                    sizes[previous] = payload_size(results.get(previous, {}))
+                total += sizes[previous]
+            return total
+        
+        def input_context(index: int) -> ExecutionContext:
+            # Merge nodes see the contexts of all active incoming branches
+            parents = tuple(contexts[previous] for previous in sorted(active_inputs[index]))
+            return ExecutionContext.merge(parents, index) if parents else root
+        
+        async def run_node(index: int):
+            context = input_context(index)
+            node = plan.nodes[index]
+            policy = plan.retry_policies[index]
+            node_started = self.clock()
+            if execution_id:
+                execution_events.publish(EventType.NODE_STARTED, execution_id, plan.workflow_id, node_id=node.id)
+            try:
+                node_result = await attempt_node(index, node, context, policy)
+            except NodeExecutionError as e:
+                if execution_id:
+                    execution_events.publish(
+                        EventType.NODE_FINISHED, execution_id, plan.workflow_id, node_id=node.id,
+                        status=ExecutionStatus.FAILED.value, duration=self.clock() - node_started,
+                        attempts=e.attempts, error=str(e), error_class=e.error_class
+                    )
+                if trace:
+                    trace.record(
+                        node, ExecutionStatus.FAILED.value, node_started, self.clock(), e.attempts,
+                        str(e), e.error_class, input_size(index)
+                    )
+                raise
+            if trace:
+                sizes[index] = payload_size(node_result)
+                trace.record(
+                    node, ExecutionStatus.SUCCESS.value, node_started, self.clock(), node_result.get("attempts", 1),
+                    input_bytes=input_size(index), output_bytes=sizes[index]
+                )
+            if execution_id:
+                execution_events.publish(
+                    EventType.NODE_FINISHED, execution_id, plan.workflow_id, node_id=node.id,
+                    status=ExecutionStatus.SUCCESS.value, duration=self.clock() - node_started,
+                    attempts=node_result.get("attempts", 1), resume_at=node_result.get("resume_at")
+                )
+            return index, context.child(node_result, node.id, index), node_result
+        
+        async def attempt_node(index: int, node, context: ExecutionContext, policy) -> Dict[str, Any]:
+            attempt = 1
+            while True:
+                try:
+                    async with semaphore:
+                        timeout = self._node_timeout(node, deadline)
+                        node_call = self._execute_node(
+                            node, context, suspend_delays, plan.conditions[index], batcher,
+                            connection_id=node.config.get("connection_id") or plan.user_id, timeout=timeout,
+                            user_id=plan.user_id
+                        )
+                        if timeout is None:
+                            node_result = await node_call
+                        else:
+                            try:
+                                # Integration and AI calls get the same budget; this is the backstop
+                                node_result = await asyncio.wait_for(node_call, timeout + NODE_TIMEOUT_GRACE)
+                            except asyncio.TimeoutError:
+                                raise NodeExecutionError(f"Timed out after {timeout:.3g}s", ErrorClass.TIMEOUT)
+                    break
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    error_class = classify_error(e)
+                    if not policy.should_retry(error_class, attempt):
+                        raise NodeExecutionError(
+                            f"Node '{node.name}' failed after {attempt} attempt(s): {e}", error_class, attempt
+                        ) from e
+                    delay = policy.backoff(attempt, self.rng)
+                    if deadline is not None and self.clock() + delay >= deadline:
+                        raise NodeExecutionError(
+                            f"Node '{node.name}' failed after {attempt} attempt(s), no time left to retry: {e}",
+                            error_class, attempt
+                        ) from e
+                    logger.warning(f"Node {node.id} attempt {attempt} failed ({error_class}), retrying in {delay:.2f}s: {e}")
+                    attempt += 1
+                    # Back off without holding a concurrency slot
+                    await asyncio.sleep(delay)
+            if attempt > 1:
+                node_result["attempts"] = attempt
+            return node_result
+        
+        def schedule(index: int):
+            started.add(index)
+            pending.add(asyncio.create_task(run_node(index)))
+        
+        def activate_edges(index: int):
+            context = contexts[index]
+            for next_index, predicate in zip(plan.successors[index], plan.edge_conditions[index]):
+                if predicate is None or predicate(context):
+                    active_inputs[next_index].append(index)
+        
+        def follow_edges(index: int) -> List[int]:
+            # Resolve the outgoing connections of a finished (or skipped) node and start or
+            # skip every successor that has nothing left to wait for
+            newly_skipped = []
+            stack = [index]
+            while stack:
+                current = stack.pop()
+                if current in completed:
+                    activate_edges(current)
+                for next_index in plan.successors[current]:
+                    remaining[next_index] -= 1
+                    if remaining[next_index] == 0 and next_index not in started and next_index not in skipped:
+                        if active_inputs[next_index]:
+                            schedule(next_index)
+                        else:
+                            skipped.add(next_index)
+                            newly_skipped.append(next_index)
+                            stack.append(next_index)
+            return newly_skipped
+        
+        # Rebuild the resolved part of the graph (on resume), then start every ready node
+        started.update(completed)
+        for index in sorted(completed | skipped):
+            if index in completed:
+                contexts[index] = input_context(index).child(results.get(index, {}), plan.nodes[index].id, index)
+                if index in waiting:
+                    continue
+                activate_edges(index)
+            for next_index in plan.successors[index]:
+                remaining[next_index] -= 1
+        for index in range(len(plan)):
+            if remaining[index] == 0 and index not in started and index not in skipped:
+                if not plan.in_degree[index] or active_inputs[index]:
+                    schedule(index)
+                else:
+                    skipped.add(index)
+                    follow_edges(index)
+        
+        try:
+            while pending:
+                done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    pending.discard(task)
+                    index, context, node_result = task.result()
+                    resume_at = node_result.get("resume_at")
+                    contexts[index] = context
+                    results[index] = node_result
+                    completed.add(index)
+                    
+                    newly_skipped = []
+                    if resume_at:
+                        # Suspended delay: successors run once the execution is resumed
+                        waiting[index] = resume_at
+                    else:
+                        newly_skipped = follow_edges(index)
+                    
+                    if on_checkpoint:
+                        try:
+                            await on_checkpoint(
+                                plan.nodes[index].id, node_result, resume_at,
+                                [plan.nodes[skipped_index].id for skipped_index in newly_skipped]
+                            )
+                        except Exception as e:
+                            logger.error(f"Checkpoint of node {plan.nodes[index].id} failed: {e}")
+        finally:
+            # A failed node (or cancellation) stops every branch still in flight
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
             
-            # For simplicity, take first connection
-            # In a real implementation, this would handle conditions and multiple paths
-            next_connection = next_connections[0]
-            current_node = next(
-                (node for node in workflow.nodes if node.id == next_connection.to_node),
-                None
-            )
+            # Node results are enough to rebuild every context on resume
+            checkpoint["completed"] = [plan.nodes[index].id for index in sorted(completed)]
+            checkpoint["skipped"] = [plan.nodes[index].id for index in sorted(skipped)]
+            checkpoint["waiting"] = {plan.nodes[index].id: resume_at for index, resume_at in waiting.items()}
+            checkpoint["outputs"] = {plan.nodes[index].id: results[index] for index in sorted(completed) if index in results}
         
-        # Update execution data
-        execution.execution_data.update(context)
+        return contexts
     
-    async def _execute_node(self, node, context: Dict[str, Any]) -> Dict[str, Any]:
-        """Execute a single workflow node."""
+    def _node_timeout(self, node, deadline: Optional[float]) -> Optional[float]:
+        timeout = node.config.get("timeout_seconds")
+        if timeout is None and node.type in (NodeType.ACTION, NodeType.AI):
+            timeout = self.node_timeout
+        if deadline is not None:
+            remaining = deadline - self.clock()
+            if remaining <= 0:
+                raise NodeExecutionError("Execution deadline exceeded", ErrorClass.TIMEOUT)
+            timeout = remaining if timeout is None else min(timeout, remaining)
+        return timeout
+    
+    async def _execute_node(self, node, context: Mapping[str, Any], suspend_delays: bool = False,
+                            condition: Optional[Predicate] = None, batcher: Optional[ActionBatcher] = None,
+                            connection_id: Optional[str] = None, timeout: Optional[float] = None,
+                            user_id: Optional[str] = None) -> Dict[str, Any]:
+        """Execute a single workflow node (CONDITION nodes use their compiled plan predicate)."""
         result = {"node_id": node.id, "executed_at": datetime.utcnow().isoformat()}
         
         if node.type == NodeType.TRIGGER:
@@ -100,13 +574,27 @@ class WorkflowEngine:
         
         elif node.type == NodeType.ACTION:
             if node.integration:
-                # Execute integration action
-                action_result = await integrations_engine.execute_action(
-                    node.integration,
-                    node.config.get("action_id", "default"),
-                    node.config,
-                    context
-                )
+                # Execute integration action; a provider that keeps failing trips its circuit breaker
+                breaker = self.circuit_breakers.get(node.integration)
+                breaker.before_call()
+                try:
+                    action_result = await self._call_action(node, context, batcher, connection_id, timeout)
+                except asyncio.CancelledError:
+                    breaker.release_probe()
+                    raise
+                except Exception as e:
+                    breaker.record(classify_error(e))
+                    raise
+                
+                if action_result.get("status") == "error":
+                    # execute_action reports provider failures as results, not exceptions
+                    error_class = action_result.get("error_class") or classify_error(action_result.get("error", ""))
+                    breaker.record(error_class)
+                    raise NodeExecutionError(
+                        f"{node.integration}.{node.config.get('action_id', 'default')}: {action_result.get('error')}",
+                        error_class
+                    )
+                breaker.record(None)
                 result.update({
                     "type": "action",
                     "integration": node.integration,
@@ -119,8 +607,9 @@ class WorkflowEngine:
                 })
         
         elif node.type == NodeType.CONDITION:
-            # Evaluate condition
-            condition_result = self._evaluate_condition(node.config, context)
+            if condition is None:
+                condition = compile_node_condition(node.config)
+            condition_result = condition(context)
             result.update({
                 "type": "condition",
                 "condition_met": condition_result,
@@ -129,80 +618,157 @@ class WorkflowEngine:
         
         elif node.type == NodeType.DELAY:
             delay_seconds = node.config.get("delay_seconds", 1)
-            await asyncio.sleep(delay_seconds)
-            result.update({
-                "type": "delay",
-                "delay_seconds": delay_seconds,
-                "message": f"Delayed for {delay_seconds} seconds"
-            })
+            if suspend_delays and delay_seconds > self.inline_delay_threshold:
+                # Checkpoint instead of parking a coroutine; the delay scheduler resumes the execution
+                resume_at = datetime.utcnow() + timedelta(seconds=delay_seconds)
+                result.update({
+                    "type": "delay",
+                    "delay_seconds": delay_seconds,
+                    "resume_at": resume_at.isoformat(),
+                    "message": f"Delayed for {delay_seconds} seconds"
+                })
+            else:
+                await asyncio.sleep(delay_seconds)
+                result.update({
+                    "type": "delay",
+                    "delay_seconds": delay_seconds,
+                    "message": f"Delayed for {delay_seconds} seconds"
+                })
         
         elif node.type == NodeType.AI:
             # AI processing using GROQ
-            ai_result = await self._process_ai_node(node, context)
+            ai_result = await self._process_ai_node(node, context, timeout)
             result.update({
                 "type": "ai",
                 "ai_result": ai_result,
                 "message": f"AI processing completed: {node.name}"
             })
         
+        elif node.type == NodeType.SUBWORKFLOW:
+            subworkflow_result = await self._execute_subworkflow(node, context, user_id, timeout)
+            result.update({
+                "type": "subworkflow",
+                **subworkflow_result,
+                "message": f"Sub-workflow completed: {node.name}"
+            })
+        
         return result
     
-    def _evaluate_condition(self, condition_config: Dict[str, Any], context: Dict[str, Any]) -> bool:
-        """Evaluate a condition node."""
-        # Simple condition evaluation
-        field = condition_config.get("field")
-        operator = condition_config.get("operator", "equals")
-        value = condition_config.get("value")
+    async def _call_action(self, node, context: Mapping[str, Any], batcher: Optional[ActionBatcher],
+                           connection_id: Optional[str], timeout: Optional[float]) -> Dict[str, Any]:
+        """Call the integration action of an ACTION node (through batcher when given)."""
+        action_id = node.config.get("action_id", "default")
+        if batcher:
+            return await batcher.execute_action(
+                node.id, node.integration, action_id, node.config, context, connection_id, timeout
+            )
+        return await integrations_engine.execute_action(
+            node.integration, action_id, node.config, context, connection_id, timeout
+        )
+    
+    async def _execute_subworkflow(self, node, context: Mapping[str, Any], user_id: Optional[str],
+                                   timeout: Optional[float] = None) -> Dict[str, Any]:
+        """Run another workflow of the same user in-process, with the node's context as trigger data.
         
-        if field not in context:
-            return False
+        config: workflow_id, inputs (context keys to pass, default all), memoize and memoize_ttl.
+        Memoized results are keyed by the callee's version and a hash of the input, so editing
+        the callee or passing other data runs it again.
+        """
+        from cache_service import CACHE_CONFIGS, cache_service, generate_cache_key
+        callee_id = node.config.get("workflow_id")
+        stack = _subworkflow_stack.get()
+        if callee_id in stack:
+            raise NodeExecutionError(f"Sub-workflow {callee_id} is already running in this call chain", ErrorClass.CLIENT_ERROR)
+        if len(stack) > MAX_SUBWORKFLOW_DEPTH:
+            raise NodeExecutionError(f"Sub-workflows nested deeper than {MAX_SUBWORKFLOW_DEPTH} levels", ErrorClass.CLIENT_ERROR)
+        
+        workflow = await self._load_workflow(callee_id, user_id)
+        if workflow is None:
+            raise NodeExecutionError(f"Sub-workflow {callee_id} not found", ErrorClass.CLIENT_ERROR)
         
-        context_value = context[field]
+        data = as_dict(context)
+        inputs = node.config.get("inputs")
+        if inputs:
+            data = {key: data[key] for key in inputs if key in data}
         
-        if operator == "equals":
-            return context_value == value
-        elif operator == "contains":
-            return value in str(context_value)
-        elif operator == "greater_than":
-            return float(context_value) > float(value)
-        elif operator == "less_than":
-            return float(context_value) < float(value)
+        cache_key = None
+        if node.config.get("memoize"):
+            digest = hashlib.sha256(json.dumps(data, sort_keys=True, default=str).encode()).hexdigest()
+            cache_key = generate_cache_key("subworkflow", callee_id, workflow.updated_at.isoformat(), digest)
+            output = await cache_service.get(cache_key)
+            if output is not None:
+                return {"workflow_id": callee_id, "output": output, "memoized": True}
         
-        return False
+        plan = execution_plan_cache.get_plan(workflow)
+        token = _subworkflow_stack.set(stack + (callee_id,))
+        try:
+            contexts = await self._execute_dag(
+                plan, data, self.max_concurrency, {},
+                deadline=self.clock() + timeout if timeout is not None else None
+            )
+        except NodeExecutionError as e:
+            raise NodeExecutionError(f"Sub-workflow '{workflow.name}' failed: {e}", e.error_class) from e
+        finally:
+            _subworkflow_stack.reset(token)
+        
+        output = {plan.nodes[sink].id: dict(contexts[sink].frame) for sink in plan.sink_indexes if sink in contexts}
+        if cache_key:
+            ttl = node.config.get("memoize_ttl") or CACHE_CONFIGS["subworkflow_results"]["ttl"]
+            await cache_service.set(cache_key, output, ttl)
+        return {"workflow_id": callee_id, "output": output, "memoized": False}
     
-    async def _process_ai_node(self, node, context: Dict[str, Any]) -> Dict[str, Any]:
-        """Process an AI node using GROQ."""
+    async def _load_workflow(self, workflow_id: str, user_id: Optional[str]) -> Optional[Workflow]:
+        from database import get_database
+        workflow_data = await get_database().workflows.find_one({"id": workflow_id, "user_id": user_id})
+        if not workflow_data:
+            return None
+        workflow_data.pop('_id', None)
+        return Workflow(**workflow_data)
+    
+    async def _process_ai_node(self, node, context: Mapping[str, Any], timeout: Optional[float] = None) -> Dict[str, Any]:
+        """Process an AI node using GROQ; failures raise NodeExecutionError so the node can be retried."""
+        from ai_service import ai_service
+        # The prompt needs the whole context as plain data
+        context = as_dict(context)
+        # Use the real AI service for processing
+        prompt = node.config.get("prompt", f"Process the following context: {context}")
         try:
-            from ai_service import ai_service
-            # Use the real AI service for processing
-            prompt = node.config.get("prompt", f"Process the following context: {context}")
-            ai_response = await ai_service.process_with_groq(prompt, context)
-            
-            return {
-                "ai_response": ai_response.get("response", "AI processing completed"),
-                "confidence": ai_response.get("confidence", 0.95),
-                "processing_time": ai_response.get("processing_time", 0.5)
-            }
+            ai_response = await ai_service.process_with_groq(prompt, context, timeout=timeout)
         except Exception as e:
             logger.error(f"AI processing failed: {str(e)}")
-            return {
-                "ai_response": f"AI processing failed: {str(e)}",
-                "confidence": 0.0,
-                "error": str(e)
-            }
+            raise NodeExecutionError(f"AI processing failed: {e}", classify_error(e))
+        
+        if ai_response.get("error"):
+            # ai_service reports provider failures in the response
+            raise NodeExecutionError(f"AI processing failed: {ai_response['error']}", classify_error(ai_response["error"]))
+        
+        return {
+            "ai_response": ai_response.get("response", "AI processing completed"),
+            "confidence": ai_response.get("confidence", 0.95),
+            "processing_time": ai_response.get("processing_time", 0.5)
+        }
     
     def cancel_workflow(self, execution_id: str) -> bool:
-        """Cancel a running workflow."""
-        if execution_id in self.running_workflows:
-            task = self.running_workflows[execution_id]
-            task.cancel()
-            del self.running_workflows[execution_id]
-            return True
-        return False
+        """Cancel a workflow running in this process; its execution finishes as CANCELLED."""
+        task = self.running_workflows.get(execution_id)
+        if task is None or task.done():
+            return False
+        self._cancel_requested.add(execution_id)
+        task.cancel()
+        return True
     
     def get_running_workflows(self) -> List[str]:
         """Get list of currently running workflow execution IDs."""
         return list(self.running_workflows.keys())
 
+async def _aiter_sync(items: Iterable[Any]):
+    for item in items:
+        yield item
+
 # Global instance
-workflow_engine = WorkflowEngine()
\ No newline at end of file
+workflow_engine = WorkflowEngine(
+    max_concurrency=int(os.environ.get("WORKFLOW_MAX_CONCURRENCY", "10")),
+    inline_delay_threshold=float(os.environ.get("INLINE_DELAY_MAX_SECONDS", "5")),
+    node_timeout=float(os.environ.get("NODE_TIMEOUT_SECONDS", "300")),
+    execution_timeout=float(os.environ.get("EXECUTION_TIMEOUT_SECONDS", "3600"))
+)
\ No newline at end of file
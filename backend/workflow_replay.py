@@ -0,0 +1,379 @@
+"""
+Deterministic workflow replay and load generation.
+
+A recording holds workflows plus, per recorded execution, its trigger payload,
+the integration and AI responses of its nodes and how long each node took. It
+is built from stored executions (``record_executions``) and saved as JSON.
+
+``replay`` runs a recording through a WorkflowEngine on an event loop with
+virtual time: provider calls return the recorded responses after a latency
+drawn from a configurable distribution, sleeps and timeouts complete as soon
+as nothing else can run, and a seeded RNG makes runs repeatable. The engine
+measures deadlines, node timeouts and traces on the loop's virtual clock,
+draws retry backoff from its own seeded RNG and keeps its circuit breakers
+to itself, so simulated errors and retries replay identically. The report
+gives throughput, latency percentiles and memory per execution, so engine
+changes can be measured before they are deployed.
+
+    python workflow_replay.py record --workflow-id <id> --limit 200 > recording.json
+    python workflow_replay.py replay recording.json --repeat 10 --concurrency 50 \\
+        --latency '{"default": {"dist": "lognormal", "median": 0.2, "sigma": 0.6}}'
+"""
+import argparse
+import asyncio
+import contextvars
+import json
+import math
+import random
+import selectors
+import sys
+import time
+import tracemalloc
+from typing import Any, Dict, List, Mapping, Optional
+
+from models import Workflow, ExecutionStatus, NodeType
+from workflow_engine import WorkflowEngine
+from retry_policy import CircuitBreakerRegistry, NodeExecutionError, circuit_breakers, classify_error
+
+RECORDING_VERSION = 1
+
+# Recorded execution whose responses the current task replays
+_current_case: contextvars.ContextVar = contextvars.ContextVar("replay_case")
+
+
+class _VirtualSelector(selectors.BaseSelector):
+    """Selector that never waits: a timeout moves the loop's virtual clock forward instead."""
+
+    def __init__(self, loop: "VirtualTimeLoop"):
+        self._loop = loop
+        self._keys: Dict[Any, selectors.SelectorKey] = {}
+
+    def register(self, fileobj, events, data=None):
+        fd = fileobj if isinstance(fileobj, int) else fileobj.fileno()
+        key = selectors.SelectorKey(fileobj, fd, events, data)
+        self._keys[fileobj] = key
+        return key
+
+    def unregister(self, fileobj):
+        return self._keys.pop(fileobj)
+
+    def select(self, timeout=None):
+        if timeout is None:
+            raise RuntimeError("Replay stalled: tasks are waiting on something other than time")
+        if timeout > 0:
+            self._loop.advance(timeout)
+        return []
+
+    def get_map(self):
+        return self._keys
+
+
+class VirtualTimeLoop(asyncio.SelectorEventLoop):
+    """Event loop on a virtual clock; real I/O and threads are not supported."""
+
+    def __init__(self):
+        self._virtual_now = 0.0
+        super().__init__(selector=_VirtualSelector(self))
+
+    def time(self) -> float:
+        return self._virtual_now
+
+    def advance(self, seconds: float):
+        self._virtual_now += seconds
+
+
+class LatencyModel:
+    """Samples simulated call latencies (seconds) per integration, "ai" or "default".
+
+    Distributions: {"dist": "fixed", "value": s}, {"dist": "uniform", "low": a, "high": b},
+    {"dist": "exponential", "mean": m}, {"dist": "lognormal", "median": m, "sigma": s} and
+    {"dist": "recorded", "scale": 1.0, "fallback": {...}} (the node's recorded duration, the
+    fallback distribution for nodes without one).
+    """
+
+    def __init__(self, spec: Optional[Dict[str, Dict[str, Any]]] = None, seed: int = 0):
+        self.spec = spec or {"default": {"dist": "recorded"}}
+        self.rng = random.Random(seed)
+
+    def sample(self, key: Optional[str], recorded: Optional[float]) -> float:
+        spec = self.spec.get(key) or self.spec.get("default") or {"dist": "fixed", "value": 0}
+        return self._draw(spec, recorded)
+
+    def _draw(self, spec: Dict[str, Any], recorded: Optional[float]) -> float:
+        dist = spec.get("dist", "fixed")
+        if dist == "recorded":
+            if recorded is not None:
+                return recorded * spec.get("scale", 1.0)
+            return self._draw(spec.get("fallback") or {"dist": "fixed", "value": 0}, None)
+        if dist == "fixed":
+            return spec.get("value", 0.0)
+        if dist == "uniform":
+            return self.rng.uniform(spec.get("low", 0.0), spec.get("high", 1.0))
+        if dist == "exponential":
+            return self.rng.expovariate(1 / spec.get("mean", 0.1))
+        if dist == "lognormal":
+            return spec.get("median", 0.1) * self.rng.lognormvariate(0, spec.get("sigma", 0.5))
+        raise ValueError(f"Unknown latency distribution: {dist}")
+
+
+class ReplayEngine(WorkflowEngine):
+    """WorkflowEngine whose provider calls and workflow lookups are served from a recording.
+
+    Circuit breakers start closed for every engine (with the process-wide thresholds)
+    and run on the engine's clock.
+    """
+
+    def __init__(self, recording: Dict[str, Any], latency: LatencyModel, error_rate: float = 0.0, **kwargs):
+        clock = kwargs.setdefault("clock", time.monotonic)
+        kwargs.setdefault("breakers", CircuitBreakerRegistry(
+            circuit_breakers.failure_threshold, circuit_breakers.reset_timeout, clock
+        ))
+        super().__init__(**kwargs)
+        self.workflows = {workflow_id: Workflow(**data) for workflow_id, data in recording["workflows"].items()}
+        self.latency = latency
+        self.error_rate = error_rate
+        self.provider_calls = 0
+
+    async def _simulate(self, node, key: Optional[str]):
+        self.provider_calls += 1
+        case = _current_case.get({})
+        await asyncio.sleep(self.latency.sample(key, case.get("latencies", {}).get(node.id)))
+        if self.error_rate and self.latency.rng.random() < self.error_rate:
+            return "503 Service Unavailable (simulated)"
+        return None
+
+    async def _call_action(self, node, context: Mapping[str, Any], batcher, connection_id: Optional[str],
+                           timeout: Optional[float]) -> Dict[str, Any]:
+        error = await self._simulate(node, node.integration)
+        if error:
+            return {"status": "error", "integration": node.integration, "error": error}
+        return _current_case.get({}).get("responses", {}).get(node.id) or {"status": "success", "integration": node.integration}
+
+    async def _process_ai_node(self, node, context: Mapping[str, Any], timeout: Optional[float] = None) -> Dict[str, Any]:
+        error = await self._simulate(node, "ai")
+        if error:
+            raise NodeExecutionError(f"AI processing failed: {error}", classify_error(error))
+        return _current_case.get({}).get("ai_results", {}).get(node.id) or {"ai_response": "", "confidence": 0.95}
+
+    async def _load_workflow(self, workflow_id: str, user_id: Optional[str]) -> Optional[Workflow]:
+        return self.workflows.get(workflow_id)
+
+
+def _percentile(values: List[float], percent: float) -> float:
+    """Nearest-rank percentile of sorted values."""
+    if not values:
+        return 0.0
+    rank = max(0, math.ceil(percent / 100 * len(values)) - 1)
+    return values[min(rank, len(values) - 1)]
+
+
+def replay(recording: Dict[str, Any], repeat: int = 1, concurrency: Optional[int] = 10,
+           arrival_rate: Optional[float] = None, latency: Optional[Dict[str, Dict[str, Any]]] = None,
+           error_rate: float = 0.0, seed: int = 0, max_concurrency: int = 10) -> Dict[str, Any]:
+    """Replay every recorded execution `repeat` times and report throughput, latency and memory.
+
+    Load is closed-loop with `concurrency` executions in flight, or open-loop with Poisson
+    arrivals at `arrival_rate` executions per virtual second when that is given.
+    """
+    if recording.get("version") != RECORDING_VERSION:
+        raise ValueError(f"Unsupported recording version: {recording.get('version')}")
+    cases = recording["executions"] * repeat
+    model = LatencyModel(latency, seed)
+    loop = VirtualTimeLoop()
+    engine = ReplayEngine(
+        recording, model, error_rate, max_concurrency=max_concurrency,
+        clock=loop.time, rng=random.Random(f"{seed}:retries")
+    )
+    latencies: List[float] = []
+    statuses: Dict[str, int] = {}
+    in_flight = 0
+    peak_in_flight = 0
+
+    async def run_case(case: Dict[str, Any]):
+        nonlocal in_flight, peak_in_flight
+        _current_case.set(case)
+        workflow = engine.workflows[case["workflow_id"]]
+        loop = asyncio.get_running_loop()
+        in_flight += 1
+        peak_in_flight = max(peak_in_flight, in_flight)
+        started = loop.time()
+        execution = await engine.execute_workflow(workflow, dict(case.get("trigger_data") or {}))
+        latencies.append(loop.time() - started)
+        in_flight -= 1
+        statuses[execution.status.value] = statuses.get(execution.status.value, 0) + 1
+
+    async def closed_loop():
+        queue = list(reversed(cases))
+
+        async def worker():
+            while queue:
+                await run_case(queue.pop())
+
+        await asyncio.gather(*(worker() for _ in range(max(1, concurrency or 1))))
+
+    async def open_loop():
+        tasks = []
+        for case in cases:
+            tasks.append(asyncio.create_task(run_case(case)))
+            await asyncio.sleep(model.rng.expovariate(arrival_rate))
+        await asyncio.gather(*tasks)
+
+    tracing = tracemalloc.is_tracing()
+    if not tracing:
+        tracemalloc.start()
+    tracemalloc.reset_peak()
+    baseline = tracemalloc.get_traced_memory()[0]
+    wall_started = time.perf_counter()
+    try:
+        loop.run_until_complete(open_loop() if arrival_rate else closed_loop())
+        virtual_seconds = loop.time()
+    finally:
+        wall_seconds = time.perf_counter() - wall_started
+        peak = tracemalloc.get_traced_memory()[1]
+        if not tracing:
+            tracemalloc.stop()
+        loop.run_until_complete(loop.shutdown_asyncgens())
+        loop.close()
+
+    latencies.sort()
+    executions = len(latencies)
+    return {
+        "executions": executions,
+        "statuses": statuses,
+        "provider_calls": engine.provider_calls,
+        "virtual_seconds": round(virtual_seconds, 6),
+        "wall_seconds": round(wall_seconds, 6),
+        "throughput": {
+            "per_virtual_second": round(executions / virtual_seconds, 3) if virtual_seconds else None,
+            "per_wall_second": round(executions / wall_seconds, 3) if wall_seconds else None
+        },
+        "latency_seconds": {
+            "p50": round(_percentile(latencies, 50), 6),
+            "p90": round(_percentile(latencies, 90), 6),
+            "p99": round(_percentile(latencies, 99), 6),
+            "max": round(latencies[-1], 6) if latencies else 0.0,
+            "mean": round(sum(latencies) / executions, 6) if executions else 0.0
+        },
+        "memory": {
+            "peak_bytes": peak - baseline,
+            "peak_in_flight": peak_in_flight,
+            "per_execution_bytes": (peak - baseline) // max(peak_in_flight, 1)
+        }
+    }
+
+
+def recording_case(workflow: Workflow, execution: Dict[str, Any]) -> Dict[str, Any]:
+    """Turn a stored execution document into a replayable case."""
+    outputs = (execution.get("checkpoint") or {}).get("outputs", {})
+    nodes = {node.id: node for node in workflow.nodes}
+    responses, ai_results = {}, {}
+    for node_id, output in outputs.items():
+        node = nodes.get(node_id)
+        if node is None:
+            continue
+        if node.type == NodeType.ACTION and "result" in output:
+            responses[node_id] = output["result"]
+        elif node.type == NodeType.AI and "ai_result" in output:
+            ai_results[node_id] = output["ai_result"]
+    latencies = {
+        entry["node_id"]: entry["duration"] for entry in execution.get("execution_log", [])
+        if entry.get("status") == ExecutionStatus.SUCCESS.value and "duration" in entry
+    }
+    return {
+        "workflow_id": workflow.id,
+        "execution_id": execution.get("id"),
+        # Executions from before trigger_data was stored only have the (merged) execution data
+        "trigger_data": execution.get("trigger_data") or execution.get("execution_data") or {},
+        "responses": responses,
+        "ai_results": ai_results,
+        "latencies": latencies
+    }
+
+
+async def record_executions(workflow_id: Optional[str] = None, execution_ids: Optional[List[str]] = None,
+                            limit: int = 100) -> Dict[str, Any]:
+    """Build a recording from stored executions (latest first) and the workflows they ran."""
+    from database import get_database
+    db = get_database()
+    query: Dict[str, Any] = {"status": {"$in": [ExecutionStatus.SUCCESS.value, ExecutionStatus.FAILED.value]}}
+    if workflow_id:
+        query["workflow_id"] = workflow_id
+    if execution_ids:
+        query["id"] = {"$in": execution_ids}
+    executions = await db.workflow_executions.find(query, {"_id": 0}).sort([("started_at", -1)]).to_list(length=limit)
+
+    workflows: Dict[str, Workflow] = {}
+    cases = []
+    for execution in executions:
+        workflow_id = execution["workflow_id"]
+        if workflow_id not in workflows:
+            data = await db.workflows.find_one({"id": workflow_id}, {"_id": 0})
+            if not data:
+                continue
+            workflows[workflow_id] = Workflow(**data)
+        cases.append(recording_case(workflows[workflow_id], execution))
+
+    # Workflows called by SUBWORKFLOW nodes are needed too
+    pending = [node.config.get("workflow_id") for workflow in workflows.values()
+               for node in workflow.nodes if node.type == NodeType.SUBWORKFLOW]
+    while pending:
+        callee_id = pending.pop()
+        if callee_id and callee_id not in workflows:
+            data = await db.workflows.find_one({"id": callee_id}, {"_id": 0})
+            if data:
+                workflows[callee_id] = Workflow(**data)
+                pending.extend(node.config.get("workflow_id") for node in workflows[callee_id].nodes
+                               if node.type == NodeType.SUBWORKFLOW)
+
+    return {
+        "version": RECORDING_VERSION,
+        "workflows": {workflow_id: json.loads(workflow.model_dump_json()) for workflow_id, workflow in workflows.items()},
+        "executions": cases
+    }
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Record and replay workflow executions")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    record_parser = commands.add_parser("record", help="Write a recording of stored executions to stdout")
+    record_parser.add_argument("--workflow-id")
+    record_parser.add_argument("--execution-id", action="append", dest="execution_ids")
+    record_parser.add_argument("--limit", type=int, default=100)
+
+    replay_parser = commands.add_parser("replay", help="Replay a recording and print a JSON report")
+    replay_parser.add_argument("recording")
+    replay_parser.add_argument("--repeat", type=int, default=1)
+    replay_parser.add_argument("--concurrency", type=int, default=10)
+    replay_parser.add_argument("--arrival-rate", type=float, help="Open-loop arrivals per virtual second")
+    replay_parser.add_argument("--latency", type=json.loads, help="Latency distributions as JSON")
+    replay_parser.add_argument("--error-rate", type=float, default=0.0,
+                               help="Share of provider calls failing with a 503 (these count toward circuit breakers)")
+    replay_parser.add_argument("--seed", type=int, default=0)
+    replay_parser.add_argument("--max-concurrency", type=int, default=10, help="Nodes in flight per execution")
+
+    args = parser.parse_args(argv)
+    if args.command == "record":
+        from database import connect_to_mongo, close_mongo_connection
+
+        async def record():
+            await connect_to_mongo()
+            try:
+                return await record_executions(args.workflow_id, args.execution_ids, args.limit)
+            finally:
+                await close_mongo_connection()
+
+        json.dump(asyncio.run(record()), sys.stdout, default=str)
+    else:
+        with open(args.recording) as f:
+            recording = json.load(f)
+        report = replay(
+            recording, repeat=args.repeat, concurrency=args.concurrency, arrival_rate=args.arrival_rate,
+            latency=args.latency, error_rate=args.error_rate, seed=args.seed, max_concurrency=args.max_concurrency
+        )
+        json.dump(report, sys.stdout, indent=2)
+    sys.stdout.write("\n")
+
+
+if __name__ == "__main__":
+    main()
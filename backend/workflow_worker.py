@@ -0,0 +1,121 @@
+"""
+Standalone workflow execution workers.
+
+    python -m workflow_worker --processes 4 --concurrency 8
+
+Every process runs its own event loop and MongoDB connection and consumes the
+shared execution queue, so execution throughput scales with the number of
+cores. Each process fires the delay timers of the executions it suspends; only
+the first also reloads timers from MongoDB (picking up those of processes that
+died) and runs the reaper of orphaned executions, so their MongoDB polling does
+not grow with the process count. Run the API with EXECUTION_WORKERS=0 so that it only serves requests,
+and give both the same REDIS_URL so progress streams served by the API get the
+workers' execution events live (see execution_events).
+"""
+import argparse
+import asyncio
+import logging
+import multiprocessing
+import os
+import signal
+import time
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+ROOT_DIR = Path(__file__).parent
+load_dotenv(ROOT_DIR / '.env')
+
+logger = logging.getLogger("workflow_worker")
+
+
+async def _serve(concurrency: int, poll_interval: float, run_maintenance: bool):
+    """Consume the execution queue until SIGTERM/SIGINT."""
+    from database import connect_to_mongo, close_mongo_connection
+    from execution_queue import execution_queue, ExecutionWorkerPool
+
+    await connect_to_mongo()
+    pool = ExecutionWorkerPool(
+        execution_queue, concurrency=concurrency, poll_interval=poll_interval, run_maintenance=run_maintenance
+    )
+    pool.start()
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, stop.set)
+
+    await stop.wait()
+    logger.info(f"Worker process {os.getpid()} shutting down")
+    await pool.stop()
+    await close_mongo_connection()
+
+
+def _run_process(concurrency: int, poll_interval: float, run_maintenance: bool):
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    asyncio.run(_serve(concurrency, poll_interval, run_maintenance))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run workflow execution worker processes")
+    parser.add_argument("--processes", type=int,
+                        default=int(os.environ.get("WORKER_PROCESSES", os.cpu_count() or 1)),
+                        help="number of worker processes (default: CPU count)")
+    parser.add_argument("--concurrency", type=int,
+                        default=int(os.environ.get("WORKER_CONCURRENCY", "4")),
+                        help="concurrent executions per process")
+    parser.add_argument("--poll-interval", type=float, default=1.0,
+                        help="seconds between queue polls when idle")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
+    # Spawn keeps children free of the parent's (and any inherited) event loop state
+    context = multiprocessing.get_context("spawn")
+    processes = []
+    stopping = False
+
+    def request_stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+
+    signal.signal(signal.SIGTERM, request_stop)
+    signal.signal(signal.SIGINT, request_stop)
+
+    def spawn(number: int):
+        # Process 0 (and its replacements) reloads persisted timers and runs the reaper
+        process_args = (args.concurrency, args.poll_interval, number == 0)
+        process = context.Process(target=_run_process, args=process_args, daemon=False)
+        process.start()
+        return process
+
+    for number in range(args.processes):
+        processes.append(spawn(number))
+    logger.info(f"🚀 Started {args.processes} worker processes x {args.concurrency} concurrent executions")
+
+    # Supervise: replace processes that die unexpectedly
+    while not stopping:
+        time.sleep(1)
+        for number, process in enumerate(processes):
+            if not process.is_alive() and not stopping:
+                logger.warning(f"Worker process {process.pid} exited with {process.exitcode}, restarting")
+                processes[number] = spawn(number)
+
+    for process in processes:
+        if process.is_alive():
+            process.terminate()
+    for process in processes:
+        process.join(timeout=30)
+        if process.is_alive():
+            process.kill()
+    logger.info("Workers stopped")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+CacheService get/set/invalidate_pattern at 10k to 1M keys, per eviction policy.
+
+Instances are created on a running loop so their cleanup task starts right away.
+Above the default 50k-entry budget, sets also measure eviction.
+"""
+from typing import Dict, Iterator
+
+from harness import measure_async, run_async
+
+SIZES = {"quick": [10_000], "full": [10_000, 100_000, 1_000_000]}
+POLICIES = ["lru", "lfu", "w-tinylfu"]
+NAMESPACES = 10
+
+
+def _key(index: int) -> str:
+    return f"ns{index % NAMESPACES}:item:{index}"
+
+
+def _value(index: int) -> Dict:
+    return {"id": index, "name": f"item-{index}", "tags": ["a", "b"], "score": index * 0.5}
+
+
+async def _bench_size(size: int, policy: str) -> list:
+    from cache_service import CacheService
+
+    cache = CacheService(policy=policy)
+    keys = [_key(index) for index in range(size)]
+    values = [_value(index) for index in range(size)]
+    params = {"keys": size, "policy": policy}
+    repeat = 3 if size >= 1_000_000 else 5
+    results = []
+
+    async def fill():
+        for key, value in zip(keys, values):
+            await cache.set(key, value)
+
+    async def clear():
+        await cache.clear()
+
+    results.append(await measure_async("cache.set", fill, params, ops=size, repeat=repeat, warmup=0, setup=clear))
+
+    await fill()
+
+    async def get_hits():
+        for key in keys:
+            await cache.get(key)
+
+    async def get_misses():
+        for index in range(size):
+            await cache.get(f"missing:{index}")
+
+    results.append(await measure_async("cache.get_hit", get_hits, params, ops=size, repeat=repeat))
+    results.append(await measure_async("cache.get_miss", get_misses, params, ops=size, repeat=repeat))
+
+    async def refill_namespace():
+        for index in range(0, size, NAMESPACES):
+            await cache.set(keys[index], values[index])
+
+    async def invalidate():
+        await cache.invalidate_pattern("ns0:*")
+
+    results.append(await measure_async(
+        "cache.invalidate_pattern", invalidate, params, ops=1, repeat=repeat, warmup=0, setup=refill_namespace
+    ))
+    results.append(await measure_async("cache.get_stats", cache.get_stats, params, ops=1, repeat=repeat))
+
+    cache._cleanup_task.cancel()
+    return results
+
+
+def bench_cache(preset: str) -> Iterator[Dict]:
+    for size in SIZES[preset]:
+        for policy in POLICIES:
+            yield from run_async(_bench_size(size, policy))
+
+
+BENCHMARKS = [bench_cache]
@@ -0,0 +1,59 @@
+"""
+Template and integration catalog search, and template document serialization.
+"""
+import copy
+from datetime import datetime
+from typing import Dict, Iterator
+
+from harness import measure
+
+QUERIES = ["email", "slack", "ai", "data", "zzz-no-match"]
+
+
+def bench_catalog_search(preset: str) -> Iterator[Dict]:
+    from massive_expansion_complete import massive_integrations_system_complete, massive_template_system_complete
+
+    templates = massive_template_system_complete
+    integrations = massive_integrations_system_complete
+    for query in QUERIES:
+        params = {"query": query, "templates": len(templates.templates)}
+        yield measure("catalog.search_templates", lambda: templates.search_templates(query), params, repeat=20)
+        params = {"query": query, "integrations": len(integrations.integrations)}
+        yield measure("catalog.search_integrations", lambda: integrations.search_integrations(query), params, repeat=20)
+
+    params = {"category": "business_automation", "difficulty": "beginner"}
+    yield measure(
+        "catalog.search_templates_filtered",
+        lambda: templates.search_templates("", "business_automation", "beginner"), params, repeat=20
+    )
+
+
+def bench_serialize_doc(preset: str) -> Iterator[Dict]:
+    from bson import ObjectId
+    from massive_expansion_complete import massive_template_system_complete
+    from routes.templates_routes import serialize_doc
+
+    # Template documents as they come out of MongoDB
+    documents = []
+    for template in massive_template_system_complete.get_all_templates():
+        document = copy.deepcopy(template)
+        document["_id"] = ObjectId()
+        document["created_by"] = ObjectId()
+        document["created_at"] = datetime.utcnow()
+        documents.append(document)
+    count = len(documents) if preset == "quick" else len(documents) * 10
+    batch = (documents * 10)[:count]
+    working = []
+
+    def fresh_copies():
+        # serialize_doc converts in place
+        working[:] = [copy.deepcopy(document) for document in batch]
+
+    def serialize_all():
+        for document in working:
+            serialize_doc(document)
+
+    yield measure("templates.serialize_doc", serialize_all, {"documents": count}, ops=count, setup=fresh_copies)
+
+
+BENCHMARKS = [bench_catalog_search, bench_serialize_doc]
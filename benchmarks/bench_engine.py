@@ -0,0 +1,72 @@
+"""
+WorkflowEngine on synthetic DAGs: plan compilation and execution.
+
+Nodes are custom ACTIONs (no integration, so no I/O) and CONDITIONs, wired
+as a chain, a fan-out/fan-in and a layered random DAG.
+"""
+import random
+from typing import Dict, Iterator, List
+
+from harness import measure, measure_async, run_async
+from models import NodeType, Workflow, WorkflowConnection, WorkflowNode
+
+SIZES = {"quick": [10, 100], "full": [10, 100, 1000]}
+
+
+def _node(index: int) -> WorkflowNode:
+    if index % 5 == 4:
+        return WorkflowNode(id=f"n{index}", type=NodeType.CONDITION, name=f"n{index}",
+                            config={"field": "value", "operator": "greater_than", "value": 10})
+    return WorkflowNode(id=f"n{index}", type=NodeType.ACTION, name=f"n{index}")
+
+
+def build_workflow(shape: str, size: int, seed: int = 0) -> Workflow:
+    """Trigger plus `size` nodes connected as a chain, fan-out/fan-in or layered DAG."""
+    trigger = WorkflowNode(id="trigger", type=NodeType.TRIGGER, name="trigger")
+    nodes = [_node(index) for index in range(size)]
+    edges: List[tuple] = []
+    if shape == "chain":
+        edges = [("trigger", nodes[0].id)] + [(nodes[i].id, nodes[i + 1].id) for i in range(size - 1)]
+    elif shape == "fan":
+        middle, sink = nodes[:-1], nodes[-1]
+        edges = [("trigger", node.id) for node in middle] + [(node.id, sink.id) for node in middle]
+    else:
+        rng = random.Random(seed)
+        width = max(2, int(size ** 0.5))
+        layers = [nodes[i:i + width] for i in range(0, size, width)]
+        edges = [("trigger", node.id) for node in layers[0]]
+        for previous, layer in zip(layers, layers[1:]):
+            for node in layer:
+                for parent in rng.sample(previous, min(2, len(previous))):
+                    edges.append((parent.id, node.id))
+    return Workflow(
+        user_id="benchmark",
+        name=f"{shape}-{size}",
+        nodes=[trigger] + nodes,
+        connections=[WorkflowConnection(from_node=source, to_node=target) for source, target in edges]
+    )
+
+
+def bench_engine(preset: str) -> Iterator[Dict]:
+    from execution_plan import ExecutionPlan
+    from workflow_engine import WorkflowEngine
+
+    engine = WorkflowEngine(max_concurrency=50)
+    for shape in ("chain", "fan", "layered"):
+        for size in SIZES[preset]:
+            workflow = build_workflow(shape, size)
+            params = {"shape": shape, "nodes": size}
+            yield measure("engine.compile_plan", lambda: ExecutionPlan.compile(workflow), params, ops=1)
+
+            async def execute():
+                execution = await engine.execute_workflow(workflow, {"value": 42})
+                if execution.status.value != "success":
+                    raise RuntimeError(f"{workflow.name} failed: {execution.error_message}")
+
+            async def timed():
+                return await measure_async("engine.execute", execute, params, ops=size, repeat=3 if size >= 1000 else 5)
+
+            yield run_async(timed())
+
+
+BENCHMARKS = [bench_engine]
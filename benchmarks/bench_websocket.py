@@ -0,0 +1,60 @@
+"""
+WebSocketManager broadcast fan-out to collaboration rooms.
+
+Connections are in-memory stand-ins whose send_text only counts messages,
+so the numbers are the manager's own overhead (JSON encoding and the send loop).
+"""
+from typing import Dict, Iterator
+
+from harness import measure_async, run_async
+
+SIZES = {"quick": [10, 100], "full": [10, 100, 1000]}
+
+
+class _NullWebSocket:
+    __slots__ = ("sent",)
+
+    def __init__(self):
+        self.sent = 0
+
+    async def send_text(self, text: str):
+        self.sent += 1
+
+
+async def _bench_room(connections: int) -> list:
+    from websocket_manager import CollaborationRoom, WebSocketManager
+
+    manager = WebSocketManager()
+    room = manager.rooms["workflow"] = CollaborationRoom("workflow")
+    for index in range(connections):
+        room.connections[f"c{index}"] = _NullWebSocket()
+    update = {
+        "type": "node_finished",
+        "node_id": "fetch_orders",
+        "status": "success",
+        "duration": 0.153,
+        "output": {"rows": list(range(20))}
+    }
+    params = {"connections": connections}
+    messages = 100
+
+    async def broadcast():
+        for _ in range(messages):
+            await manager.broadcast_workflow_execution_update("workflow", update)
+
+    async def broadcast_others():
+        for _ in range(messages):
+            await room.broadcast_to_others("c0", update)
+
+    return [
+        await measure_async("websocket.broadcast_execution_update", broadcast, params, ops=messages * connections),
+        await measure_async("websocket.broadcast_to_others", broadcast_others, params, ops=messages * (connections - 1))
+    ]
+
+
+def bench_websocket(preset: str) -> Iterator[Dict]:
+    for connections in SIZES[preset]:
+        yield from run_async(_bench_room(connections))
+
+
+BENCHMARKS = [bench_websocket]
@@ -0,0 +1,75 @@
+"""
+Timing helpers shared by the benchmark modules.
+
+A benchmark is a function taking the size preset ("quick" or "full") and
+yielding result dicts built with ``measure`` / ``measure_async``. Each result
+reports the median and best time of several repeats plus operations per
+second, so runs can be compared with ``run.py --compare``.
+"""
+import asyncio
+import gc
+import os
+import statistics
+import sys
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+# The backend is a flat set of modules run from its own directory
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend")
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+
+def _result(name: str, params: Dict[str, Any], ops: int, times: list) -> Dict[str, Any]:
+    median = statistics.median(times)
+    return {
+        "benchmark": name,
+        "params": params,
+        "ops": ops,
+        "repeat": len(times),
+        "median_s": round(median, 9),
+        "min_s": round(min(times), 9),
+        "ops_per_s": round(ops / median, 3) if median else None
+    }
+
+
+def measure(name: str, fn: Callable[[], Any], params: Optional[Dict[str, Any]] = None, ops: int = 1,
+            repeat: int = 5, warmup: int = 1, setup: Optional[Callable[[], Any]] = None) -> Dict[str, Any]:
+    """Time fn() `repeat` times; setup() runs untimed before every call."""
+    for _ in range(warmup):
+        if setup:
+            setup()
+        fn()
+    times = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        gc.collect()
+        started = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - started)
+    return _result(name, params or {}, ops, times)
+
+
+async def measure_async(name: str, fn: Callable[[], Awaitable[Any]], params: Optional[Dict[str, Any]] = None,
+                        ops: int = 1, repeat: int = 5, warmup: int = 1,
+                        setup: Optional[Callable[[], Awaitable[Any]]] = None) -> Dict[str, Any]:
+    """Async counterpart of measure(); must be awaited on a running loop."""
+    for _ in range(warmup):
+        if setup:
+            await setup()
+        await fn()
+    times = []
+    for _ in range(repeat):
+        if setup:
+            await setup()
+        gc.collect()
+        started = time.perf_counter()
+        await fn()
+        times.append(time.perf_counter() - started)
+    return _result(name, params or {}, ops, times)
+
+
+def run_async(coro):
+    """Run an async benchmark body on a fresh event loop."""
+    return asyncio.run(coro)
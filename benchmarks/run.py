@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Run the micro-benchmark suite and write machine-readable JSON results.
+
+    python benchmarks/run.py --preset quick --output results.json
+    python benchmarks/run.py --compare baseline.json --threshold 0.2
+
+With --compare, exits non-zero when any benchmark's median time is more
+than `threshold` slower than the matching entry in the baseline file.
+"""
+import argparse
+import importlib
+import json
+import logging
+import os
+import platform
+import sys
+from datetime import datetime, timezone
+from typing import Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import harness  # noqa: E402,F401  (puts the backend on sys.path)
+
+MODULES = ["bench_engine", "bench_cache", "bench_catalog", "bench_websocket"]
+
+
+def _result_key(result: Dict) -> str:
+    return result["benchmark"] + json.dumps(result["params"], sort_keys=True)
+
+
+def run(preset: str, only: List[str]) -> List[Dict]:
+    results = []
+    for module_name in MODULES:
+        module = importlib.import_module(module_name)
+        for benchmark in module.BENCHMARKS:
+            if only and not any(pattern in benchmark.__name__ for pattern in only):
+                continue
+            print(f"# {benchmark.__name__}", file=sys.stderr)
+            for result in benchmark(preset):
+                params = " ".join(f"{key}={value}" for key, value in result["params"].items())
+                print(f"  {result['benchmark']:<40} {params:<36} "
+                      f"median {result['median_s'] * 1000:10.3f} ms  {result['ops_per_s'] or 0:14.1f} ops/s",
+                      file=sys.stderr)
+                results.append(result)
+    return results
+
+
+def compare(results: List[Dict], baseline: List[Dict], threshold: float) -> List[Dict]:
+    """Results whose median regressed by more than `threshold` against the baseline."""
+    previous = {_result_key(result): result for result in baseline}
+    regressions = []
+    for result in results:
+        before = previous.get(_result_key(result))
+        if not before or not before["median_s"]:
+            continue
+        change = result["median_s"] / before["median_s"] - 1
+        if change > threshold:
+            regressions.append({
+                "benchmark": result["benchmark"],
+                "params": result["params"],
+                "baseline_median_s": before["median_s"],
+                "median_s": result["median_s"],
+                "change": round(change, 4)
+            })
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--preset", choices=["quick", "full"], default="quick")
+    parser.add_argument("--only", action="append", default=[],
+                        help="run benchmark functions whose name contains this (repeatable)")
+    parser.add_argument("--output", help="write results JSON here (default: stdout)")
+    parser.add_argument("--compare", help="baseline results JSON to check for regressions")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="allowed slowdown of the median before failing (default 0.2 = 20%%)")
+    args = parser.parse_args(argv)
+
+    # Engine and cache log at INFO per call; keep the timings clean
+    logging.basicConfig(level=logging.WARNING)
+
+    report = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "preset": args.preset,
+        "results": run(args.preset, args.only)
+    }
+    if args.output:
+        with open(args.output, "w") as handle:
+            json.dump(report, handle, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+    if args.compare:
+        with open(args.compare) as handle:
+            baseline = json.load(handle)["results"]
+        regressions = compare(report["results"], baseline, args.threshold)
+        for regression in regressions:
+            print(f"REGRESSION {regression['benchmark']} {regression['params']}: "
+                  f"{regression['change']:+.1%}", file=sys.stderr)
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,22 @@
+import os
+import sys
+
+import pytest
+
+# The backend is a flat set of modules run from its own directory
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend")
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+
+@pytest.fixture
+def mongo():
+    """An in-memory MongoDB stand-in installed as the backend's database."""
+    from mongomock_motor import AsyncMongoMockClient
+    from database import db_instance
+
+    previous = db_instance.client, db_instance.database
+    db_instance.client = AsyncMongoMockClient()
+    db_instance.database = db_instance.client["aether_automation_test"]
+    yield db_instance.database
+    db_instance.client, db_instance.database = previous
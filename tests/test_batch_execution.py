@@ -0,0 +1,49 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+
+from strategic_phase2_enterprise_scalability import BatchExecutionJob, DistributedExecutionEngine
+
+
+def make_engine(db):
+    return DistributedExecutionEngine(db, max_workers=2, cpu_capacity=100, memory_capacity_mb=1024)
+
+
+@pytest.mark.parametrize("options", [
+    {"priority": "urgent"},
+    {"priority": 3},
+    {"resources": {"cpu": "lots"}},
+    {"resources": {"gpu": 1}},
+    {"resources": {"cpu": 500}},
+])
+def test_invalid_batch_options_are_rejected_at_submission(mongo, options):
+    engine = make_engine(mongo)
+    with pytest.raises(ValueError):
+        engine.validate_batch_options(options)
+
+    result = asyncio.run(engine.submit_batch_execution(["wf-1"], "user-1", options))
+    assert result["status"] == "error"
+    assert asyncio.run(mongo.batch_executions.count_documents({})) == 0
+    assert engine.batch_queue.empty()
+
+
+def test_valid_batch_options_pass(mongo):
+    engine = make_engine(mongo)
+    engine.validate_batch_options({"priority": "High", "resources": {"cpu": 30, "memory": 256}})
+    engine.validate_batch_options({})
+
+
+def test_bad_priority_fails_each_workflow_instead_of_the_batch(mongo):
+    engine = make_engine(mongo)
+    batch_job = BatchExecutionJob(
+        batch_id="batch-1", workflow_ids=["wf-1", "wf-2"], user_id="user-1", batch_size=2,
+        execution_strategy="parallel", created_at=datetime.utcnow(), estimated_completion=datetime.utcnow(),
+        progress={"completed": 0, "failed": 0, "running": 0, "failures": []},
+        options={"priority": "urgent"}
+    )
+
+    asyncio.run(engine._process_batch(batch_job))
+    assert batch_job.status == "failed"
+    assert batch_job.progress["running"] == 0
+    assert [failure["workflow_id"] for failure in batch_job.progress["failures"]] == ["wf-1", "wf-2"]
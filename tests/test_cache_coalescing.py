@@ -0,0 +1,130 @@
+import asyncio
+
+import pytest
+
+from cache_service import CacheService
+
+
+class Factory:
+    """Counts calls; each returns the next version of the value."""
+
+    def __init__(self, delay=0.01, error=None):
+        self.calls = 0
+        self.delay = delay
+        self.error = error
+
+    async def __call__(self):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if self.error:
+            raise self.error
+        return f"v{self.calls}"
+
+
+async def settle(cache):
+    await asyncio.gather(*list(cache._inflight.values()), return_exceptions=True)
+
+
+def test_concurrent_misses_share_one_computation():
+    async def scenario():
+        cache = CacheService(namespaces={})
+        factory = Factory()
+        results = await asyncio.gather(*[cache.get_or_compute("key", factory) for _ in range(5)])
+        stats = await cache.get_stats()
+        return results, factory.calls, stats["namespaces"]["default"], await cache.get_or_compute("key", factory)
+
+    results, calls, stats, cached = asyncio.run(scenario())
+    assert results == ["v1"] * 5
+    assert calls == 1
+    assert (stats["misses"], stats["coalesced"]) == (5, 4)
+    assert cached == "v1"
+
+
+def test_failed_computation_raises_everywhere_and_caches_nothing():
+    async def scenario():
+        cache = CacheService(namespaces={})
+        failing = Factory(error=RuntimeError("down"))
+        results = await asyncio.gather(*[cache.get_or_compute("key", failing) for _ in range(3)],
+                                       return_exceptions=True)
+        retry = await cache.get_or_compute("key", Factory())
+        return results, failing.calls, retry
+
+    results, calls, retry = asyncio.run(scenario())
+    assert calls == 1
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert retry == "v1"
+
+
+def test_cancelled_caller_does_not_cancel_the_shared_computation():
+    async def scenario():
+        cache = CacheService(namespaces={})
+        factory = Factory(delay=0.05)
+        impatient = asyncio.create_task(cache.get_or_compute("key", factory))
+        patient = asyncio.create_task(cache.get_or_compute("key", factory))
+        await asyncio.sleep(0.01)
+        impatient.cancel()
+        return await patient, factory.calls
+
+    assert asyncio.run(scenario()) == ("v1", 1)
+
+
+def test_stale_value_is_served_while_one_refresh_runs():
+    async def scenario():
+        cache = CacheService(namespaces={}, early_refresh_beta=0)
+        factory = Factory()
+        await cache.get_or_compute("key", factory, ttl=60, stale_ttl=60)
+        cache.cache["key"].expiry -= 61
+        stale = [await cache.get_or_compute("key", factory, ttl=60, stale_ttl=60) for _ in range(3)]
+        plain_get = await cache.get("key")
+        await settle(cache)
+        stats = (await cache.get_stats())["namespaces"]["default"]
+        return stale, plain_get, factory.calls, await cache.get("key"), stats["stale_hits"]
+
+    stale, plain_get, calls, refreshed, stale_hits = asyncio.run(scenario())
+    assert stale == ["v1"] * 3
+    assert plain_get is None
+    assert calls == 2
+    assert refreshed == "v2"
+    assert stale_hits == 3
+
+
+def test_expired_past_stale_window_recomputes_inline():
+    async def scenario():
+        cache = CacheService(namespaces={}, early_refresh_beta=0)
+        factory = Factory()
+        await cache.get_or_compute("key", factory, ttl=60, stale_ttl=5)
+        cache.cache["key"].expiry -= 120
+        cache.cache["key"].stale_until -= 120
+        return await cache.get_or_compute("key", factory, ttl=60, stale_ttl=5)
+
+    assert asyncio.run(scenario()) == "v2"
+
+
+@pytest.mark.parametrize("beta, refreshes", [(1.0, 1), (0, 0)])
+def test_slow_computations_refresh_early(beta, refreshes):
+    async def scenario():
+        cache = CacheService(namespaces={}, early_refresh_beta=beta)
+        factory = Factory()
+        await cache.get_or_compute("key", factory, ttl=60)
+        # A computation this slow relative to the remaining TTL always refreshes (XFetch)
+        cache.cache["key"].compute_time = 1e6
+        served = await cache.get_or_compute("key", factory, ttl=60)
+        await settle(cache)
+        stats = (await cache.get_stats())["namespaces"]["default"]
+        return served, stats["early_refreshes"], await cache.get("key")
+
+    served, early_refreshes, current = asyncio.run(scenario())
+    assert served == "v1"
+    assert early_refreshes == refreshes
+    assert current == ("v2" if refreshes else "v1")
+
+
+def test_delete_during_computation_skips_the_write():
+    async def scenario():
+        cache = CacheService(namespaces={})
+        pending = asyncio.create_task(cache.get_or_compute("key", Factory()))
+        await asyncio.sleep(0)
+        await cache.delete("key")
+        return await pending, "key" in cache.cache
+
+    assert asyncio.run(scenario()) == ("v1", False)
@@ -0,0 +1,106 @@
+import asyncio
+
+import pytest
+
+from cache_eviction import make_policy
+from cache_service import CacheService
+
+
+def test_lru_evicts_least_recently_used():
+    policy = make_policy("lru", 3)
+    for key in ("a", "b", "c"):
+        policy.insert(key)
+    policy.access("a")
+    assert policy.evict() == "b"
+    assert policy.evict() == "c"
+    assert len(policy) == 1
+
+
+def test_lfu_evicts_least_frequent_then_least_recent():
+    policy = make_policy("lfu", 3)
+    for key in ("a", "b", "c"):
+        policy.insert(key)
+    policy.access("a")
+    policy.access("c")
+    assert policy.evict() == "b"
+    # a and c are tied at frequency 2: a was bumped first
+    assert policy.evict() == "a"
+
+
+def test_lfu_finds_the_minimum_after_removals():
+    policy = make_policy("lfu", 3)
+    for key in ("a", "b"):
+        policy.insert(key)
+    policy.access("b")
+    policy.remove("a")
+    assert policy.evict() == "b"
+    assert policy.evict() is None
+
+
+def test_unknown_policy_is_rejected():
+    with pytest.raises(ValueError):
+        make_policy("fifo", 10)
+
+
+def test_tinylfu_keeps_hot_keys_through_a_scan():
+    async def scenario(policy):
+        cache = CacheService(max_entries=100, policy=policy, namespaces={})
+        hot = [f"hot:{i}" for i in range(50)]
+        for key in hot:
+            await cache.set(key, "value")
+        for _ in range(5):
+            for key in hot:
+                await cache.get(key)
+        for i in range(1000):
+            await cache.set(f"scan:{i}", "value")
+        return sum([await cache.get(key) is not None for key in hot]), len(cache.cache)
+
+    tinylfu_kept, size = asyncio.run(scenario("w-tinylfu"))
+    lru_kept, _ = asyncio.run(scenario("lru"))
+    assert size == 100
+    assert tinylfu_kept >= 45
+    assert lru_kept == 0
+
+
+def test_namespace_quota_evicts_within_the_namespace():
+    async def scenario():
+        cache = CacheService(max_entries=10, namespaces={"users": {"max_entries": 2, "prefixes": ["user"]}})
+        await cache.set("other:1", "value")
+        for i in range(3):
+            await cache.set(f"user:{i}", "value")
+        return cache, await cache.get_stats()
+
+    cache, stats = asyncio.run(scenario())
+    assert sorted(cache.cache) == ["other:1", "user:1", "user:2"]
+    assert stats["namespaces"]["users"]["evictions"] == 1
+    assert stats["namespaces"]["users"]["entries"] == 2
+    assert stats["evictions"] == 1
+
+
+def test_global_budgets_take_from_the_largest_namespace():
+    async def scenario():
+        cache = CacheService(max_entries=4, max_bytes=1000, namespaces={"users": {"prefixes": ["user"]}})
+        await cache.set("user:1", "x" * 400)
+        await cache.set("other:1", "x" * 100)
+        await cache.set("other:2", "x" * 100)
+        # Bytes over budget: the users namespace holds the most and loses its entry
+        await cache.set("user:2", "x" * 500)
+        over_bytes = sorted(cache.cache)
+        for i in range(3, 6):
+            await cache.set(f"other:{i}", "x")
+        return over_bytes, cache
+
+    over_bytes, cache = asyncio.run(scenario())
+    assert over_bytes == ["other:1", "other:2", "user:2"]
+    assert len(cache.cache) == 4
+    assert "user:2" in cache.cache
+    assert cache.total_bytes == sum(entry.size for entry in cache.cache.values())
+
+
+def test_oversized_values_are_not_cached():
+    async def scenario():
+        cache = CacheService(max_bytes=10, namespaces={})
+        await cache.set("big", "x" * 11)
+        return await cache.get("big"), cache.total_bytes
+
+    assert asyncio.run(scenario()) == (None, 0)
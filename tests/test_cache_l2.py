@@ -0,0 +1,123 @@
+import asyncio
+
+import fakeredis
+import pytest
+
+from cache_l2 import RedisCacheTier
+from cache_service import CacheService
+
+
+@pytest.fixture
+def redis_server():
+    return fakeredis.FakeServer()
+
+
+def make_cache(server, **kwargs) -> CacheService:
+    tier = RedisCacheTier(fakeredis.FakeAsyncRedis(server=server), reconnect_delay=0.01, **kwargs)
+    return CacheService(namespaces={}, l2=tier)
+
+
+async def wait_for(condition, timeout: float = 2.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        if asyncio.get_running_loop().time() > deadline:
+            raise AssertionError("condition not met in time")
+        await asyncio.sleep(0.01)
+
+
+def test_l1_miss_is_filled_from_l2(redis_server):
+    async def scenario():
+        writer, reader = make_cache(redis_server), make_cache(redis_server)
+        await writer.set("user_workflows:42:recent", {"count": 3}, ttl=60)
+        assert "user_workflows:42:recent" not in reader.cache
+
+        assert await reader.get("user_workflows:42:recent") == {"count": 3}
+        assert "user_workflows:42:recent" in reader.cache
+        assert (await reader.get_stats())["namespaces"]["default"]["l2_hits"] == 1
+        assert 0 < reader.cache["user_workflows:42:recent"].expiry - writer.cache["user_workflows:42:recent"].expiry <= 1
+
+    asyncio.run(scenario())
+
+
+def test_bytes_values_round_trip_unchanged(redis_server):
+    async def scenario():
+        writer, reader = make_cache(redis_server), make_cache(redis_server)
+        await writer.set("integrations:catalog", b'{"integrations": []}', ttl=60)
+        return await reader.get("integrations:catalog")
+
+    assert asyncio.run(scenario()) == b'{"integrations": []}'
+
+
+def test_prefix_invalidation_uses_tag_sets(redis_server):
+    async def scenario():
+        cache = make_cache(redis_server)
+        client = cache.l2.client
+        await cache.set("user_workflows:42:recent", 1, ttl=60)
+        await cache.set("user_workflows:42:all", 2, ttl=60)
+        await cache.set("user_workflows:7:recent", 3, ttl=60)
+
+        assert await cache.invalidate_pattern("user_workflows:42:*") == 2
+        assert not await client.exists("cache:t:user_workflows:42")
+        # The invalidated keys also left the set of their shorter prefix
+        assert await client.smembers("cache:t:user_workflows") == {b"user_workflows:7:recent"}
+        assert await cache.get("user_workflows:42:recent") is None
+        assert await cache.get("user_workflows:7:recent") == 3
+
+    asyncio.run(scenario())
+
+
+def test_delete_removes_key_from_tag_sets(redis_server):
+    async def scenario():
+        cache = make_cache(redis_server)
+        await cache.set("ai:insights:1", "a", ttl=60)
+        await cache.set("ai:insights:2", "b", ttl=60)
+        await cache.delete("ai:insights:1")
+        return await cache.l2.client.smembers("cache:t:ai:insights")
+
+    assert asyncio.run(scenario()) == {b"ai:insights:2"}
+
+
+def test_tag_set_expiry_is_only_extended(redis_server):
+    async def scenario():
+        cache = make_cache(redis_server)
+        await cache.set("ai:long", 1, ttl=600)
+        await cache.set("ai:short", 2, ttl=30)
+        return await cache.l2.client.ttl("cache:t:ai")
+
+    assert 590 < asyncio.run(scenario()) <= 600
+
+
+def test_expired_members_are_pruned_from_tag_sets(redis_server):
+    async def scenario():
+        cache = make_cache(redis_server, prune_every=1, prune_sample=50)
+        client = cache.l2.client
+        for index in range(20):
+            await cache.set(f"ai:item:{index}", index, ttl=60)
+        # Entries expiring in Redis are not removed from their tag sets by Redis itself
+        await client.delete(*(f"cache:k:ai:item:{index}" for index in range(15)))
+        await cache.set("ai:item:new", "new", ttl=60)
+        return await client.scard("cache:t:ai:item"), cache.l2.stats["tags_pruned"]
+
+    assert asyncio.run(scenario()) == (6, 30)
+
+
+def test_writes_evict_other_replicas_l1_copies(redis_server):
+    async def scenario():
+        first, second = make_cache(redis_server), make_cache(redis_server)
+        await first.set("templates:popular", ["a"], ttl=60)
+        assert await second.get("templates:popular") == ["a"]
+        await wait_for(lambda: _subscribed(redis_server, first.l2.channel) == 2)
+
+        await first.set("templates:popular", ["b"], ttl=60)
+        await wait_for(lambda: "templates:popular" not in second.cache)
+        assert await second.get("templates:popular") == ["b"]
+
+        await second.invalidate_pattern("templates:*")
+        await wait_for(lambda: "templates:popular" not in first.cache)
+        assert await first.get("templates:popular") is None
+
+    asyncio.run(scenario())
+
+
+def _subscribed(server: fakeredis.FakeServer, channel: str) -> int:
+    return len(server.subscribers.get(channel.encode(), ()))
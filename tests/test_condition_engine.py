@@ -0,0 +1,67 @@
+import pytest
+
+from condition_engine import compile_condition, compile_node_condition
+
+ORDER = {
+    "status": "paid",
+    "order": {"total": "120.5", "items": [{"sku": "A-1"}, {"sku": "B-2"}]},
+    "customer": {"tier": "gold", "email": "ann@example.com"},
+    "tags": ["vip", "eu"]
+}
+
+
+@pytest.mark.parametrize("spec, expected", [
+    ({"field": "status", "operator": "equals", "value": "paid"}, True),
+    ({"field": "status", "op": "!=", "value": "paid"}, False),
+    ({"field": "order.total", "op": ">=", "value": 100}, True),
+    ({"field": "order.total", "op": "lt", "value": "100"}, False),
+    ({"field": "order.items.1.sku", "starts_with": "B-"}, True),
+    ({"field": "order.items.5.sku", "exists": True}, False),
+    ({"field": "customer.tier", "in": ["gold", "platinum"]}, True),
+    ({"field": "customer.tier", "not_in": ["gold"]}, False),
+    ({"field": "customer.email", "matches": "@example\\.com$"}, True),
+    ({"field": "tags", "contains": "vip"}, True),
+    ({"field": "customer.email", "not_contains": "example"}, False),
+    ({"field": "missing", "op": "not_exists"}, True),
+    ({"field": "missing", "op": "!=", "value": "x"}, False),
+    ({"field": "missing", "op": ">", "value": 0}, False),
+    ({"all": [{"field": "status", "value": "paid"}, {"field": "tags", "contains": "eu"}]}, True),
+    ({"any": [{"field": "status", "value": "open"}, {"field": "customer.tier", "value": "gold"}]}, True),
+    ({"not": {"field": "status", "value": "paid"}}, False),
+    (None, True),
+    ({"field": ""}, False),
+])
+def test_compiled_condition(spec, expected):
+    assert compile_condition(spec)(ORDER) is expected
+
+
+@pytest.mark.parametrize("spec", [
+    {"field": "x", "op": "between", "value": 1},
+    {"field": "x", "op": ">", "value": "many"},
+    {"field": "x", "in": 5},
+    {"field": "x", "matches": "("},
+    {"field": "x", "in": [1], "contains": 1},
+    ["not", "an", "object"],
+])
+def test_invalid_conditions_fail_at_compile_time(spec):
+    with pytest.raises(ValueError):
+        compile_condition(spec)
+
+
+@pytest.mark.parametrize("operator", ["greater_than", "<=", "contains", "not_in", "starts_with", "matches"])
+@pytest.mark.parametrize("value", ["", "  ", None])
+def test_empty_value_is_unconfigured_and_never_matches(operator, value):
+    spec = {"field": "order.total", "operator": operator, "value": value}
+    assert compile_condition(spec)(ORDER) is False
+    assert compile_node_condition({"condition": spec})(ORDER) is False
+
+
+def test_empty_value_still_compares_for_equality():
+    assert compile_condition({"field": "note", "value": ""})({"note": ""}) is True
+    assert compile_condition({"field": "status", "op": "!=", "value": ""})(ORDER) is True
+
+
+def test_node_condition_nested_or_inline():
+    assert compile_node_condition({"condition": {"field": "status", "value": "paid"}})(ORDER)
+    assert compile_node_condition({"field": "status", "value": "open", "label": "x"})(ORDER) is False
+    assert compile_node_condition({})(ORDER) is False
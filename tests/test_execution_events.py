@@ -0,0 +1,71 @@
+import asyncio
+
+import fakeredis
+
+from execution_events import EventType, ExecutionEventBus
+
+
+async def wait_for(condition, timeout: float = 2.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        if asyncio.get_running_loop().time() > deadline:
+            raise AssertionError("condition not met in time")
+        await asyncio.sleep(0.01)
+
+
+def test_subscribers_get_events_of_their_execution():
+    async def scenario():
+        bus = ExecutionEventBus()
+        with bus.subscribe("exec-1") as subscription:
+            bus.publish(EventType.NODE_STARTED, "exec-2", "wf", node_id="other")
+            bus.publish(EventType.NODE_STARTED, "exec-1", "wf", node_id="a")
+            event = await subscription.get(1)
+            assert await subscription.get(0.01) is None
+        assert bus.get_stats()["subscriptions"] == 0
+        return event
+
+    event = asyncio.run(scenario())
+    assert (event["type"], event["node_id"]) == (EventType.NODE_STARTED, "a")
+
+
+def test_slow_subscriber_drops_oldest_events():
+    async def scenario():
+        bus = ExecutionEventBus(max_queue=2)
+        subscription = bus.subscribe("exec-1")
+        for node_id in ("a", "b", "c"):
+            bus.publish(EventType.NODE_STARTED, "exec-1", "wf", node_id=node_id)
+        return subscription.dropped, [(await subscription.get(1))["node_id"] for _ in range(2)]
+
+    assert asyncio.run(scenario()) == (1, ["b", "c"])
+
+
+def test_events_are_relayed_in_order_between_processes():
+    async def scenario():
+        server = fakeredis.FakeServer()
+        worker = ExecutionEventBus(redis_client=fakeredis.FakeAsyncRedis(server=server))
+        api = ExecutionEventBus(redis_client=fakeredis.FakeAsyncRedis(server=server))
+        api.start_relay()
+        await wait_for(lambda: len(server.subscribers.get(b"execution_events", ())) == 1)
+        assert api.is_relayed and not worker.is_relayed
+
+        subscription = api.subscribe("exec-1")
+        worker.publish(EventType.EXECUTION_STARTED, "exec-1", "wf")
+        for node_id in ("a", "b", "c"):
+            worker.publish(EventType.NODE_FINISHED, "exec-1", "wf", node_id=node_id)
+        received = [await subscription.get(1) for _ in range(4)]
+
+        # A process does not deliver its own events twice
+        own = api.subscribe("exec-2")
+        api.publish(EventType.NODE_STARTED, "exec-2", "wf", node_id="x")
+        await wait_for(lambda: api.relay_stats["sent"] == 1)
+        await asyncio.sleep(0.05)
+        duplicates = own.queue.qsize()
+
+        await api.stop_relay()
+        await worker.stop_relay()
+        return received, duplicates
+
+    received, duplicates = asyncio.run(scenario())
+    assert [event["type"] for event in received] == [EventType.EXECUTION_STARTED] + [EventType.NODE_FINISHED] * 3
+    assert [event.get("node_id") for event in received[1:]] == ["a", "b", "c"]
+    assert duplicates == 1
@@ -0,0 +1,161 @@
+import asyncio
+
+from execution_queue import ExecutionQueue, Lane
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+async def subscribe(db, user_id: str, tier: str):
+    await db.subscriptions.insert_one({"user_id": user_id, "tier": tier, "status": "active"})
+
+
+def test_lanes_are_claimed_in_priority_order(mongo):
+    async def scenario():
+        queue = ExecutionQueue()
+        await queue.enqueue("batch", "wf", "user-1", kind="batch", payload={"items": [1]})
+        await queue.enqueue("standard", "wf", "user-1")
+        await queue.enqueue("interactive", "wf", "user-1", lane=Lane.INTERACTIVE)
+        return [(await queue.claim("worker"))["execution_id"] for _ in range(3)]
+
+    assert run(scenario()) == ["interactive", "standard", "batch"]
+
+
+def test_fair_queueing_interleaves_tenants(mongo):
+    async def scenario():
+        queue = ExecutionQueue()
+        for number in range(3):
+            await queue.enqueue(f"flood-{number}", "wf", "flooder")
+        await queue.enqueue("quiet-0", "wf", "quiet")
+        return [(await queue.claim("worker"))["execution_id"] for _ in range(4)]
+
+    # The quiet tenant's first job starts at the same virtual time as the flooder's first
+    assert run(scenario())[:2] == ["flood-0", "quiet-0"]
+
+
+def test_higher_tiers_get_a_larger_share(mongo):
+    async def scenario():
+        await subscribe(mongo, "enterprise-user", "enterprise")
+        queue = ExecutionQueue()
+        for number in range(8):
+            await queue.enqueue(f"free-{number}", "wf", "free-user")
+            await queue.enqueue(f"ent-{number}", "wf", "enterprise-user")
+        return [(await queue.claim("worker"))["execution_id"] for _ in range(9)]
+
+    claimed = run(scenario())
+    assert sum(execution_id.startswith("ent-") for execution_id in claimed) == 8
+
+
+def test_interactive_lane_requires_paid_tier(mongo):
+    async def scenario():
+        await subscribe(mongo, "paid", "pro")
+        queue = ExecutionQueue()
+        return (
+            await queue.admit_lane("free", Lane.INTERACTIVE),
+            await queue.admit_lane("paid", Lane.INTERACTIVE),
+            await queue.admit_lane("free", Lane.BATCH)
+        )
+
+    assert run(scenario()) == (Lane.STANDARD, Lane.INTERACTIVE, Lane.BATCH)
+
+
+def test_interactive_lane_is_capped_per_tenant(mongo):
+    async def scenario():
+        await subscribe(mongo, "paid", "pro")
+        queue = ExecutionQueue(interactive_jobs_per_tenant=2)
+        lanes = []
+        for number in range(3):
+            lane = await queue.admit_lane("paid", Lane.INTERACTIVE)
+            lanes.append(lane)
+            await queue.enqueue(f"run-{number}", "wf", "paid", lane=lane)
+        job = await queue.claim("worker")
+        await queue.ack(job["id"], "worker")
+        lanes.append(await queue.admit_lane("paid", Lane.INTERACTIVE))
+        return lanes
+
+    assert run(scenario()) == [Lane.INTERACTIVE, Lane.INTERACTIVE, Lane.STANDARD, Lane.INTERACTIVE]
+
+
+def test_claim_leases_a_job_once(mongo):
+    async def scenario():
+        queue = ExecutionQueue(visibility_timeout=60)
+        await queue.enqueue("exec-1", "wf", "user-1", {"x": 1})
+        job = await queue.claim("worker-a")
+        return job, await queue.claim("worker-b")
+
+    job, second = run(scenario())
+    assert job["execution_id"] == "exec-1"
+    assert job["trigger_data"] == {"x": 1}
+    assert (job["status"], job["lease_owner"], job["attempts"]) == ("leased", "worker-a", 1)
+    assert second is None
+
+
+def test_expired_lease_is_delivered_again(mongo):
+    async def scenario():
+        queue = ExecutionQueue(visibility_timeout=0)
+        await queue.enqueue("exec-1", "wf", "user-1")
+        first = await queue.claim("worker-a")
+        second = await queue.claim("worker-b")
+        # The first worker lost its lease and can no longer extend or ack the job
+        return first, second, await queue.extend_lease(first["id"], "worker-a"), await queue.ack(first["id"], "worker-a")
+
+    first, second, extended, acked = run(scenario())
+    assert second["id"] == first["id"]
+    assert (second["lease_owner"], second["attempts"]) == ("worker-b", 2)
+    assert not extended and not acked
+
+
+def test_ack_removes_the_job(mongo):
+    async def scenario():
+        queue = ExecutionQueue()
+        await queue.enqueue("exec-1", "wf", "user-1")
+        job = await queue.claim("worker")
+        assert await queue.extend_lease(job["id"], "worker")
+        assert await queue.ack(job["id"], "worker")
+        return await mongo.execution_queue.count_documents({})
+
+    assert run(scenario()) == 0
+
+
+def test_nack_retries_later_then_parks_the_job(mongo):
+    async def scenario():
+        queue = ExecutionQueue(max_attempts=2, retry_delay=0)
+        await queue.enqueue("exec-1", "wf", "user-1")
+        statuses = []
+        for _ in range(2):
+            job = await queue.claim("worker")
+            statuses.append(await queue.nack(job, "worker", "boom"))
+        stored = await mongo.execution_queue.find_one({"execution_id": "exec-1"})
+        return statuses, stored, await queue.claim("worker")
+
+    statuses, stored, claimed = run(scenario())
+    assert statuses == ["queued", "dead"]
+    assert (stored["status"], stored["last_error"], stored["lease_owner"]) == ("dead", "boom", None)
+    assert claimed is None
+
+
+def test_nack_delays_redelivery(mongo):
+    async def scenario():
+        queue = ExecutionQueue(retry_delay=30)
+        await queue.enqueue("exec-1", "wf", "user-1")
+        await queue.nack(await queue.claim("worker"), "worker", "boom")
+        return await queue.claim("worker")
+
+    assert run(scenario()) is None
+
+
+def test_stats_count_jobs_by_status_and_lane(mongo):
+    async def scenario():
+        queue = ExecutionQueue()
+        await queue.enqueue("exec-1", "wf", "user-1")
+        await queue.enqueue("exec-2", "wf", "user-1")
+        await queue.enqueue("exec-3", "wf", "user-2", lane=Lane.INTERACTIVE)
+        await queue.claim("worker")
+        return await queue.get_stats()
+
+    stats = run(scenario())
+    assert (stats["queued"], stats["leased"]) == (2, 1)
+    assert stats["lanes"][Lane.INTERACTIVE] == {"queued": 0, "leased": 1}
+    assert stats["top_tenants"][0] == {"user_id": "user-1", "queued": 2}
+    assert stats["queue_time_seconds"][Lane.INTERACTIVE]["free"]["claimed"] == 1
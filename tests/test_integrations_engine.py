@@ -0,0 +1,45 @@
+import asyncio
+
+import pytest
+
+from integrations_engine import IntegrationsEngine
+from retry_policy import ErrorClass
+
+
+async def timing_out(*args):
+    raise asyncio.TimeoutError()
+
+
+async def refused(*args):
+    raise ConnectionRefusedError("connection refused")
+
+
+@pytest.mark.parametrize("timeout, message", [(None, "Request timed out"), (2.5, "Request timed out after 2.5s")])
+def test_timeouts_are_reported_as_results(monkeypatch, timeout, message):
+    engine = IntegrationsEngine()
+    monkeypatch.setattr(engine, "_dispatch_action", timing_out)
+    monkeypatch.setattr(engine, "_dispatch_bulk_action", timing_out)
+
+    async def scenario():
+        single = await engine.execute_action("slack", "send_message", {}, {}, timeout=timeout)
+        bulk = await engine.execute_bulk_action("slack", "send_message", {}, [{}, {}], timeout=timeout)
+        return single, bulk
+
+    single, bulk = asyncio.run(scenario())
+    assert (single["status"], single["error"], single["error_class"]) == ("error", message, ErrorClass.TIMEOUT)
+    assert [(result["error"], result["error_class"]) for result in bulk] == [(message, ErrorClass.TIMEOUT)] * 2
+
+
+def test_failures_carry_their_error_class(monkeypatch):
+    engine = IntegrationsEngine()
+    monkeypatch.setattr(engine, "_dispatch_action", refused)
+    monkeypatch.setattr(engine, "_dispatch_bulk_action", refused)
+
+    async def scenario():
+        single = await engine.execute_action("slack", "send_message", {}, {})
+        bulk = await engine.execute_bulk_action("slack", "send_message", {}, [{}])
+        return single, bulk
+
+    single, bulk = asyncio.run(scenario())
+    assert single["error_class"] == ErrorClass.NETWORK
+    assert bulk[0]["error_class"] == ErrorClass.NETWORK
@@ -0,0 +1,108 @@
+import asyncio
+
+import pytest
+
+from rate_limiter import IntegrationLimiter, RateLimitExceeded, RateLimiterRegistry, TokenBucket
+
+
+def test_token_bucket_refills_at_its_rate():
+    bucket = TokenBucket(rate=2, capacity=2)
+    now = bucket.updated
+    bucket.take(now)
+    bucket.take(now)
+    assert bucket.wait_time(now) == pytest.approx(0.5)
+    assert bucket.wait_time(now + 0.5) == 0
+    assert bucket.is_full(now + 10)
+    assert bucket.tokens == 2
+
+
+def test_in_flight_cap_queues_calls_until_release():
+    async def scenario():
+        limiter = IntegrationLimiter("test", max_in_flight=1)
+        await limiter.acquire()
+        waiter = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0)
+        assert not waiter.done() and limiter.queued == 1
+        limiter.release()
+        await asyncio.wait_for(waiter, 1)
+        return limiter.get_stats()
+
+    stats = asyncio.run(scenario())
+    assert (stats["in_flight"], stats["queue_depth"], stats["granted"]) == (1, 0, 2)
+
+
+def test_waiting_calls_are_granted_round_robin_across_connections():
+    async def scenario():
+        limiter = IntegrationLimiter("test", max_in_flight=1)
+        await limiter.acquire("holder")
+        order = []
+
+        async def call(connection_id, label):
+            await limiter.acquire(connection_id)
+            order.append(label)
+            limiter.release()
+
+        tasks = [asyncio.create_task(call("bulk", f"bulk-{number}")) for number in range(3)]
+        tasks.append(asyncio.create_task(call("other", "other-0")))
+        await asyncio.sleep(0)
+        limiter.release()
+        await asyncio.gather(*tasks)
+        return order
+
+    assert asyncio.run(scenario()) == ["bulk-0", "other-0", "bulk-1", "bulk-2"]
+
+
+def test_rate_limit_spaces_out_calls():
+    async def scenario():
+        limiter = IntegrationLimiter("test", requests_per_second=20, burst=1)
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        for _ in range(3):
+            await limiter.acquire()
+            limiter.release()
+        return loop.time() - started
+
+    assert asyncio.run(scenario()) >= 0.09
+
+
+def test_full_queue_and_max_wait_reject_calls():
+    async def scenario():
+        full = IntegrationLimiter("full", max_in_flight=1, max_queue=0)
+        await full.acquire()
+        with pytest.raises(RateLimitExceeded):
+            await full.acquire()
+
+        slow = IntegrationLimiter("slow", max_in_flight=1, max_wait=0.01)
+        await slow.acquire()
+        with pytest.raises(RateLimitExceeded):
+            await slow.acquire()
+        return full.rejected, slow.rejected, slow.queued
+
+    assert asyncio.run(scenario()) == (1, 1, 0)
+
+
+def test_cancelled_waiter_leaves_the_queue():
+    async def scenario():
+        limiter = IntegrationLimiter("test", max_in_flight=1)
+        await limiter.acquire()
+        waiter = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0)
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+        limiter.release()
+        return limiter.queued, limiter.in_flight
+
+    assert asyncio.run(scenario()) == (0, 0)
+
+
+def test_registry_limits_only_configured_integrations():
+    async def scenario():
+        registry = RateLimiterRegistry()
+        registry.configure("limited", {"max_in_flight": 1})
+        async with registry.limit("unlimited"):
+            pass
+        async with registry.limit("limited", "connection-1"):
+            in_flight = registry.limiters["limited"].in_flight
+        return in_flight, registry.get_stats()["limited"]["in_flight"]
+
+    assert asyncio.run(scenario()) == (1, 0)
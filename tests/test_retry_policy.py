@@ -0,0 +1,112 @@
+import asyncio
+
+import pytest
+
+from models import NodeType
+from rate_limiter import RateLimitExceeded
+from retry_policy import (
+    CircuitBreaker, CircuitOpenError, ErrorClass, NodeExecutionError, RetryPolicy, classify_error
+)
+
+
+@pytest.mark.parametrize("error, expected", [
+    (NodeExecutionError("boom", ErrorClass.SERVER_ERROR), ErrorClass.SERVER_ERROR),
+    (RateLimitExceeded("slack: 1000 calls already waiting"), ErrorClass.RATE_LIMITED),
+    (asyncio.TimeoutError(), ErrorClass.TIMEOUT),
+    (ConnectionResetError(), ErrorClass.NETWORK),
+    (ValueError("bad config"), ErrorClass.CLIENT_ERROR),
+    ("HTTP 429 Too Many Requests", ErrorClass.RATE_LIMITED),
+    ("Request timed out after 5s", ErrorClass.TIMEOUT),
+    ("502 Bad Gateway", ErrorClass.SERVER_ERROR),
+    ("404 Not Found", ErrorClass.CLIENT_ERROR),
+    ("something odd happened", ErrorClass.UNKNOWN),
+])
+def test_classify_error(error, expected):
+    assert classify_error(error) == expected
+
+
+def test_retry_policy_defaults_by_node_type():
+    assert RetryPolicy.for_node(NodeType.ACTION, None).max_attempts > 1
+    assert RetryPolicy.for_node(NodeType.CONDITION, None).max_attempts == 1
+    policy = RetryPolicy.for_node(NodeType.ACTION, {"max_attempts": 4, "retry_on": ["timeout"]})
+    assert policy.should_retry(ErrorClass.TIMEOUT, 3)
+    assert not policy.should_retry(ErrorClass.TIMEOUT, 4)
+    assert not policy.should_retry(ErrorClass.SERVER_ERROR, 1)
+
+
+def test_retry_policy_rejects_unknown_settings():
+    with pytest.raises(ValueError):
+        RetryPolicy.for_node(NodeType.ACTION, {"max_attempt": 3})
+
+
+def test_backoff_is_capped_full_jitter():
+    policy = RetryPolicy(max_attempts=10, initial_delay=1, max_delay=8, multiplier=2)
+    for attempt, ceiling in [(1, 1), (2, 2), (3, 4), (6, 8)]:
+        delays = [policy.backoff(attempt) for _ in range(200)]
+        assert all(0 <= delay <= ceiling for delay in delays)
+
+
+def test_circuit_opens_after_threshold_and_probes_after_reset():
+    breaker = CircuitBreaker("slack", failure_threshold=3, reset_timeout=30)
+    for _ in range(3):
+        breaker.before_call()
+        breaker.record(ErrorClass.SERVER_ERROR)
+    assert breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+    breaker.opened_at -= 30
+    breaker.before_call()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    with pytest.raises(CircuitOpenError):
+        # Only one probe at a time
+        breaker.before_call()
+    breaker.record(None)
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_failed_probe_reopens_circuit():
+    breaker = CircuitBreaker("slack", failure_threshold=1, reset_timeout=10)
+    breaker.record(ErrorClass.NETWORK)
+    breaker.opened_at -= 10
+    breaker.before_call()
+    breaker.record(ErrorClass.TIMEOUT)
+    assert breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+
+@pytest.mark.parametrize("error_class", [ErrorClass.UNKNOWN, ErrorClass.RATE_LIMITED])
+def test_neutral_outcomes_do_not_reset_failures(error_class):
+    breaker = CircuitBreaker("slack", failure_threshold=3)
+    breaker.record(ErrorClass.SERVER_ERROR)
+    breaker.record(ErrorClass.SERVER_ERROR)
+    breaker.record(error_class)
+    assert breaker.failures == 2
+    breaker.record(ErrorClass.SERVER_ERROR)
+    assert breaker.state == CircuitBreaker.OPEN
+
+
+def test_neutral_outcome_of_probe_allows_another_probe():
+    breaker = CircuitBreaker("slack", failure_threshold=1, reset_timeout=10)
+    breaker.record(ErrorClass.SERVER_ERROR)
+    breaker.opened_at -= 10
+    breaker.before_call()
+    breaker.record(ErrorClass.UNKNOWN)
+    breaker.before_call()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+
+
+def test_local_rate_limit_rejection_is_classified_rate_limited():
+    from integrations_engine import integrations_engine
+    from rate_limiter import rate_limiter
+
+    previous = rate_limiter.limiters.get("slack")
+    rate_limiter.configure("slack", {"max_in_flight": 0, "max_queue": 0})
+    try:
+        result = asyncio.run(integrations_engine.execute_action("slack", "send_message", {}, {}))
+    finally:
+        if previous is not None:
+            rate_limiter.limiters["slack"] = previous
+    assert result["status"] == "error"
+    assert result["error_class"] == ErrorClass.RATE_LIMITED
@@ -0,0 +1,144 @@
+import asyncio
+import time
+from datetime import datetime, timedelta
+
+import execution_queue
+from execution_queue import ExecutionWorkerPool
+from timer_service import DelayScheduler, HierarchicalTimerWheel
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = time.time()
+
+    def __call__(self):
+        return self.now
+
+
+class RecordingQueue:
+    def __init__(self):
+        self.jobs = []
+
+    async def enqueue(self, execution_id, workflow_id, user_id, kind="execute", payload=None, **kwargs):
+        self.jobs.append({"execution_id": execution_id, "kind": kind, "payload": payload})
+
+
+def test_wheel_fires_timers_at_their_tick():
+    wheel = HierarchicalTimerWheel(tick=1.0, slots_per_level=(8, 8), start=0)
+    wheel.add("a", 3)
+    wheel.add("b", 5)
+    assert wheel.advance(2) == []
+    assert wheel.advance(3) == ["a"]
+    assert wheel.advance(10) == ["b"]
+    assert len(wheel) == 0
+
+
+def test_wheel_cascades_higher_levels_and_overflow():
+    wheel = HierarchicalTimerWheel(tick=1.0, slots_per_level=(4, 4), start=0)
+    wheel.add("level1", 9)
+    wheel.add("overflow", 21)
+    fired = {}
+    for now in range(1, 25):
+        for key in wheel.advance(now):
+            fired[key] = now
+    assert fired == {"level1": 9, "overflow": 21}
+
+
+def test_wheel_cancel_and_replace():
+    wheel = HierarchicalTimerWheel(tick=1.0, slots_per_level=(8, 8), start=0)
+    wheel.add("a", 2)
+    wheel.add("b", 2)
+    assert wheel.cancel("a")
+    wheel.add("b", 6)
+    assert wheel.advance(3) == []
+    assert wheel.advance(6) == ["b"]
+
+
+def test_wheel_fires_overdue_timers_on_next_advance():
+    wheel = HierarchicalTimerWheel(tick=1.0, slots_per_level=(8,), start=10)
+    wheel.add("late", 4)
+    assert wheel.advance(10) == ["late"]
+
+
+def test_schedule_is_idempotent_and_fires_once(mongo):
+    async def scenario():
+        scheduler = DelayScheduler()
+        scheduler.queue = RecordingQueue()
+        resume_at = datetime.utcnow() + timedelta(seconds=30)
+        await scheduler.schedule("exec-1", "wf-1", "user-1", "delay", resume_at)
+        await scheduler.schedule("exec-1", "wf-1", "user-1", "delay", resume_at)
+        assert await mongo.execution_timers.count_documents({}) == 1
+
+        await scheduler._fire("exec-1:delay")
+        await scheduler._fire("exec-1:delay")
+        return scheduler.queue.jobs
+
+    jobs = asyncio.run(scenario())
+    assert jobs == [{"execution_id": "exec-1", "kind": "resume", "payload": {"reason": "delay", "node_id": "delay"}}]
+
+
+def test_parallel_delays_firing_out_of_order_rearm_the_later_one(mongo):
+    async def scenario():
+        scheduler = DelayScheduler()
+        scheduler.queue = RecordingQueue()
+        now = datetime.utcnow()
+        await scheduler.schedule("exec-1", "wf-1", "user-1", "short", now + timedelta(seconds=5))
+        await scheduler.schedule("exec-1", "wf-1", "user-1", "long", now + timedelta(seconds=10))
+
+        # The long timer is claimed while the short one's resume holds the execution RUNNING,
+        # so its resume job is a no-op and the run suspends again with "long" still waiting
+        await scheduler._fire("exec-1:short")
+        await scheduler._fire("exec-1:long")
+        await scheduler.schedule("exec-1", "wf-1", "user-1", "long", now + timedelta(seconds=10))
+
+        timer = await mongo.execution_timers.find_one({"id": "exec-1:long"})
+        assert timer["status"] == "pending"
+        assert "fired_at" not in timer
+        await scheduler._fire("exec-1:long")
+        return [job["payload"]["node_id"] for job in scheduler.queue.jobs]
+
+    assert asyncio.run(scenario()) == ["short", "long", "long"]
+
+
+def test_cancel_execution_drops_pending_timers(mongo):
+    async def scenario():
+        scheduler = DelayScheduler()
+        resume_at = datetime.utcnow() + timedelta(seconds=30)
+        await scheduler.schedule("exec-1", "wf-1", "user-1", "a", resume_at)
+        await scheduler.schedule("exec-1", "wf-1", "user-1", "b", resume_at)
+        await scheduler.schedule("exec-2", "wf-1", "user-1", "a", resume_at)
+        return await scheduler.cancel_execution("exec-1")
+
+    assert asyncio.run(scenario()) == 2
+    assert asyncio.run(mongo.execution_timers.count_documents({})) == 1
+
+
+def test_non_maintenance_pool_resumes_its_own_delays_on_time(mongo, monkeypatch):
+    clock = FakeClock()
+    scheduler = DelayScheduler(tick=0.01, clock=clock)
+    monkeypatch.setattr(execution_queue, "delay_scheduler", scheduler)
+
+    async def scenario():
+        queue = RecordingQueue()
+        pool = ExecutionWorkerPool(queue, concurrency=0, run_maintenance=False)
+        pool.start()
+        # Persisted by another process: only the maintenance pool's reload picks it up
+        await mongo.execution_timers.insert_one({
+            "id": "exec-0:delay", "execution_id": "exec-0", "workflow_id": "wf-1", "user_id": "user-1",
+            "node_id": "delay", "resume_at": datetime.utcnow(), "status": "pending"
+        })
+        # What the worker does when an execution suspends on a 10 s DELAY node
+        await scheduler.schedule("exec-1", "wf-1", "user-1", "delay", datetime.utcnow() + timedelta(seconds=10))
+
+        clock.now += 9.5
+        await asyncio.sleep(0.05)
+        early = list(queue.jobs)
+        clock.now += 1
+        await asyncio.sleep(0.05)
+        await pool.stop()
+        return early, queue.jobs, scheduler.is_running
+
+    early, jobs, running = asyncio.run(scenario())
+    assert early == []
+    assert [job["execution_id"] for job in jobs] == ["exec-1"]
+    assert not running
@@ -0,0 +1,55 @@
+import json
+
+from models import NodeType, Workflow, WorkflowConnection, WorkflowNode
+from retry_policy import circuit_breakers
+from workflow_replay import RECORDING_VERSION, replay
+
+
+def flaky_recording(executions: int = 10) -> dict:
+    retry = {"max_attempts": 3, "initial_delay": 0.5, "max_delay": 4}
+    nodes = [WorkflowNode(id="trigger", type=NodeType.TRIGGER, name="trigger")] + [
+        WorkflowNode(id=f"send-{index}", type=NodeType.ACTION, name=f"send-{index}", integration="replay-test",
+                     config={"action_id": "send", "retry": retry})
+        for index in range(3)
+    ]
+    workflow = Workflow(
+        user_id="replay", name="flaky", nodes=nodes,
+        connections=[WorkflowConnection(from_node="trigger", to_node=node.id) for node in nodes[1:]]
+    )
+    return {
+        "version": RECORDING_VERSION,
+        "workflows": {workflow.id: json.loads(workflow.model_dump_json())},
+        "executions": [
+            {"workflow_id": workflow.id, "trigger_data": {"n": index}, "latencies": {"send-0": 0.2}}
+            for index in range(executions)
+        ]
+    }
+
+
+def deterministic_part(report: dict) -> dict:
+    return {key: report[key] for key in ("executions", "statuses", "provider_calls", "virtual_seconds", "latency_seconds")}
+
+
+def test_replay_with_errors_and_retries_is_repeatable():
+    recording = flaky_recording()
+    latency = {"default": {"dist": "lognormal", "median": 0.1, "sigma": 0.5}}
+    first = replay(recording, repeat=3, concurrency=4, latency=latency, error_rate=0.3, seed=7)
+    second = replay(recording, repeat=3, concurrency=4, latency=latency, error_rate=0.3, seed=7)
+
+    assert deterministic_part(first) == deterministic_part(second)
+    # Retries happened, so the runs exercised backoff and the breakers
+    assert first["provider_calls"] > 3 * len(recording["executions"]) * 3
+    assert "replay-test" not in circuit_breakers.breakers
+
+
+def test_replay_seed_changes_the_run():
+    recording = flaky_recording()
+    first = replay(recording, repeat=2, error_rate=0.3, seed=1)
+    second = replay(recording, repeat=2, error_rate=0.3, seed=2)
+    assert deterministic_part(first) != deterministic_part(second)
+
+
+def test_open_loop_replay_uses_virtual_time():
+    report = replay(flaky_recording(5), arrival_rate=10, latency={"default": {"dist": "fixed", "value": 1}})
+    assert report["statuses"] == {"success": 5}
+    assert report["latency_seconds"]["p50"] == 1.0